@@ -0,0 +1,13 @@
+# Filename: asgi.py
+# ----- Start of file content -----
+# Entry point for ASGI servers like Uvicorn or Hypercorn
+# Example usage: uvicorn "asgi:app" --workers 4
+
+from flaskr import create_app
+from flaskr.aio import asgi_app
+
+# Same factory as wsgi.py; `async def` views and get_async_db() are available
+# under either server
+app = asgi_app(create_app())
+
+# ----- End of file content -----
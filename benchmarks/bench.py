@@ -0,0 +1,328 @@
+# Filename: ./benchmarks/bench.py
+# ----- Start of file content -----
+"""
+Load-testing and benchmark suite for the core Flaskr routes.
+
+Seeds a throwaway database at a configurable scale, then drives the app
+through app.test_client() (in-process, no network) and/or a real threaded
+WSGI server, and reports p50/p95/p99 latency and throughput per route.
+
+Usage (from the project root):
+    python -m benchmarks.bench --posts 20000 --requests 500
+    python -m benchmarks.bench --save-baseline benchmarks/baseline.json
+    python -m benchmarks.bench --compare benchmarks/baseline.json --threshold 15
+"""
+import argparse
+import http.cookiejar
+import json
+import logging
+import math
+import os
+import platform
+import queue
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from flask.logging import default_handler
+from werkzeug.security import generate_password_hash
+from werkzeug.serving import make_server
+
+from flaskr import create_app
+from flaskr.db import init_db
+from flaskr.log import stop_logging
+from flaskr.render import render_markdown
+
+PASSWORD = 'benchmark'
+
+# Markdown building blocks so bodies exercise fenced_code/tables like real posts
+_MARKDOWN_BLOCKS = [
+    "## Section heading\n\nSome *emphasis*, **bold text** and a [link](https://example.com).\n",
+    "- first item\n- second item\n- third item\n",
+    "```python\ndef handler(request):\n    return render(request)\n```\n",
+    "| column | value |\n|--------|-------|\n| alpha  | 1     |\n| beta   | 2     |\n",
+    "> A quoted paragraph that goes on for a little while to pad things out.\n",
+    "Plain paragraph text. " * 8 + "\n",
+]
+
+# A route is (name, method, path, form data, needs login)
+Route = Tuple[str, str, str, Optional[Dict[str, str]], bool]
+
+
+def make_body(size: int, rng: random.Random) -> str:
+    """Build a Markdown body of roughly `size` characters."""
+    parts: List[str] = []
+    length = 0
+    while length < size:
+        block = rng.choice(_MARKDOWN_BLOCKS)
+        parts.append(block)
+        length += len(block) + 1
+    return '\n'.join(parts)
+
+
+def seed_database(app: Any, users: int, posts: int, body_size: int, seed: int = 1) -> None:
+    """
+    Create the schema and bulk-insert users and posts.
+
+    One password hash is shared by every user (hashing is the slow part of
+    seeding, not what we measure). A handful of distinct bodies are
+    pre-rendered and reused.
+    """
+    rng = random.Random(seed)
+    password_hash = generate_password_hash(PASSWORD)
+    bodies = [make_body(body_size, rng) for _ in range(16)]
+
+    with app.app_context():
+        rendered = [(body, render_markdown(body)) for body in bodies]
+        init_db()
+        db = sqlite3.connect(app.config['DATABASE'])
+        with db:
+            db.executemany(
+                'INSERT INTO user (username, password) VALUES (?, ?)',
+                ((f'user{i}', password_hash) for i in range(users))
+            )
+            start = time.time() - posts * 60
+            db.executemany(
+                'INSERT INTO post (title, body, body_html, author_id, created) VALUES (?, ?, ?, ?, ?)',
+                (
+                    (f'Post number {i}', *rendered[i % len(rendered)], rng.randint(1, users),
+                     time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(start + i * 60)))
+                    for i in range(posts)
+                )
+            )
+        db.close()
+
+
+def default_routes(posts: int, per_page: int) -> List[Route]:
+    """The core routes: the index (first, deep page, cursor), login and create."""
+    deep_page = max(1, math.ceil(posts / per_page) // 2)
+    return [
+        ('GET /', 'GET', '/', None, False),
+        (f'GET /?page={deep_page}', 'GET', f'/?page={deep_page}', None, False),
+        ('GET / (logged in)', 'GET', '/', None, True),
+        ('GET /auth/login', 'GET', '/auth/login', None, False),
+        ('POST /auth/login', 'POST', '/auth/login', {'username': 'user0', 'password': PASSWORD}, False),
+        ('GET /create', 'GET', '/create', None, True),
+        ('POST /create', 'POST', '/create', {'title': 'Benchmark post', 'body': make_body(400, random.Random(2))}, True),
+    ]
+
+
+def summarize(samples: List[float], elapsed: float) -> Dict[str, float]:
+    """Turn per-request latencies (seconds) into percentile/throughput stats."""
+    ordered = sorted(samples)
+
+    def percentile(p: float) -> float:
+        # Nearest-rank percentile, in milliseconds
+        index = max(0, math.ceil(p / 100 * len(ordered)) - 1)
+        return round(ordered[index] * 1000, 3)
+
+    return {
+        'requests': len(ordered),
+        'p50_ms': percentile(50),
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+        'throughput_rps': round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def bench_test_client(app: Any, routes: List[Route], requests: int, warmup: int) -> Dict[str, Any]:
+    """Drive each route sequentially through app.test_client()."""
+    results = {}
+    for name, method, path, data, needs_login in routes:
+        client = app.test_client()
+        if needs_login:
+            client.post('/auth/login', data={'username': 'user0', 'password': PASSWORD})
+
+        def call() -> None:
+            response = client.open(path, method=method, data=data)
+            if response.status_code >= 500:
+                raise RuntimeError(f'{name} returned {response.status_code}')
+
+        results[name] = _run(call, requests, warmup, concurrency=1)
+    return results
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Time the POST itself, like the test client does, not the page it redirects to
+    def redirect_request(self, *args: Any, **kwargs: Any) -> None:
+        return None
+
+
+def _open(opener: urllib.request.OpenerDirector, request: Any, data: Optional[bytes] = None) -> None:
+    try:
+        with opener.open(request, data) as response:
+            response.read()
+    except urllib.error.HTTPError as e:
+        e.read()
+        if e.code >= 500:
+            raise
+
+
+def bench_wsgi(app: Any, routes: List[Route], requests: int, warmup: int, concurrency: int) -> Dict[str, Any]:
+    """Drive each route over HTTP against a threaded werkzeug WSGI server."""
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+
+    def make_opener(needs_login: bool) -> urllib.request.OpenerDirector:
+        opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect()
+        )
+        if needs_login:
+            _open(opener, base_url + '/auth/login', urllib.parse.urlencode(
+                {'username': 'user0', 'password': PASSWORD}).encode())
+        return opener
+
+    results = {}
+    try:
+        for name, method, path, data, needs_login in routes:
+            # One cookie jar per client thread, logged in before timing starts
+            openers: 'queue.Queue[urllib.request.OpenerDirector]' = queue.Queue()
+            for _ in range(concurrency):
+                openers.put(make_opener(needs_login))
+            body = urllib.parse.urlencode(data).encode() if data else None
+
+            def call() -> None:
+                opener = openers.get()
+                try:
+                    _open(opener, urllib.request.Request(base_url + path, data=body, method=method))
+                finally:
+                    openers.put(opener)
+
+            results[name] = _run(call, requests, warmup, concurrency)
+    finally:
+        server.shutdown()
+    return results
+
+
+def _run(call: Callable[[], None], requests: int, warmup: int, concurrency: int) -> Dict[str, float]:
+    """Time `requests` calls (after `warmup` untimed ones) across `concurrency` threads."""
+    for _ in range(warmup):
+        call()
+
+    def timed(_: int) -> float:
+        start = time.perf_counter()
+        call()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(timed, range(requests)))
+    else:
+        samples = [timed(i) for i in range(requests)]
+    return summarize(samples, time.perf_counter() - start)
+
+
+def print_report(results: Dict[str, Dict[str, Any]]) -> None:
+    header = f"{'route':<28}{'reqs':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}"
+    for driver, routes in results.items():
+        print(f'\n[{driver}]')
+        print(header)
+        for name, stats in routes.items():
+            print(f"{name:<28}{stats['requests']:>6}{stats['p50_ms']:>10}{stats['p95_ms']:>10}"
+                  f"{stats['p99_ms']:>10}{stats['throughput_rps']:>10}")
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Compare p95 latencies against a saved baseline.
+
+    Returns:
+        Human-readable descriptions of routes slower than `threshold` percent.
+    """
+    regressions = []
+    print(f'\nComparison with baseline (p95, threshold {threshold}%):')
+    for driver, routes in results.items():
+        for name, stats in routes.items():
+            old = baseline.get('results', {}).get(driver, {}).get(name)
+            if not old or not old['p95_ms']:
+                continue
+            change = (stats['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100
+            marker = ' REGRESSION' if change > threshold else ''
+            print(f"  [{driver}] {name:<28}{old['p95_ms']:>10} -> {stats['p95_ms']:<10}({change:+.1f}%){marker}")
+            if marker:
+                regressions.append(f'[{driver}] {name}: {change:+.1f}%')
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--posts', type=int, default=5000)
+    parser.add_argument('--body-size', type=int, default=2000, help='Approximate Markdown body length.')
+    parser.add_argument('--requests', type=int, default=200, help='Timed requests per route.')
+    parser.add_argument('--warmup', type=int, default=10, help='Untimed requests per route.')
+    parser.add_argument('--concurrency', type=int, default=4, help='Client threads for the WSGI driver.')
+    parser.add_argument('--driver', choices=('test-client', 'wsgi', 'both'), default='both')
+    parser.add_argument('--save-baseline', metavar='PATH', help='Write results as a JSON baseline.')
+    parser.add_argument('--compare', metavar='PATH', help='Compare against a JSON baseline.')
+    parser.add_argument('--threshold', type=float, default=10.0, help='Allowed p95 slowdown in percent.')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='flaskr-bench-')
+    app = create_app({
+        'DATABASE': os.path.join(workdir, 'bench.sqlite'),
+        'LOG_DIR': os.path.join(workdir, 'logs'),
+        'SECRET_KEY': 'benchmark',
+        # The login route is benchmarked from one IP and one username
+        'LOGIN_RATE_LIMIT_BACKEND': 'none',
+    })
+    # Keep per-request log lines off the console; they would dominate the timings
+    app.logger.removeHandler(default_handler)
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    try:
+        print(f'Seeding {args.users} users / {args.posts} posts (~{args.body_size} chars each)...')
+        started = time.perf_counter()
+        seed_database(app, args.users, args.posts, args.body_size)
+        print(f'Seeded in {time.perf_counter() - started:.1f}s')
+
+        routes = default_routes(args.posts, app.config['POSTS_PER_PAGE'])
+        results: Dict[str, Dict[str, Any]] = {}
+        if args.driver in ('test-client', 'both'):
+            results['test_client'] = bench_test_client(app, routes, args.requests, args.warmup)
+        if args.driver in ('wsgi', 'both'):
+            results['wsgi'] = bench_wsgi(app, routes, args.requests, args.warmup, args.concurrency)
+        print_report(results)
+
+        if args.save_baseline:
+            with open(args.save_baseline, 'w') as f:
+                json.dump({
+                    'meta': {
+                        'users': args.users, 'posts': args.posts, 'body_size': args.body_size,
+                        'requests': args.requests, 'concurrency': args.concurrency,
+                        'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version,
+                        'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                    },
+                    'results': results,
+                }, f, indent=2)
+            print(f'\nBaseline saved to {args.save_baseline}')
+
+        if args.compare:
+            with open(args.compare) as f:
+                regressions = compare(results, json.load(f), args.threshold)
+            if regressions:
+                print('\nRegressions found:\n  ' + '\n  '.join(regressions))
+                return 1
+        return 0
+    finally:
+        stop_logging(app)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+# ----- End of file content -----
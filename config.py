@@ -32,6 +32,33 @@ class DefaultConfig:
         # Default to flaskr.sqlite in the instance folder
         DATABASE = os.path.join(basedir, 'instance', 'flaskr.sqlite')
 
+    # Reuse connections across requests instead of reconnecting per app context
+    DATABASE_POOL_ENABLED = os.environ.get('DATABASE_POOL_ENABLED', 'false').lower() == 'true'
+    DATABASE_POOL_SIZE = int(os.environ.get('DATABASE_POOL_SIZE', 5)) # Idle connections kept per process
+
+    # SQLite tuning applied to every new connection. WAL lets readers proceed
+    # while another worker writes; busy_timeout makes writers wait instead of failing.
+    DATABASE_PRAGMAS = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'wal'),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'normal'), # Safe with WAL, far fewer fsyncs
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)), # Milliseconds
+        'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -20000)), # Negative = KiB (~20 MB)
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 268435456)), # 256 MB
+        'temp_store': 'memory',
+    }
+    # Settings stored in the database file itself; applied by 'flask init-db --persistent-pragmas'
+    DATABASE_PERSISTENT_PRAGMAS = {
+        'journal_mode': 'wal',
+        'page_size': 4096,
+    }
+    # Read routing: read-only views (post listings and display, feeds, loading g.user)
+    # use get_db(readonly=True). DATABASE_READONLY gives them a separate mode=ro
+    # connection to DATABASE. DATABASE_REPLICA makes them read that file instead, a copy
+    # of DATABASE refreshed with the SQLite backup API by 'flask refresh-replica
+    # --interval N'. Writes always go to DATABASE.
+    DATABASE_READONLY = os.environ.get('DATABASE_READONLY', 'false').lower() == 'true'
+    DATABASE_REPLICA = os.environ.get('DATABASE_REPLICA') # e.g. instance/flaskr-replica.sqlite
+
 
     # --- Flask Environment ---
     # Set via FLASK_ENV environment variable (e.g., 'development', 'production')
@@ -40,8 +67,118 @@ class DefaultConfig:
     DEBUG = FLASK_ENV == 'development'
     TESTING = FLASK_ENV == 'testing' # Or set explicitly for testing config
 
+    # --- Logging (production only; written by a background thread) ---
+    LOG_DIR = os.environ.get('LOG_DIR', 'logs')
+    LOG_FILENAME = os.environ.get('LOG_FILENAME', 'flaskr.log')
+    LOG_MAX_BYTES = int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024)) # Rotate at 10 MB
+    LOG_BACKUP_COUNT = int(os.environ.get('LOG_BACKUP_COUNT', 10))
+    LOG_JSON = os.environ.get('LOG_JSON', 'false').lower() == 'true' # One JSON object per line
+
+    # --- Instrumentation ---
+    # Time requests, SQL, templates and Markdown; adds Server-Timing and a metrics endpoint
+    INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION_ENABLED', 'false').lower() == 'true'
+    METRICS_ENDPOINT = os.environ.get('METRICS_ENDPOINT', '/metrics') # Prometheus text format
+
     # --- Application Specific Settings ---
-    POSTS_PER_PAGE = os.environ.get('POSTS_PER_PAGE', 5) # Example app-specific setting
+    # Default page size of every post listing (index, author/tag pages, API), and
+    # the most a request may ask for with ?per_page= (or ?limit= on the API)
+    POSTS_PER_PAGE = int(os.environ.get('POSTS_PER_PAGE', 5))
+    MAX_POSTS_PER_PAGE = int(os.environ.get('MAX_POSTS_PER_PAGE', 100))
+
+    # --- Async views ---
+    # Threads that run SQLite calls for get_async_db() (see flaskr/aio.py and asgi.py)
+    ASYNC_DB_WORKERS = int(os.environ.get('ASYNC_DB_WORKERS', 8))
+    # Threads serving requests under asgi.py; bounds how many run at once per process
+    ASGI_WORKERS = int(os.environ.get('ASGI_WORKERS', 32))
+
+    # --- Password hashing ---
+    # Any werkzeug method string, e.g. 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'.
+    # Stored hashes made with other parameters are upgraded on the user's next login.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_SALT_LENGTH = int(os.environ.get('PASSWORD_HASH_SALT_LENGTH', 16))
+    # Worker processes for hashing/verification (0 = hash on the request thread)
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    # How hash workers are started: 'forkserver' or 'spawn' (never fork, which is unsafe
+    # in a multi-threaded server). Both re-import the main module in each worker, so a
+    # script that creates the app and hashes should do so under `if __name__ == '__main__':`;
+    # without the guard, hashing falls back to the calling process.
+    PASSWORD_HASH_START_METHOD = os.environ.get('PASSWORD_HASH_START_METHOD', 'forkserver')
+
+    # --- Login rate limiting ---
+    # 'memory' (per process), 'sqlite' (shared by all workers on the host) or 'none'
+    LOGIN_RATE_LIMIT_BACKEND = os.environ.get('LOGIN_RATE_LIMIT_BACKEND', 'memory')
+    LOGIN_RATE_LIMIT_PERIOD = int(os.environ.get('LOGIN_RATE_LIMIT_PERIOD', 60)) # Seconds
+    LOGIN_RATE_LIMIT_PER_IP = int(os.environ.get('LOGIN_RATE_LIMIT_PER_IP', 20)) # Attempts per period
+    LOGIN_RATE_LIMIT_PER_USERNAME = int(os.environ.get('LOGIN_RATE_LIMIT_PER_USERNAME', 10))
+    LOGIN_RATE_LIMIT_MAX_KEYS = int(os.environ.get('LOGIN_RATE_LIMIT_MAX_KEYS', 10000)) # Memory backend bound
+    LOGIN_RATE_LIMIT_DATABASE = os.environ.get('LOGIN_RATE_LIMIT_DATABASE') # Defaults to instance/ratelimit.sqlite
+    # Proxies in front of the app whose X-Forwarded-For / X-Forwarded-Proto headers are
+    # trusted (0 = none). Behind a reverse proxy request.remote_addr is the proxy's address,
+    # so every client would share one per-IP login bucket; set these to the number of
+    # proxies, never more, or clients can spoof their address.
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 0))
+    PROXY_FIX_X_PROTO = int(os.environ.get('PROXY_FIX_X_PROTO', 0))
+
+    # --- Caching ---
+    # Logged-in user records cached per process (entries, seconds)
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 1024))
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+    # Author id -> username for post listings (entries, seconds)
+    AUTHOR_CACHE_SIZE = int(os.environ.get('AUTHOR_CACHE_SIZE', 4096))
+    AUTHOR_CACHE_TTL = int(os.environ.get('AUTHOR_CACHE_TTL', 300))
+
+    # Full-page cache for anonymous GETs of the index: 'memory', 'filesystem', 'external' or 'none'
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'memory')
+    RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 256)) # Max cached pages
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 300)) # Seconds
+    RESPONSE_CACHE_DIR = os.environ.get('RESPONSE_CACHE_DIR') # Defaults to instance/response_cache
+    # Expose hit/miss counters as JSON at /cache-stats
+    CACHE_STATS_ENDPOINT = os.environ.get('CACHE_STATS_ENDPOINT', 'false').lower() == 'true'
+
+    # --- Compression & static files ---
+    # gzip (or brotli, if installed) for responses of these types above COMPRESS_MIN_SIZE bytes
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 500))
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6)) # 1 (fast) - 9 (small)
+    COMPRESS_MIMETYPES = ['text/html', 'text/css', 'text/plain', 'text/xml', 'application/json',
+                          'application/javascript', 'application/atom+xml', 'application/rss+xml',
+                          'image/svg+xml']
+    # Cache lifetime for versioned static URLs (url_for('static') adds ?v=<content hash>)
+    STATIC_CACHE_MAX_AGE = int(os.environ.get('STATIC_CACHE_MAX_AGE', 31536000))
+
+    # --- Templates ---
+    # Persist compiled templates so new workers skip compiling them ('flask warmup' fills it).
+    # Unset (None) means on, except under TESTING so test runs don't write to the instance folder.
+    TEMPLATE_BYTECODE_CACHE = (
+        os.environ['TEMPLATE_BYTECODE_CACHE'].lower() == 'true' if 'TEMPLATE_BYTECODE_CACHE' in os.environ else None
+    )
+    TEMPLATE_BYTECODE_CACHE_DIR = os.environ.get('TEMPLATE_BYTECODE_CACHE_DIR') # Defaults to instance/jinja_cache
+
+    # --- Markdown ---
+    # Extensions used to render post bodies. Run 'flask rerender-posts' after changing them.
+    MARKDOWN_EXTENSIONS = ['fenced_code', 'tables']
+
+    # --- Pagination ---
+    # 'page' keeps the ?page=N (LIMIT/OFFSET) links, 'cursor' uses opaque keyset tokens
+    PAGINATION_MODE = os.environ.get('PAGINATION_MODE', 'page')
+    # Show "Page X of Y" in page mode; False skips the COUNT query entirely
+    PAGINATION_SHOW_TOTAL = os.environ.get('PAGINATION_SHOW_TOTAL', 'true').lower() == 'true'
+    # Seconds to cache post counts read from the stats table (0 = read on every request)
+    POST_COUNT_CACHE_TTL = int(os.environ.get('POST_COUNT_CACHE_TTL', 30))
+
+    # --- Streaming ---
+    # Stream post listings (header first, posts as they are read from the cursor)
+    # instead of building the whole page in memory. Streamed pages skip the response cache.
+    STREAM_LISTINGS = os.environ.get('STREAM_LISTINGS', 'false').lower() == 'true'
+    STREAM_FETCH_SIZE = int(os.environ.get('STREAM_FETCH_SIZE', 20)) # Rows per fetchmany()
+    STREAM_FLUSH_SIZE = int(os.environ.get('STREAM_FLUSH_SIZE', 4096)) # Characters per chunk sent
+
+    # --- Feeds ---
+    # /feed.atom and /feed.rss list the newest FEED_SIZE posts. The serialized feed is
+    # cached in-process and only rebuilt when those posts change.
+    FEED_SIZE = int(os.environ.get('FEED_SIZE', 20))
+    FEED_TITLE = os.environ.get('FEED_TITLE', 'Flaskr')
+    FEED_CACHE_SIZE = int(os.environ.get('FEED_CACHE_SIZE', 8)) # Cached feeds (format x host) kept
 
 
 # Example of separate TestingConfig if needed
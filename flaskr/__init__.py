@@ -2,12 +2,12 @@
 # ----- Start of file content -----
 import logging
 import os
-from logging.handlers import RotatingFileHandler
 from typing import Any, Mapping, Optional
 import datetime # <--- IMPORT DATETIME
 
 from flask import Flask, render_template
-from markdown import markdown
+
+from .startup import StartupTimer
 
 
 def create_app(test_config: Optional[Mapping[str, Any]] = None) -> Flask:
@@ -20,6 +20,7 @@ def create_app(test_config: Optional[Mapping[str, Any]] = None) -> Flask:
     Returns:
         The configured Flask application instance.
     """
+    timer = StartupTimer() # Boot cost per phase, reported below and by 'flask warmup'
     app = Flask(__name__, instance_relative_config=True)
 
     # --- 1. Load Configuration ---
@@ -31,49 +32,65 @@ def create_app(test_config: Optional[Mapping[str, Any]] = None) -> Flask:
         app.config.from_prefixed_env()
     else:
         app.config.from_mapping(test_config)
-
+    timer.mark('config')
 
     # --- 2. Ensure Instance Folder Exists ---
     # ... (instance folder code remains the same) ...
     try:
         os.makedirs(app.instance_path)
-        app.logger.info(f"Instance path created at {app.instance_path}")
+        app.logger.info("Instance path created at %s", app.instance_path)
     except OSError:
         pass
 
+    # Compiled templates are shared between workers through the instance folder
+    from . import startup
+    startup.configure_bytecode_cache(app)
+
     # --- 3. Configure Logging ---
-    # ... (logging code remains the same) ...
+    # File logging goes through a queue so request threads never wait on disk I/O
     if not app.debug and not app.testing:
-        if not os.path.exists('logs'):
-            os.mkdir('logs')
-        file_handler = RotatingFileHandler('logs/flaskr.log', maxBytes=10240, backupCount=10)
-        file_handler.setFormatter(logging.Formatter(
-            '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-        ))
-        file_handler.setLevel(logging.INFO)
-        app.logger.addHandler(file_handler)
-        app.logger.setLevel(logging.INFO)
+        from .log import configure_logging
+        configure_logging(app)
         app.logger.info('Flaskr startup')
     else:
         app.logger.setLevel(logging.DEBUG)
+    timer.mark('logging')
 
     # --- 4. Initialize Extensions & Database ---
-    from . import db
+    from . import aio, db, passwords, ratelimit, response_cache
     db.init_app(app)
+    aio.init_app(app) # get_async_db() for `async def` views
+    response_cache.init_app(app)
+    passwords.init_app(app)
+    ratelimit.init_app(app)
+    timer.mark('extensions')
 
     # --- 5. Register Blueprints ---
-    from . import auth, blog, errors
+    from . import api, auth, blog, errors, feeds, search
+    app.app_ctx_globals_class = auth.AppGlobals # g.user is loaded lazily and cached
     app.register_blueprint(auth.bp)
     app.register_blueprint(blog.bp)
+    app.register_blueprint(api.bp) # Read-only JSON API under /api
+    app.register_blueprint(search.bp)
+    app.register_blueprint(feeds.bp) # /feed.atom and /feed.rss
     app.register_blueprint(errors.bp) # Register error handlers blueprint
 
     app.add_url_rule('/', endpoint='index')
+    timer.mark('blueprints')
 
     # --- 6. Register Custom Jinja Filters ---
-    @app.template_filter('markdown')
-    def markdown_filter(s: str) -> str:
-        """Converts Markdown text to HTML."""
-        return markdown(s, extensions=['fenced_code', 'tables'])
+    # 'markdown' filter + rerender-posts command; post bodies are pre-rendered on save
+    from . import render
+    render.init_app(app)
+
+    # gzip/brotli responses, precompressed + content-hashed static files
+    from . import compress
+    compress.init_app(app)
+
+    # Opt-in per-request timing (Server-Timing header + Prometheus /metrics)
+    from . import instrumentation
+    instrumentation.init_app(app)
+    startup.init_app(app) # 'flask warmup'
 
     # --- Inject 'now' into Jinja context --- # <--- ADD THIS SECTION ---
     @app.context_processor
@@ -87,7 +104,17 @@ def create_app(test_config: Optional[Mapping[str, Any]] = None) -> Flask:
         app.logger.debug("Accessed /hello route")
         return 'Hello, World!'
 
-    app.logger.info("Flask application created successfully.")
+    # Take the client address/scheme from X-Forwarded-* set by trusted proxies,
+    # so per-IP limits see clients rather than the proxy
+    if app.config.get('PROXY_FIX_X_FOR') or app.config.get('PROXY_FIX_X_PROTO'):
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(
+            app.wsgi_app, x_for=app.config.get('PROXY_FIX_X_FOR', 0), x_proto=app.config.get('PROXY_FIX_X_PROTO', 0)
+        )
+
+    timer.mark('finish')
+    app.extensions['flaskr.startup'] = timer
+    app.logger.info("Flask application created successfully: %s", timer.report())
     return app
 
 # ----- End of file content -----
\ No newline at end of file
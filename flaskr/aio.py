@@ -0,0 +1,148 @@
+# Filename: ./flaskr/aio.py
+# ----- Start of file content -----
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence
+
+from asgiref.sync import ThreadSensitiveContext
+from asgiref.wsgi import WsgiToAsgi
+from flask import current_app, g
+
+from flaskr.db import acquire_connection, release_connection, use_readonly
+
+
+class AsyncConnection:
+    """
+    Awaitable wrapper around a sqlite3 connection.
+
+    Every call runs on the app's database thread pool, so `async def` views
+    never block the event loop on SQLite I/O. The connection is checked out
+    lazily on that pool too, from the same connection pool (and with the same
+    hooks) as get_db(). Calls for one request are awaited one after another,
+    so the connection is never used by two threads at once.
+    """
+
+    def __init__(self, app: Any, readonly: bool = False) -> None:
+        self._app = app
+        self._readonly = readonly
+        self._executor: ThreadPoolExecutor = app.extensions['flaskr.db_executor']
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = acquire_connection(self._app, self._readonly)
+        return self._conn
+
+    async def _run(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: func(self._connection()))
+
+    async def fetchall(self, sql: str, params: Sequence[Any] = ()) -> List[sqlite3.Row]:
+        """Run a query and return all rows."""
+        return await self._run(lambda conn: conn.execute(sql, params).fetchall())
+
+    async def fetchone(self, sql: str, params: Sequence[Any] = ()) -> Optional[sqlite3.Row]:
+        """Run a query and return the first row (or None)."""
+        return await self._run(lambda conn: conn.execute(sql, params).fetchone())
+
+    async def execute(self, sql: str, params: Sequence[Any] = ()) -> Optional[int]:
+        """Run a statement and return the cursor's lastrowid."""
+        return await self._run(lambda conn: conn.execute(sql, params).lastrowid)
+
+    async def executemany(self, sql: str, seq_of_params: Sequence[Sequence[Any]]) -> None:
+        await self._run(lambda conn: conn.executemany(sql, seq_of_params))
+
+    async def commit(self) -> None:
+        await self._run(lambda conn: conn.commit())
+
+    async def rollback(self) -> None:
+        await self._run(lambda conn: conn.rollback())
+
+    def close(self) -> None:
+        """Return the connection to its pool (or close it)."""
+        if self._conn is not None:
+            release_connection(self._app, self._conn, self._readonly)
+            self._conn = None
+
+
+def get_async_db(readonly: Optional[bool] = None) -> AsyncConnection:
+    """
+    The async counterpart of flaskr.db.get_db() for `async def` views.
+
+    Args:
+        readonly: As for get_db(): None picks the read-only connection inside
+            @read_only views.
+
+    Returns:
+        This app context's AsyncConnection (created on first use).
+    """
+    key = 'async_db_ro' if use_readonly(readonly) else 'async_db'
+    if key not in g:
+        setattr(g, key, AsyncConnection(current_app._get_current_object(), readonly=key == 'async_db_ro'))
+    return getattr(g, key)
+
+
+def close_async_db(e: Optional[BaseException] = None) -> None:
+    """Release the app context's async connections, if any were opened."""
+    for key in ('async_db', 'async_db_ro'):
+        db = g.pop(key, None)
+        if db is not None:
+            db.close()
+
+
+class PooledWsgiToAsgi(WsgiToAsgi):
+    """
+    WsgiToAsgi serving each request on its own thread.
+
+    WsgiToAsgi runs the WSGI app with thread_sensitive=True, which outside a
+    ThreadSensitiveContext means one thread shared by every request, so
+    requests would be served one at a time. Entering a ThreadSensitiveContext
+    per request gives each its own thread; at most `workers` run at once.
+    """
+
+    def __init__(self, wsgi_application: Any, workers: int) -> None:
+        super().__init__(wsgi_application)
+        self._workers = workers
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        if self._slots is None:
+            # Created here so it belongs to the server's event loop
+            self._slots = asyncio.Semaphore(self._workers)
+        async with self._slots:
+            async with ThreadSensitiveContext():
+                await super().__call__(scope, receive, send)
+
+
+def asgi_app(app: Any) -> Any:
+    """
+    Wrap the Flask app for ASGI servers (uvicorn, hypercorn, daphne).
+
+    Flask itself is WSGI, so each request still runs on a thread; what ASGI
+    adds is that up to ASGI_WORKERS of them are served concurrently per
+    process, and `async def` views await SQLite through get_async_db().
+
+    Args:
+        app: The Flask application instance.
+
+    Returns:
+        An ASGI application.
+    """
+    return PooledWsgiToAsgi(app, app.config.get('ASGI_WORKERS', 32))
+
+
+def init_app(app: Any) -> None:
+    """
+    Create the database thread pool for get_async_db() and register teardown
+    of async connections. The pool's threads are only started on first use.
+
+    Args:
+        app: The Flask application instance.
+    """
+    app.extensions['flaskr.db_executor'] = ThreadPoolExecutor(
+        max_workers=app.config.get('ASYNC_DB_WORKERS', 8), thread_name_prefix='flaskr-db'
+    )
+    app.teardown_appcontext(close_async_db)
+
+# ----- End of file content -----
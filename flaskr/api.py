@@ -0,0 +1,140 @@
+# Filename: ./flaskr/api.py
+# ----- Start of file content -----
+import json
+from typing import Any, Dict, Iterator, Optional
+
+from flask import (Blueprint, Response, abort, current_app, jsonify, request,
+                   stream_with_context)
+
+from flaskr.aio import get_async_db
+from flaskr.blog import get_post
+from flaskr.db import get_db, read_only
+from flaskr.pagination import decode_cursor, encode_cursor, get_per_page
+from flaskr.posts import get_posts_page
+
+# Read-only JSON API, prefixed with /api
+bp = Blueprint('api', __name__, url_prefix='/api')
+
+EXPORT_FETCH_SIZE = 500 # Rows pulled from the cursor per fetchmany() while streaming
+
+
+def _isoformat(value: Any) -> Optional[str]:
+    return value.isoformat(sep=' ') if value is not None else None
+
+
+def post_to_dict(post: Any) -> Dict[str, Any]:
+    """
+    Serialize a post row (as returned by the blog listing queries) to a dict.
+
+    Args:
+        post: A row with id, title, body, body_html, created, updated, author_id, username.
+
+    Returns:
+        A JSON-serializable dict.
+    """
+    return {
+        'id': post['id'],
+        'title': post['title'],
+        'body': post['body'],
+        'body_html': post['body_html'],
+        'created': _isoformat(post['created']),
+        'updated': _isoformat(post['updated']),
+        'author': {'id': post['author_id'], 'username': post['username']},
+    }
+
+
+def _posts_page(author_id: Optional[int] = None) -> Response:
+    """Build a cursor-paginated JSON listing from the request's after/before/limit."""
+    limit = get_per_page(names=('limit', 'per_page')) # Bounded by MAX_POSTS_PER_PAGE
+    after = request.args.get('after')
+    before = request.args.get('before')
+    after_cursor = decode_cursor(after)
+    before_cursor = decode_cursor(before)
+    if (after and after_cursor is None) or (before and before_cursor is None):
+        abort(400, 'Malformed pagination cursor.')
+
+    posts, has_prev, has_next = get_posts_page(after_cursor, before_cursor, limit, author_id)
+    return jsonify({
+        'posts': [post_to_dict(post) for post in posts],
+        'prev': encode_cursor(posts[0]['created'], posts[0]['id']) if posts and has_prev else None,
+        'next': encode_cursor(posts[-1]['created'], posts[-1]['id']) if posts and has_next else None,
+    })
+
+
+@bp.route('/posts')
+@read_only
+def list_posts() -> Response:
+    """
+    List posts newest first.
+    Query parameters: limit (or per_page), and an 'after' or 'before' cursor from a previous page.
+    """
+    return _posts_page()
+
+
+@bp.route('/posts/<int:id>')
+@read_only
+def get_post_json(id: int) -> Response:
+    """Return a single post by id."""
+    return jsonify(post_to_dict(get_post(id, check_author=False)))
+
+
+@bp.route('/users/<username>/posts')
+@read_only
+def list_user_posts(username: str) -> Response:
+    """List one author's posts newest first, with the same paging as /api/posts."""
+    user = get_db().execute(
+        'SELECT id FROM user WHERE username = ?', (username,)
+    ).fetchone()
+    if user is None:
+        abort(404, f"User {username} doesn't exist.")
+    return _posts_page(user['id'])
+
+
+@bp.route('/posts/export.ndjson')
+@read_only
+def export_posts() -> Response:
+    """
+    Stream every post as newline-delimited JSON, oldest first.
+
+    Rows are read from the cursor in fetchmany() batches and written out as
+    they arrive, so memory use does not grow with the size of the table.
+    """
+    def generate() -> Iterator[str]:
+        cursor = get_db().execute(
+            'SELECT p.id, title, body, body_html, created, updated, author_id, username'
+            ' FROM post p JOIN user u ON p.author_id = u.id'
+            ' ORDER BY created, p.id'
+        )
+        while True:
+            rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+            if not rows:
+                break
+            yield ''.join(json.dumps(post_to_dict(row)) + '\n' for row in rows)
+        current_app.logger.debug("Finished streaming post export.")
+
+    # stream_with_context keeps the app context (and its DB connection) alive
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@bp.route('/stats')
+@read_only
+async def site_stats() -> Dict[str, int]:
+    """
+    Return site-wide post and user counts.
+
+    An `async def` view: its queries run on the get_async_db() thread pool, so
+    under asgi.py the request's thread is not tied up while SQLite works.
+    """
+    db = get_async_db()
+    posts = await db.fetchone("SELECT value FROM stats WHERE name = 'posts' AND author_id = 0")
+    users = await db.fetchone('SELECT COUNT(*) FROM user')
+    return {'posts': posts[0] if posts else 0, 'users': users[0]}
+
+
+@bp.errorhandler(400)
+@bp.errorhandler(404)
+def api_error(error: Any) -> Any:
+    """Report API errors as JSON instead of the HTML error pages."""
+    return jsonify({'error': error.description}), error.code
+
+# ----- End of file content -----
@@ -1,14 +1,19 @@
 # Filename: ./flaskr/auth.py
 # ----- Start of file content -----
 import functools
-from typing import Any, Callable, Optional, Union
+import inspect
+from typing import Any, Callable, Dict, Optional, Tuple, Union
 
-from flask import (Blueprint, current_app, flash, g, redirect,
-                   render_template, request, session, url_for)
-from werkzeug.security import check_password_hash, generate_password_hash
+from flask import (Blueprint, current_app, flash, g, has_request_context,
+                   redirect, render_template, request, session, url_for)
+from flask.ctx import _AppCtxGlobals
 from werkzeug.wrappers import Response
 
+from flaskr.cache import LRUCache
 from flaskr.db import get_db
+from flaskr.passwords import hash_password, needs_rehash, verify_password
+from flaskr.posts import invalidate_author
+from flaskr.ratelimit import check_login_rate
 
 # Create blueprint for authentication routes, prefixed with /auth
 bp = Blueprint('auth', __name__, url_prefix='/auth')
@@ -40,19 +45,19 @@ def register() -> Union[str, Response]:
             try:
                 db.execute(
                     "INSERT INTO user (username, password) VALUES (?, ?)",
-                    (username, generate_password_hash(password)), # Hash password before storing
+                    (username, hash_password(password)), # Hash password before storing
                 )
                 db.commit()
-                current_app.logger.info(f"User '{username}' registered successfully.")
+                current_app.logger.info("User '%s' registered successfully.", username)
             except db.IntegrityError:
                 # This error occurs if the username already exists (due to UNIQUE constraint)
                 error = f"Username '{username}' is already taken."
-                current_app.logger.warning(f"Registration failed: {error}")
+                current_app.logger.warning("Registration failed: %s", error)
             except db.Error as e:
                 # Catch other potential database errors
                 db.rollback() # Rollback transaction on error
                 error = "An internal error occurred during registration. Please try again later."
-                current_app.logger.error(f"Database error during registration for '{username}': {e}")
+                current_app.logger.error("Database error during registration for '%s': %s", username, e)
             else:
                 # Registration successful, redirect to login page
                 flash(f"User '{username}' successfully registered. Please log in.", 'success')
@@ -66,7 +71,7 @@ def register() -> Union[str, Response]:
 
 
 @bp.route('/login', methods=('GET', 'POST'))
-def login() -> Union[str, Response]:
+def login() -> Union[str, Response, Tuple[str, int, Dict[str, str]]]:
     """
     Handle user login.
     GET: Displays the login form.
@@ -75,6 +80,13 @@ def login() -> Union[str, Response]:
     if request.method == 'POST':
         username = request.form.get('username', '').strip()
         password = request.form.get('password', '')
+
+        # Throttle before any database or hashing work
+        retry_after = check_login_rate(username)
+        if retry_after is not None:
+            flash('Too many login attempts. Please try again later.', 'error')
+            return render_template('auth/login.html'), 429, {'Retry-After': str(retry_after)}
+
         db = get_db()
         error: Optional[str] = None
         user: Optional[Any] = None # Use Any or create a User dataclass/dict type
@@ -91,54 +103,133 @@ def login() -> Union[str, Response]:
                 ).fetchone()
             except db.Error as e:
                  error = "An internal error occurred during login. Please try again later."
-                 current_app.logger.error(f"Database error during login attempt for '{username}': {e}")
+                 current_app.logger.error("Database error during login attempt for '%s': %s", username, e)
 
             if user is None:
                 error = 'Incorrect username or password.' # Generic error for security
-            elif not check_password_hash(user['password'], password):
+            elif not verify_password(user['password'], password):
                 error = 'Incorrect username or password.' # Generic error
+            elif needs_rehash(user['password']):
+                # Hash method/cost changed since this password was stored; upgrade it
+                # now, while we have the plaintext
+                db.execute(
+                    'UPDATE user SET password = ? WHERE id = ?',
+                    (hash_password(password), user['id'])
+                )
+                db.commit()
+                invalidate_user(user['id'])
+                current_app.logger.info("Rehashed password for user ID %s.", user['id'])
 
         if error is None and user is not None:
             # Credentials are valid, store user id in session
             session.clear() # Clear any previous session data
             session['user_id'] = user['id']
-            current_app.logger.info(f"User '{username}' (ID: {user['id']}) logged in successfully.")
+            current_app.logger.info("User '%s' (ID: %s) logged in successfully.", username, user['id'])
             # Redirect to the main index page after login
             flash(f"Welcome back, {username}!", 'success')
             return redirect(url_for('index'))
 
         # If there was an error, flash the message
         flash(error, 'error')
-        current_app.logger.warning(f"Login failed for username '{username}': {error}")
+        current_app.logger.warning("Login failed for username '%s': %s", username, error)
 
     # For GET requests or if POST had an error, render the login template
     return render_template('auth/login.html')
 
 
-@bp.before_app_request
-def load_logged_in_user() -> None:
+class AppGlobals(_AppCtxGlobals):
     """
-    Load user data into g.user before each request if a user_id is in the session.
-    Runs automatically before any view function within the application context.
+    The app's 'g' object, with g.user resolved lazily.
+
+    The user row is only looked up the first time a view or template reads
+    g.user, so requests that never touch it cost no database round-trip.
     """
-    user_id: Optional[int] = session.get('user_id')
 
+    def __getattr__(self, name: str) -> Any:
+        if name == 'user':
+            self.user = _load_user()
+            return self.user
+        raise AttributeError(name)
+
+
+def _get_user_cache() -> LRUCache:
+    """Return this app's user record cache, creating it on first use."""
+    cache = current_app.extensions.get('flaskr.user_cache')
+    if cache is None:
+        cache = current_app.extensions['flaskr.user_cache'] = LRUCache(
+            maxsize=current_app.config.get('USER_CACHE_SIZE', 1024),
+            ttl=current_app.config.get('USER_CACHE_TTL', 60)
+        )
+    return cache
+
+
+def get_user(user_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Return the user record for `user_id`, served from the LRU cache when possible.
+
+    Args:
+        user_id: The id of the user.
+
+    Returns:
+        A dict of the user's columns, or None if no such user exists.
+    """
+    cache = _get_user_cache()
+    user = cache.get(user_id)
+    if user is None:
+        sql = 'SELECT * FROM user WHERE id = ?'
+        row = get_db(readonly=True).execute(sql, (user_id,)).fetchone()
+        if row is None and current_app.config.get('DATABASE_REPLICA'):
+            # Users registered since the last replica refresh are only on the primary
+            row = get_db(readonly=False).execute(sql, (user_id,)).fetchone()
+        if row is None:
+            return None
+        user = dict(row)
+        cache.set(user_id, user)
+    return user
+
+
+def invalidate_user(user_id: int) -> None:
+    """
+    Drop a cached user record. Call this after updating or deleting a user row.
+
+    Args:
+        user_id: The id of the changed user.
+    """
+    _get_user_cache().delete(user_id)
+    invalidate_author(user_id) # Post listings cache usernames separately
+
+
+def _load_user() -> Optional[Dict[str, Any]]:
+    """
+    Resolve the logged-in user from the session (called lazily by AppGlobals).
+    """
+    if not has_request_context():
+        return None
+    user_id: Optional[int] = session.get('user_id')
     if user_id is None:
-        g.user = None
-    else:
-        try:
-            # Fetch user data from DB based on session user_id
-            g.user = get_db().execute(
-                'SELECT * FROM user WHERE id = ?', (user_id,)
-            ).fetchone()
-            # If user ID in session doesn't match a user (e.g., user deleted), clear session
-            if g.user is None:
-                session.clear()
-                current_app.logger.warning(f"User ID {user_id} from session not found in database. Session cleared.")
-        except Exception as e:
-            # Handle potential DB errors during user loading
-            g.user = None
-            current_app.logger.error(f"Error loading user {user_id} from session: {e}")
+        return None
+
+    try:
+        user = get_user(user_id)
+    except Exception as e:
+        # Handle potential DB errors during user loading
+        current_app.logger.error("Error loading user %s from session: %s", user_id, e)
+        return None
+
+    # If user ID in session doesn't match a user (e.g., user deleted), clear session
+    if user is None:
+        session.clear()
+        current_app.logger.warning("User ID %s from session not found in database. Session cleared.", user_id)
+    return user
+
+
+@bp.before_app_request
+def load_logged_in_user() -> None:
+    """
+    Reset g.user before each request so it is re-resolved from the session.
+    The lookup itself is deferred until g.user is first read (see AppGlobals).
+    """
+    g.pop('user', None)
 
 @bp.route('/logout')
 def logout() -> Response:
@@ -147,7 +238,7 @@ def logout() -> Response:
     """
     username = g.user['username'] if g.user else 'Unknown user'
     session.clear() # Remove user_id and any other data from the session
-    current_app.logger.info(f"User '{username}' logged out.")
+    current_app.logger.info("User '%s' logged out.", username)
     flash("You have been logged out.", 'info')
     return redirect(url_for('index')) # Redirect to the main index page
 
@@ -156,7 +247,8 @@ def login_required(view: Callable[..., Any]) -> Callable[..., Any]:
     """
     Decorator to protect views that require a logged-in user.
 
-    Redirects unauthenticated users to the login page.
+    Redirects unauthenticated users to the login page. Works for both plain
+    and `async def` views.
 
     Args:
         view: The view function to decorate.
@@ -164,14 +256,24 @@ def login_required(view: Callable[..., Any]) -> Callable[..., Any]:
     Returns:
         The decorated view function.
     """
-    @functools.wraps(view)
-    def wrapped_view(**kwargs: Any) -> Any:
+    def login_redirect() -> Optional[Response]:
         if g.user is None:
             # User is not logged in, redirect to login page
-            current_app.logger.debug(f"Unauthorized access attempt to '{request.path}'. Redirecting to login.")
+            current_app.logger.debug("Unauthorized access attempt to '%s'. Redirecting to login.", request.path)
             flash("You need to be logged in to access this page.", "warning")
             return redirect(url_for('auth.login', next=request.url)) # Optional: add next param
+        return None
+
+    if inspect.iscoroutinefunction(view):
+        # Keep `async def` views awaitable so Flask still runs them as coroutines
+        @functools.wraps(view)
+        async def wrapped_async_view(**kwargs: Any) -> Any:
+            return login_redirect() or await view(**kwargs)
+        return wrapped_async_view
+
+    @functools.wraps(view)
+    def wrapped_view(**kwargs: Any) -> Any:
         # User is logged in, proceed with the original view function
-        return view(**kwargs)
+        return login_redirect() or view(**kwargs)
 
     return wrapped_view
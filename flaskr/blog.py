@@ -1,57 +1,215 @@
 # Filename: ./flaskr/blog.py
 # ----- Start of file content -----
 import math
-from typing import Any, Optional
+from typing import Any, Dict, Iterator, List, Optional, Union
 
-from flask import (Blueprint, current_app, flash, g, redirect,
-                   render_template, request, url_for)
+from flask import (Blueprint, Response, current_app, flash, g, redirect,
+                   render_template, request, stream_template, url_for)
 from werkzeug.exceptions import abort
 
 from flaskr.auth import login_required
-from flaskr.db import get_db
+from flaskr.db import get_db, read_only
+from flaskr.http_cache import conditional
+from flaskr.pagination import (decode_cursor, encode_cursor, get_per_page,
+                               per_page_args)
+from flaskr.posts import (PostStream, get_post_by_id, get_post_count,
+                          get_posts_by_offset, get_posts_page, get_tag_id,
+                          invalidate_post_count, parse_tags, set_post_tags)
+from flaskr.render import render_markdown
+from flaskr.response_cache import cache_anonymous
 
 bp = Blueprint('blog', __name__)
 
-POSTS_PER_PAGE = 5 # Configuration for pagination
 
 @bp.route('/')
+@read_only
+@conditional
+@cache_anonymous
 def index() -> str:
     """
     Show all the posts, paginated, ordered by the most recent first.
+
+    Two pagination modes are supported:
+    - cursor: 'after'/'before' tokens seek on the (created, id) index, so every
+      page costs the same no matter how deep it is. Used when a token is given
+      or when PAGINATION_MODE is 'cursor'.
+    - page: the classic '?page=N' LIMIT/OFFSET mode, kept for compatibility.
     """
-    db = get_db()
+    after = request.args.get('after')
+    before = request.args.get('before')
+
+    if after or before or current_app.config.get('PAGINATION_MODE') == 'cursor':
+        return _index_by_cursor(after, before)
+    return _index_by_page()
+
+
+def _index_by_cursor(after: Optional[str], before: Optional[str], endpoint: str = 'blog.index',
+                     heading: Optional[str] = None, url_values: Optional[Dict[str, Any]] = None,
+                     post_count: Optional[int] = None, **filters: Any) -> Union[str, Response]:
+    """
+    Render a post listing using keyset pagination on (created, id).
+
+    Args:
+        after, before: The raw cursor tokens from the query string.
+        endpoint: Endpoint the prev/next links point at.
+        heading: Page title (defaults to 'Posts').
+        url_values: Extra url_for() values for the links (e.g. username).
+        post_count: Number of posts in the whole listing, shown under the heading.
+        **filters: author_id / tag_id, passed on to get_posts_page().
+    """
+    after_cursor = decode_cursor(after)
+    before_cursor = decode_cursor(before)
+    if (after or before) and after_cursor is None and before_cursor is None:
+        current_app.logger.warning("Ignoring malformed pagination cursor.")
+
+    url_values = {**(url_values or {}), **per_page_args()}
+    per_page = get_per_page()
+
+    def prev_link(first: Any) -> str:
+        return url_for(endpoint, before=encode_cursor(first['created'], first['id']), **url_values)
+
+    def next_link(last: Any) -> str:
+        return url_for(endpoint, after=encode_cursor(last['created'], last['id']), **url_values)
+
+    if _streaming() and before_cursor is None:
+        # Newest-first pages can be streamed straight off the cursor
+        stream = PostStream.listing(
+            after_cursor, per_page, batch_size=current_app.config.get('STREAM_FETCH_SIZE', 20),
+            prev_url=prev_link if after_cursor is not None else None, next_url=next_link, **filters
+        )
+        return _stream_listing(posts=stream, heading=heading, post_count=post_count,
+                               page=None, total_pages=None)
+
+    posts, has_prev, has_next = get_posts_page(after_cursor, before_cursor, per_page, **filters)
+
+    prev_url = prev_link(posts[0]) if posts and has_prev else None
+    next_url = next_link(posts[-1]) if posts and has_next else None
+
+    current_app.logger.debug("Fetched %s posts by cursor (after=%r, before=%r)", len(posts), after, before)
+
+    return render_template(
+        'blog/index.html',
+        posts=posts,
+        heading=heading,
+        post_count=post_count,
+        page=None,
+        total_pages=None,
+        prev_url=prev_url,
+        next_url=next_url
+    )
+
+
+def _streaming() -> bool:
+    return bool(current_app.config.get('STREAM_LISTINGS'))
+
+
+def _stream_listing(**context: Any) -> Response:
+    """
+    Stream blog/index.html for a PostStream.
+
+    Jinja yields many tiny fragments; they are sent in chunks of about
+    STREAM_FLUSH_SIZE characters, so the page header goes out as soon as the
+    first posts are rendered. The response is never put in the response cache.
+    """
+    flush_size = current_app.config.get('STREAM_FLUSH_SIZE', 4096)
+
+    def chunks(fragments: Iterator[str]) -> Iterator[str]:
+        buffer: List[str] = []
+        size = 0
+        for fragment in fragments:
+            buffer.append(fragment)
+            size += len(fragment)
+            if size >= flush_size:
+                yield ''.join(buffer)
+                buffer, size = [], 0
+        if buffer:
+            yield ''.join(buffer)
+
+    # stream_template keeps the request (and its DB connection) alive while streaming
+    return Response(chunks(stream_template('blog/index.html', **context)), mimetype='text/html')
+
+
+@bp.route('/user/<username>')
+@read_only
+@conditional
+@cache_anonymous
+def user_posts(username: str) -> str:
+    """
+    List one author's posts, newest first, with cursor pagination.
+    Served by the idx_post_author_created index; the post count comes from
+    the stats table.
+    """
+    user = get_db().execute(
+        'SELECT id FROM user WHERE username = ?', (username,)
+    ).fetchone()
+    if user is None:
+        abort(404, f"User {username} doesn't exist.")
+    return _index_by_cursor(
+        request.args.get('after'), request.args.get('before'), 'blog.user_posts',
+        heading=f'Posts by {username}', url_values={'username': username},
+        post_count=get_post_count(user['id']), author_id=user['id']
+    )
+
+
+@bp.route('/tag/<name>')
+@read_only
+@conditional
+@cache_anonymous
+def tag_posts(name: str) -> str:
+    """
+    List the posts with a tag, newest first, with cursor pagination.
+    Served by post_tag's (tag_id, created, post_id) primary key.
+    """
+    tag_id = get_tag_id(name)
+    if tag_id is None:
+        abort(404, f"Tag {name} doesn't exist.")
+    return _index_by_cursor(
+        request.args.get('after'), request.args.get('before'), 'blog.tag_posts',
+        heading=f'Posts tagged "{name}"', url_values={'name': name}, tag_id=tag_id
+    )
+
+
+def _index_by_page() -> Union[str, Response]:
+    """Render the index using page numbers (LIMIT/OFFSET)."""
     page = request.args.get('page', 1, type=int) # Get page number from query param
+    per_page = get_per_page()
+    url_values = per_page_args()
 
-    # Calculate total number of posts and pages
-    count_result = db.execute('SELECT COUNT(id) FROM post').fetchone()
-    total_posts = count_result[0] if count_result else 0
-    total_pages = math.ceil(total_posts / POSTS_PER_PAGE)
+    # The total is optional; without it we look one row ahead to find a next page
+    total_pages: Optional[int] = None
+    if current_app.config.get('PAGINATION_SHOW_TOTAL', True):
+        total_pages = math.ceil(get_post_count() / per_page)
 
     # Ensure requested page is valid
     if page < 1:
         page = 1
-    elif page > total_pages and total_pages > 0:
+    elif total_pages and page > total_pages:
         page = total_pages # Go to last page if requested page is too high
 
     # Calculate offset for the query
-    offset = (page - 1) * POSTS_PER_PAGE
+    offset = (page - 1) * per_page
+
+    prev_url = url_for('blog.index', page=page - 1, **url_values) if page > 1 else None
+    if _streaming():
+        stream = PostStream.by_offset(
+            offset, per_page, batch_size=current_app.config.get('STREAM_FETCH_SIZE', 20),
+            prev_url=(lambda first: prev_url) if prev_url else None,
+            next_url=lambda last: url_for('blog.index', page=page + 1, **url_values)
+        )
+        return _stream_listing(posts=stream, page=page, total_pages=total_pages)
 
     # Fetch posts for the current page
-    posts = db.execute(
-        'SELECT p.id, title, body, created, author_id, username'
-        ' FROM post p JOIN user u ON p.author_id = u.id'
-        ' ORDER BY created DESC'
-        ' LIMIT ? OFFSET ?',
-        (POSTS_PER_PAGE, offset)
-    ).fetchall()
+    posts, has_next = get_posts_by_offset(offset, per_page)
 
-    current_app.logger.debug(f"Fetched posts for page {page}, offset {offset}")
+    current_app.logger.debug("Fetched posts for page %s, offset %s", page, offset)
 
     return render_template(
         'blog/index.html',
         posts=posts,
         page=page,
-        total_pages=total_pages
+        total_pages=total_pages,
+        prev_url=prev_url,
+        next_url=url_for('blog.index', page=page + 1, **url_values) if has_next else None
     )
 
 
@@ -74,22 +232,24 @@ def create() -> Any:
 
         if error is not None:
             flash(error)
-            current_app.logger.warning(f"Post creation failed for user {g.user['id']}: {error}")
+            current_app.logger.warning("Post creation failed for user %s: %s", g.user['id'], error)
         else:
             db = get_db()
             try:
                 cursor = db.execute(
-                    'INSERT INTO post (title, body, author_id)'
-                    ' VALUES (?, ?, ?)',
-                    (title, body, g.user['id'])
+                    'INSERT INTO post (title, body, body_html, author_id)'
+                    ' VALUES (?, ?, ?, ?)',
+                    (title, body, render_markdown(body), g.user['id'])
                 )
+                set_post_tags(cursor.lastrowid, parse_tags(request.form.get('tags', '')))
                 db.commit()
-                current_app.logger.info(f"Post '{title}' (ID: {cursor.lastrowid}) created by user {g.user['id']}.")
+                invalidate_post_count()
+                current_app.logger.info("Post '%s' (ID: %s) created by user %s.", title, cursor.lastrowid, g.user['id'])
                 flash('Post created successfully!', 'success') # Added success flash
                 return redirect(url_for('blog.index'))
             except db.Error as e:
                 db.rollback()
-                current_app.logger.error(f"Database error during post creation: {e}")
+                current_app.logger.error("Database error during post creation: %s", e)
                 flash("An error occurred while creating the post. Please try again.", "error")
 
 
@@ -100,6 +260,9 @@ def get_post(id: int, check_author: bool = True) -> Any:
     """
     Get a specific post by id and its author.
 
+    Reads come from the read-only connection inside @read_only views (post
+    display, e.g. the API) and from the primary in update/delete.
+
     Args:
         id: The id of the post to get.
         check_author: If True, verifies that the current user is the author.
@@ -111,24 +274,19 @@ def get_post(id: int, check_author: bool = True) -> Any:
         NotFound (404): If the post doesn't exist.
         Forbidden (403): If check_author is True and the current user isn't the author.
     """
-    post = get_db().execute(
-        'SELECT p.id, title, body, created, author_id, username'
-        ' FROM post p JOIN user u ON p.author_id = u.id'
-        ' WHERE p.id = ?',
-        (id,)
-    ).fetchone()
+    post = get_post_by_id(id)
 
     if post is None:
-        current_app.logger.warning(f"Post ID {id} not found.")
+        current_app.logger.warning("Post ID %s not found.", id)
         abort(404, f"Post id {id} doesn't exist.")
 
     # g.user might be None if accessed by an unauthenticated user (e.g., viewing a post)
     if check_author:
         if g.user is None:
-             current_app.logger.warning(f"Unauthorized attempt to access post {id} requiring author check.")
+             current_app.logger.warning("Unauthorized attempt to access post %s requiring author check.", id)
              abort(403) # Must be logged in to pass author check
         elif post['author_id'] != g.user['id']:
-            current_app.logger.warning(f"User {g.user['id']} forbidden from modifying post {id} owned by user {post['author_id']}.")
+            current_app.logger.warning("User %s forbidden from modifying post %s owned by user %s.", g.user['id'], id, post['author_id'])
             abort(403) # Logged in user is not the author
 
     return post
@@ -155,22 +313,24 @@ def update(id: int) -> Any:
 
         if error is not None:
             flash(error)
-            current_app.logger.warning(f"Post update failed for ID {id}: {error}")
+            current_app.logger.warning("Post update failed for ID %s: %s", id, error)
         else:
             db = get_db()
             try:
+                # Re-render on every edit so the cached HTML never goes stale
                 db.execute(
-                    'UPDATE post SET title = ?, body = ?'
+                    'UPDATE post SET title = ?, body = ?, body_html = ?, updated = CURRENT_TIMESTAMP'
                     ' WHERE id = ?',
-                    (title, body, id)
+                    (title, body, render_markdown(body), id)
                 )
+                set_post_tags(id, parse_tags(request.form.get('tags', '')))
                 db.commit()
-                current_app.logger.info(f"Post ID {id} updated by user {g.user['id']}.")
+                current_app.logger.info("Post ID %s updated by user %s.", id, g.user['id'])
                 flash('Post updated successfully!', 'success') # Added success flash
                 return redirect(url_for('blog.index'))
             except db.Error as e:
                 db.rollback()
-                current_app.logger.error(f"Database error during post update (ID: {id}): {e}")
+                current_app.logger.error("Database error during post update (ID: %s): %s", id, e)
                 flash("An error occurred while updating the post. Please try again.", "error")
 
     # Pass the original post data to the template for GET requests
@@ -189,11 +349,12 @@ def delete(id: int) -> Any:
     try:
         db.execute('DELETE FROM post WHERE id = ?', (id,))
         db.commit()
-        current_app.logger.info(f"Post ID {id} deleted by user {g.user['id']}.")
+        invalidate_post_count()
+        current_app.logger.info("Post ID %s deleted by user %s.", id, g.user['id'])
         flash('Post deleted successfully!', 'info') # Added success flash
     except db.Error as e:
         db.rollback()
-        current_app.logger.error(f"Database error during post deletion (ID: {id}): {e}")
+        current_app.logger.error("Database error during post deletion (ID: %s): %s", id, e)
         flash("An error occurred while deleting the post. Please try again.", "error")
 
     return redirect(url_for('blog.index'))
@@ -0,0 +1,210 @@
+# Filename: ./flaskr/compress.py
+# ----- Start of file content -----
+import gzip
+import hashlib
+import mimetypes
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import click
+from flask import current_app, request, send_from_directory
+from flask.cli import with_appcontext
+from werkzeug.security import safe_join
+from werkzeug.wrappers import Response
+
+try:
+    import brotli # Optional: pip install brotli
+except ImportError: # pragma: no cover - depends on the environment
+    brotli = None
+
+# File types worth compressing ahead of time by 'flask compress-static'
+STATIC_EXTENSIONS = ('.css', '.js', '.svg', '.html', '.txt', '.json', '.xml', '.map')
+
+
+def _accepted_encodings() -> List[str]:
+    """Encodings this server can produce that the client accepts, best first."""
+    accepted = request.accept_encodings
+    encodings = []
+    if brotli is not None and accepted['br']:
+        encodings.append('br')
+    if accepted['gzip']:
+        encodings.append('gzip')
+    return encodings
+
+
+def _compress(data: bytes, encoding: str, level: int) -> bytes:
+    if encoding == 'br':
+        # Brotli quality runs 0-11; map the gzip-style 1-9 level onto it
+        return brotli.compress(data, quality=min(11, level + 2))
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def compress_response(response: Response) -> Response:
+    """
+    after_request hook: gzip/brotli-encode eligible responses.
+
+    Skipped for streamed and file responses (direct_passthrough; static files
+    are precompressed instead), non-200 responses, bodies below
+    COMPRESS_MIN_SIZE, content types outside COMPRESS_MIMETYPES, and clients
+    that don't send a matching Accept-Encoding.
+    """
+    config = current_app.config
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in config.get('COMPRESS_MIMETYPES', ())):
+        return response
+
+    # The body depends on Accept-Encoding from here on, even if we don't compress
+    response.vary.add('Accept-Encoding')
+    encodings = _accepted_encodings()
+    if not encodings:
+        return response
+    data = response.get_data()
+    if len(data) < config.get('COMPRESS_MIN_SIZE', 500):
+        return response
+
+    encoding = encodings[0]
+    response.set_data(_compress(data, encoding, config.get('COMPRESS_LEVEL', 6)))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def _static_hash(filename: str) -> Optional[str]:
+    """
+    Short content hash of a static file, memoized per (path, mtime).
+
+    Returns:
+        12 hex characters, or None if the file doesn't exist.
+    """
+    path = safe_join(current_app.static_folder, filename)
+    if path is None:
+        return None
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    hashes: Dict[str, Tuple[int, str]] = current_app.extensions.setdefault('flaskr.static_hashes', {})
+    cached = hashes.get(filename)
+    if cached is None or cached[0] != mtime:
+        with open(path, 'rb') as f:
+            cached = hashes[filename] = (mtime, hashlib.sha1(f.read()).hexdigest()[:12])
+    return cached[1]
+
+
+def add_static_version(endpoint: str, values: Dict[str, Any]) -> None:
+    """
+    url_defaults callback: url_for('static', filename=...) gains ?v=<hash>.
+
+    The URL changes whenever the file does, so static responses can be cached
+    for a year without ever serving a stale stylesheet.
+    """
+    if endpoint == 'static' and 'v' not in values and 'filename' in values:
+        version = _static_hash(values['filename'])
+        if version is not None:
+            values['v'] = version
+
+
+def static_view(filename: str) -> Response:
+    """
+    Replacement for Flask's static view.
+
+    Serves a precompressed .br/.gz sibling written by 'flask compress-static'
+    when the client accepts it and the sibling is at least as new as the
+    file, and marks versioned (?v=...) URLs as immutable for
+    STATIC_CACHE_MAX_AGE seconds.
+    """
+    folder = current_app.static_folder
+    response: Optional[Response] = None
+    source = safe_join(folder, filename)
+    try:
+        source_mtime = os.stat(source).st_mtime if source is not None else None
+    except OSError:
+        source_mtime = None
+    for encoding in _accepted_encodings():
+        if source_mtime is None:
+            break # send_from_directory below answers 404
+        suffix = '.br' if encoding == 'br' else '.gz'
+        path = safe_join(folder, filename + suffix)
+        # A sibling older than the file is stale (compress-static wasn't re-run)
+        if path is not None and os.path.isfile(path) and os.path.getmtime(path) >= source_mtime:
+            response = send_from_directory(folder, filename + suffix)
+            response.headers['Content-Encoding'] = encoding
+            # Report the type of the original file, not of the archive
+            response.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            break
+    if response is None:
+        response = send_from_directory(folder, filename)
+    response.vary.add('Accept-Encoding')
+
+    if 'v' in request.args:
+        # send_from_directory sets no-cache, which would override max-age
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config.get('STATIC_CACHE_MAX_AGE', 31536000)
+        response.cache_control.immutable = True
+    return response
+
+
+def compress_static(folder: str, min_size: int = 0) -> List[str]:
+    """
+    Write .gz (and .br when brotli is installed) siblings for static files.
+
+    Uses maximum compression levels, since this runs once per build rather
+    than per request. Up-to-date siblings are left alone.
+
+    Args:
+        folder: The static folder to walk.
+        min_size: Skip files smaller than this many bytes.
+
+    Returns:
+        Paths of the files written.
+    """
+    written = []
+    suffixes = ['.gz'] + (['.br'] if brotli is not None else [])
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if not name.endswith(STATIC_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            if os.path.getsize(path) < min_size:
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+            for suffix in suffixes:
+                target = path + suffix
+                if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+                    continue
+                with open(target, 'wb') as f:
+                    f.write(_compress(data, 'br' if suffix == '.br' else 'gzip', 9))
+                written.append(target)
+    return written
+
+
+@click.command('compress-static', help='Precompress static files (.gz, and .br if brotli is installed).')
+@with_appcontext
+def compress_static_command() -> None:
+    """
+    Flask CLI build step; run it after changing files under flaskr/static.
+    Usage: flask compress-static
+    """
+    written = compress_static(current_app.static_folder, current_app.config.get('COMPRESS_MIN_SIZE', 500))
+    for path in written:
+        click.echo(f'  {os.path.relpath(path, current_app.static_folder)}')
+    click.echo(f'Wrote {len(written)} compressed files.')
+
+
+def init_app(app: Any) -> None:
+    """
+    Register response compression (when COMPRESS_ENABLED), versioned static
+    URLs with long-lived caching, and the compress-static command.
+
+    Args:
+        app: The Flask application instance.
+    """
+    if app.config.get('COMPRESS_ENABLED'):
+        app.after_request(compress_response)
+    app.url_defaults(add_static_version)
+    app.view_functions['static'] = static_view
+    app.cli.add_command(compress_static_command)
+
+# ----- End of file content -----
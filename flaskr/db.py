@@ -1,63 +1,447 @@
 # Filename: ./flaskr/db.py
 # ----- Start of file content -----
+import csv
+import functools
+import inspect
+import json
+import os
+import re
 import sqlite3
-from datetime import datetime
-from typing import Any, Optional
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, Mapping,
+                    Optional, Sequence, Tuple)
 
 import click
 from flask import current_app, g
 from flask.cli import with_appcontext
 
+# Signature of per-connection init hooks: called once with each new connection
+ConnectionHook = Callable[[sqlite3.Connection], None]
 
-def get_db() -> sqlite3.Connection:
+# PRAGMA names and values can't be bound as parameters, so validate them instead
+_PRAGMA_NAME_RE = re.compile(r'[a-z_]+')
+_PRAGMA_VALUE_RE = re.compile(r'-?\d+|[A-Za-z_]+')
+
+# Modes accepted by PRAGMA wal_checkpoint(...)
+WAL_CHECKPOINT_MODES = ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE')
+
+
+class ConnectionPool:
+    """
+    A small thread-safe pool of SQLite connections for one database.
+
+    Connections are checked out by get_db and returned by close_db. Up to `size`
+    idle connections are kept open; extra connections opened during bursts are
+    closed on return instead of blocking the request.
+    """
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection], size: int) -> None:
+        self._connect = connect
+        self._size = size
+        self._idle: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def acquire(self) -> sqlite3.Connection:
+        """
+        Check out a healthy connection, opening a new one if none is idle.
+
+        Returns:
+            An SQLite connection that is not in a transaction.
+        """
+        while True:
+            with self._lock:
+                self._discard_if_forked()
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                return self._connect()
+            if self._is_healthy(conn):
+                return conn
+            _close_quietly(conn)
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """
+        Return a connection to the pool, rolling back any open transaction.
+
+        Args:
+            conn: A connection previously returned by acquire().
+        """
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            _close_quietly(conn)
+            return
+
+        with self._lock:
+            self._discard_if_forked()
+            if len(self._idle) < self._size:
+                self._idle.append(conn)
+                return
+        _close_quietly(conn)
+
+    def close(self) -> None:
+        """Close every idle connection held by the pool."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            _close_quietly(conn)
+
+    def _discard_if_forked(self) -> None:
+        # Connections must not be shared across fork() (e.g. gunicorn preload)
+        if self._pid != os.getpid():
+            self._idle = []
+            self._pid = os.getpid()
+
+    @staticmethod
+    def _is_healthy(conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+
+def _close_quietly(conn: sqlite3.Connection) -> None:
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+
+def register_connection_hook(app: Any, hook: ConnectionHook) -> None:
+    """
+    Register a function to run once on every newly opened connection.
+
+    Use it for pragmas, sqlite3 create_function() registrations and the like.
+    Pooled connections run their hooks only when first opened, not per request.
+
+    Args:
+        app: The Flask application instance.
+        hook: Callable receiving the new sqlite3.Connection.
+    """
+    app.extensions.setdefault('flaskr.db_hooks', []).append(hook)
+
+
+def apply_pragmas(conn: sqlite3.Connection, pragmas: Mapping[str, Any]) -> None:
+    """
+    Execute 'PRAGMA name = value' for every entry in `pragmas`.
+
+    Args:
+        conn: The connection to configure.
+        pragmas: Mapping of pragma name to value, e.g. {'journal_mode': 'wal'}.
+
+    Raises:
+        ValueError: If a name or value is not a plain identifier or integer.
+    """
+    for name, value in pragmas.items():
+        if not _PRAGMA_NAME_RE.fullmatch(name) or not _PRAGMA_VALUE_RE.fullmatch(str(value)):
+            raise ValueError(f"Invalid SQLite pragma: {name} = {value!r}")
+        # fetchall() drains pragmas that return a row (journal_mode, busy_timeout, ...)
+        conn.execute(f'PRAGMA {name} = {value}').fetchall()
+
+
+def apply_persistent_pragmas() -> None:
+    """
+    Apply DATABASE_PERSISTENT_PRAGMAS, which are stored in the database file.
+
+    VACUUM is run first so settings such as page_size take effect on an
+    existing file.
+    """
+    db = get_db()
+    pragmas = dict(current_app.config.get('DATABASE_PERSISTENT_PRAGMAS') or {})
+    page_size = pragmas.pop('page_size', None)
+    if page_size is not None:
+        # page_size can't change in WAL mode, so leave it while VACUUM rebuilds the file
+        apply_pragmas(db, {'journal_mode': 'delete', 'page_size': page_size})
+    db.execute('VACUUM')
+    apply_pragmas(db, pragmas)
+    current_app.logger.info("Persistent database pragmas applied.")
+
+
+def wal_checkpoint(mode: str = 'PASSIVE') -> Any:
+    """
+    Checkpoint the write-ahead log into the main database file.
+
+    Args:
+        mode: One of WAL_CHECKPOINT_MODES. TRUNCATE also shrinks the -wal file.
+
+    Returns:
+        The (busy, log frames, checkpointed frames) row reported by SQLite.
+    """
+    mode = mode.upper()
+    if mode not in WAL_CHECKPOINT_MODES:
+        raise ValueError(f"Invalid checkpoint mode: {mode}")
+    return get_db().execute(f'PRAGMA wal_checkpoint({mode})').fetchone()
+
+
+def refresh_replica() -> int:
+    """
+    Copy DATABASE into DATABASE_REPLICA with the SQLite backup API.
+
+    The copy is written in place, in one step, so readers that already have
+    the replica open see either the old or the new snapshot, never a mix
+    (they wait up to busy_timeout while it is written).
+
+    Returns:
+        The number of pages copied.
+
+    Raises:
+        RuntimeError: If DATABASE_REPLICA is not configured.
+    """
+    replica = current_app.config.get('DATABASE_REPLICA')
+    if not replica:
+        raise RuntimeError("DATABASE_REPLICA is not configured.")
+    source = get_db(readonly=False)
+    target = sqlite3.connect(replica)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+    pages = source.execute('PRAGMA page_count').fetchone()[0]
+    current_app.logger.info("Refreshed replica %s (%s pages).", replica, pages)
+    return pages
+
+
+def _connect(app: Any, readonly: bool = False) -> sqlite3.Connection:
+    """
+    Open and configure a new connection for the app's DATABASE.
+
+    Args:
+        app: The Flask application instance.
+        readonly: Open DATABASE_REPLICA (or DATABASE when no replica is set)
+            with a mode=ro URI, so the connection can never write.
+
+    Returns:
+        The configured connection.
+    """
+    db_path = app.config['DATABASE']
+    target, uri = db_path, False
+    if readonly:
+        db_path = app.config.get('DATABASE_REPLICA') or db_path
+        target, uri = Path(db_path).absolute().as_uri() + '?mode=ro', True
+    conn = sqlite3.connect(
+        target,
+        uri=uri,
+        detect_types=sqlite3.PARSE_DECLTYPES,  # Enable type detection
+        # A connection belongs to one app context, but that context may move
+        # between threads: pooled connections go to whichever thread serves the
+        # request, and `async def` views run on their own event loop thread
+        check_same_thread=False,
+        # Replaced by flaskr.instrumentation to time statements when enabled
+        factory=app.extensions.get('flaskr.connection_factory', sqlite3.Connection)
+    )
+    # Return rows as dictionary-like objects
+    conn.row_factory = sqlite3.Row
+    if readonly:
+        # Lets connection hooks tell read-only connections apart
+        conn.execute('PRAGMA query_only = 1')
+    for hook in app.extensions.get('flaskr.db_hooks', []):
+        hook(conn)
+    app.logger.debug("Database connection opened for %s%s", db_path, ' (read-only)' if readonly else '')
+    return conn
+
+
+def _apply_config_pragmas(app: Any, conn: sqlite3.Connection) -> None:
+    """Connection hook applying DATABASE_PRAGMAS."""
+    pragmas = dict(app.config.get('DATABASE_PRAGMAS') or {})
+    if conn.execute('PRAGMA query_only').fetchone()[0]:
+        # The journal mode is stored in the database file, so only the primary
+        # may set it; a mode=ro connection can't
+        pragmas.pop('journal_mode', None)
+    apply_pragmas(conn, pragmas)
+
+
+def read_routing_enabled() -> bool:
+    """Tell whether get_db(readonly=True) uses a separate read-only connection."""
+    config = current_app.config
+    return bool(config.get('DATABASE_READONLY') or config.get('DATABASE_REPLICA'))
+
+
+def read_only(view: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Decorator routing a view's get_db() calls to the read-only connection.
+
+    Apply it to views that never write (listings, post display, feeds). Code
+    inside such a view that must see the primary can still call
+    get_db(readonly=False). Works on `async def` views too, where it routes
+    get_async_db() the same way.
+
+    Args:
+        view: The view function to decorate.
+
+    Returns:
+        The decorated view function.
+    """
+    if inspect.iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def wrapped_async_view(*args: Any, **kwargs: Any) -> Any:
+            g.db_readonly = True
+            return await view(*args, **kwargs)
+
+        return wrapped_async_view
+
+    @functools.wraps(view)
+    def wrapped_view(*args: Any, **kwargs: Any) -> Any:
+        g.db_readonly = True
+        return view(*args, **kwargs)
+
+    return wrapped_view
+
+
+def use_readonly(readonly: Optional[bool] = None) -> bool:
+    """
+    Tell whether a connection request should get the read-only connection.
+
+    Args:
+        readonly: True for read-only, False for the primary. None (the
+            default) picks read-only inside @read_only views.
+
+    Returns:
+        True only when read routing is on and the replica (if any) exists;
+        otherwise reads share the primary.
+    """
+    if readonly is None:
+        readonly = g.get('db_readonly', False)
+    if not readonly or not read_routing_enabled():
+        return False
+    replica = current_app.config.get('DATABASE_REPLICA')
+    # A missing replica is reported once by init_app; until it exists, read the primary
+    return not replica or os.path.exists(replica)
+
+
+def acquire_connection(app: Any, readonly: bool = False) -> sqlite3.Connection:
+    """
+    Check out a connection from the app's pool, or open one when pooling is off.
+
+    Needs no app context, so it can run on another thread (see flaskr.aio).
+
+    Args:
+        app: The Flask application instance.
+        readonly: The read-only connection rather than the primary.
+
+    Returns:
+        A connection to hand back with release_connection().
+    """
+    pool: Optional[ConnectionPool] = app.extensions.get('flaskr.db_pool_ro' if readonly else 'flaskr.db_pool')
+    return pool.acquire() if pool is not None else _connect(app, readonly=readonly)
+
+
+def release_connection(app: Any, conn: sqlite3.Connection, readonly: bool = False) -> None:
+    """
+    Return a connection from acquire_connection() to its pool, or close it.
+
+    Args:
+        app: The Flask application instance.
+        conn: The connection.
+        readonly: Whether it was acquired as read-only.
+    """
+    pool: Optional[ConnectionPool] = app.extensions.get('flaskr.db_pool_ro' if readonly else 'flaskr.db_pool')
+    if pool is not None:
+        pool.release(conn)
+        return
+    try:
+        conn.close()
+        app.logger.debug("Database connection closed.")
+    except sqlite3.Error as close_error:
+        app.logger.error("Error closing database: %s", close_error)
+
+
+def _get_readonly_db() -> sqlite3.Connection:
+    """Return this context's read-only connection (see get_db)."""
+    if 'db' in g:
+        # The primary is already open here, possibly with uncommitted writes:
+        # keep reading from it so the request sees its own changes
+        return g.db
+    if 'db_ro' not in g:
+        try:
+            g.db_ro = acquire_connection(current_app._get_current_object(), readonly=True)
+        except sqlite3.Error as e:
+            current_app.logger.error("Read-only database connection failed: %s", e)
+            raise
+    return g.db_ro
+
+
+def get_db(readonly: Optional[bool] = None) -> sqlite3.Connection:
     """
     Get a database connection for the current application context.
 
-    If a connection doesn't exist in the 'g' object, it creates a new one,
-    configures it with a Row factory, and stores it in 'g'.
+    If a connection doesn't exist in the 'g' object, it checks one out of the
+    connection pool (when DATABASE_POOL_ENABLED) or opens a new one, and
+    stores it in 'g'.
+
+    Reads that may lag behind the primary can ask for a read-only connection.
+    It is only separate from the primary when DATABASE_READONLY or
+    DATABASE_REPLICA is set; otherwise both are the same connection.
+
+    Args:
+        readonly: True for the read-only connection, False for the primary.
+            None (the default) picks read-only inside @read_only views.
 
     Returns:
         The SQLite database connection.
     """
+    if use_readonly(readonly):
+        return _get_readonly_db()
+
     if 'db' not in g:
         try:
-            db_path = current_app.config['DATABASE']
-            g.db = sqlite3.connect(
-                db_path,
-                detect_types=sqlite3.PARSE_DECLTYPES  # Enable type detection
-            )
-            # Return rows as dictionary-like objects
-            g.db.row_factory = sqlite3.Row
-            current_app.logger.debug(f"Database connection opened for {db_path}")
+            g.db = acquire_connection(current_app._get_current_object())
         except KeyError:
              current_app.logger.critical("DATABASE configuration key not found!")
              raise RuntimeError("DATABASE configuration is missing.")
         except sqlite3.Error as e:
-             current_app.logger.error(f"Database connection failed: {e}")
+             current_app.logger.error("Database connection failed: %s", e)
              raise # Re-raise the exception after logging
     return g.db
 
 
 def close_db(e: Optional[Exception] = None) -> None:
     """
-    Close the database connection if it exists in the 'g' object.
+    Close the database connections (primary and read-only) held in 'g'.
 
+    Pooled connections are rolled back and returned to the pool instead.
     This function is registered to be called automatically when the
     application context is torn down.
 
     Args:
         e: An optional exception that might have occurred during request handling.
     """
-    db = g.pop('db', None)
-
-    if db is not None:
-        try:
-            db.close()
-            current_app.logger.debug("Database connection closed.")
-        except sqlite3.Error as e:
-            current_app.logger.error(f"Error closing database: {e}")
+    for key, readonly in (('db', False), ('db_ro', True)):
+        db = g.pop(key, None)
+        if db is not None:
+            release_connection(current_app._get_current_object(), db, readonly)
     if e:
-        current_app.logger.error(f"Application context teardown due to exception: {e}")
+        current_app.logger.error("Application context teardown due to exception: %s", e)
+
+
+def get_post_version_info() -> Tuple[int, Optional[datetime]]:
+    """
+    Return the post table's version and when it last changed.
+
+    Both are maintained by triggers on every post insert/update/delete, so this
+    is a single primary-key lookup however large the table is.
+
+    Returns:
+        (version, changed) where changed is a naive UTC datetime.
+    """
+    row = get_db().execute(
+        "SELECT value, changed FROM version_counter WHERE name = 'post'"
+    ).fetchone()
+    return (row[0], row[1]) if row else (0, None)
+
+
+def get_post_version() -> int:
+    """
+    Return the post table's version, bumped by triggers on every post write.
+
+    Returns:
+        The current version number (0 for a fresh database).
+    """
+    return get_post_version_info()[0]
 
 
 def init_db() -> None:
@@ -79,27 +463,486 @@ def init_db() -> None:
             db.executescript(sql_script)
         current_app.logger.info("Database schema initialized successfully.")
     except FileNotFoundError:
-        current_app.logger.error(f"Schema file not found at expected location: {schema_path}")
+        current_app.logger.error("Schema file not found at expected location: %s", schema_path)
     except sqlite3.Error as e:
-        current_app.logger.error(f"Error executing schema script: {e}")
+        current_app.logger.error("Error executing schema script: %s", e)
         # Optionally, you might want to rollback or handle the partial execution
         db.rollback() # Rollback in case of error during executescript
 
 
+def _schema_statements() -> List[str]:
+    """Split schema.sql into complete SQL statements (trigger bodies stay whole)."""
+    with current_app.open_resource('schema.sql') as f:
+        lines = f.read().decode('utf8').splitlines(keepends=True)
+
+    statements, buffer = [], ''
+    for line in lines:
+        if line.lstrip().startswith('--'):
+            continue # Whole-line comments
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            statements.append(buffer.strip())
+            buffer = ''
+    return statements
+
+
+def rebuild_search_index() -> int:
+    """
+    Create the post_fts table and triggers if missing, then re-index every post.
+
+    The DDL is taken from schema.sql so both stay in one place.
+
+    Returns:
+        The number of posts indexed.
+    """
+    db = get_db()
+    for statement in _schema_statements():
+        if 'post_fts' in statement and statement.upper().startswith('CREATE'):
+            db.executescript(statement)
+    db.execute("INSERT INTO post_fts (post_fts) VALUES ('rebuild')")
+    db.commit()
+    return db.execute('SELECT COUNT(id) FROM post').fetchone()[0]
+
+
+def rebuild_stats() -> int:
+    """
+    Recount the trigger-maintained `stats` table from the post table.
+
+    Needed once after the table is added to an existing database (upgrade_db
+    does it), or to repair counts after editing the database by hand.
+    Runs in the caller's transaction (no commit).
+
+    Returns:
+        The total number of posts.
+    """
+    db = get_db()
+    db.execute("DELETE FROM stats WHERE name = 'posts'")
+    db.execute("INSERT INTO stats (name, author_id, value) SELECT 'posts', 0, COUNT(*) FROM post")
+    db.execute(
+        "INSERT INTO stats (name, author_id, value)"
+        " SELECT 'posts', author_id, COUNT(*) FROM post GROUP BY author_id"
+    )
+    return db.execute("SELECT value FROM stats WHERE name = 'posts' AND author_id = 0").fetchone()[0]
+
+
+# Columns added to `post` after the first release: (name, declaration). Older
+# databases get them from upgrade_db(); CREATE TABLE in schema.sql has them all.
+POST_COLUMN_MIGRATIONS = (
+    ('updated', 'TIMESTAMP'),
+    ('body_html', 'TEXT'),
+)
+
+
+def _is_idempotent(statement: str) -> bool:
+    """Tell whether a schema.sql statement can be re-run on a populated database."""
+    upper = statement.upper()
+    return ('IF NOT EXISTS' in upper or upper.startswith('DROP INDEX IF EXISTS')
+            or upper.startswith('INSERT OR IGNORE'))
+
+
+def upgrade_db() -> int:
+    """
+    Bring an existing database up to the current schema without losing data.
+
+    Adds missing post columns (POST_COLUMN_MIGRATIONS), runs every idempotent
+    statement from schema.sql (CREATE ... IF NOT EXISTS, DROP INDEX IF EXISTS,
+    INSERT OR IGNORE), indexes existing posts for search if post_fts is new
+    and backfills the stats table.
+
+    Returns:
+        The number of statements run.
+    """
+    db = get_db()
+    count = 0
+    columns = {row[1] for row in db.execute('PRAGMA table_info(post)')}
+    for name, declaration in POST_COLUMN_MIGRATIONS:
+        if name not in columns:
+            db.execute(f'ALTER TABLE post ADD COLUMN {name} {declaration}')
+            count += 1
+
+    had_search_index = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'post_fts'"
+    ).fetchone() is not None
+    statements = [statement for statement in _schema_statements() if _is_idempotent(statement)]
+    for statement in statements:
+        db.executescript(statement)
+    count += len(statements)
+    if not had_search_index:
+        db.execute("INSERT INTO post_fts (post_fts) VALUES ('rebuild')")
+    rebuild_stats()
+    db.commit()
+    return count
+
+
 @click.command('init-db', help='Clear existing data and create new tables.')
+@click.option('--persistent-pragmas', is_flag=True,
+              help='Also apply DATABASE_PERSISTENT_PRAGMAS (WAL mode, page size).')
 @with_appcontext # Ensures Flask app context is available
-def init_db_command() -> None:
+def init_db_command(persistent_pragmas: bool) -> None:
     """
     Flask CLI command to initialize the database.
-    Usage: flask init-db
+    Usage: flask init-db [--persistent-pragmas]
     """
     try:
         init_db()
+        if persistent_pragmas:
+            apply_persistent_pragmas()
+            click.echo('Applied persistent pragmas.')
         click.echo('Initialized the database.')
     except Exception as e:
         # Catch potential errors during init_db and report them
         click.echo(f'Error initializing database: {e}', err=True)
-        current_app.logger.critical(f'Failed to initialize database via CLI: {e}')
+        current_app.logger.critical('Failed to initialize database via CLI: %s', e)
+
+
+@click.command('wal-checkpoint', help='Checkpoint the SQLite write-ahead log.')
+@click.option('--mode', type=click.Choice(WAL_CHECKPOINT_MODES, case_sensitive=False),
+              default='PASSIVE', show_default=True)
+@click.option('--interval', type=float, default=0,
+              help='Repeat every INTERVAL seconds until interrupted (0 = run once).')
+@with_appcontext
+def wal_checkpoint_command(mode: str, interval: float) -> None:
+    """
+    Flask CLI command to checkpoint the WAL, once or periodically.
+    Usage: flask wal-checkpoint [--mode TRUNCATE] [--interval 300]
+    """
+    while True:
+        busy, log_frames, checkpointed = wal_checkpoint(mode)
+        click.echo(f'Checkpoint {mode.upper()}: busy={busy} log={log_frames} checkpointed={checkpointed}')
+        if interval <= 0:
+            break
+        time.sleep(interval)
+
+
+@click.command('upgrade-db', help='Add new tables and indexes to an existing database.')
+@with_appcontext
+def upgrade_db_command() -> None:
+    """
+    Flask CLI command to apply additive schema changes in place.
+    Usage: flask upgrade-db
+    """
+    count = upgrade_db()
+    click.echo(f'Applied {count} schema statements.')
+
+
+@click.command('refresh-replica', help='Copy the database to DATABASE_REPLICA.')
+@click.option('--interval', type=float, default=0,
+              help='Repeat every INTERVAL seconds until interrupted (0 = run once).')
+@with_appcontext
+def refresh_replica_command(interval: float) -> None:
+    """
+    Flask CLI command to refresh the read replica, once or periodically.
+    Usage: flask refresh-replica [--interval 30]
+    """
+    while True:
+        try:
+            pages = refresh_replica()
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+        click.echo(f'Copied {pages} pages to {current_app.config["DATABASE_REPLICA"]}.')
+        if interval <= 0:
+            break
+        time.sleep(interval)
+
+
+@click.command('rebuild-search-index', help='Create and backfill the full-text search index.')
+@with_appcontext
+def rebuild_search_index_command() -> None:
+    """
+    Flask CLI command to rebuild post_fts from the post table.
+    Usage: flask rebuild-search-index
+    """
+    count = rebuild_search_index()
+    click.echo(f'Indexed {count} posts for search.')
+
+
+@click.command('rebuild-stats', help='Recount the post statistics table.')
+@with_appcontext
+def rebuild_stats_command() -> None:
+    """
+    Flask CLI command to recount stats from the post table.
+    Usage: flask rebuild-stats
+    """
+    total = rebuild_stats()
+    get_db().commit()
+    click.echo(f'Counted {total} posts.')
+
+
+# --- Bulk import/export ---
+POST_FIELDS = ('title', 'body', 'author', 'created', 'updated')
+USER_FIELDS = ('username', 'password')
+BULK_FORMATS = ('ndjson', 'csv')
+
+
+def _bulk_format(stream: Any, fmt: str) -> str:
+    """Resolve 'auto' from the file name (.csv means CSV, anything else NDJSON)."""
+    if fmt != 'auto':
+        return fmt
+    return 'csv' if str(getattr(stream, 'name', '')).lower().endswith('.csv') else 'ndjson'
+
+
+def _read_records(stream: Any, fmt: str) -> Iterator[Dict[str, Any]]:
+    """Yield one dict per NDJSON line or CSV row, without loading the whole file."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _write_records(stream: Any, fmt: str, fields: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+    """Write rows (tuples in `fields` order) as NDJSON or CSV; return the count."""
+    count = 0
+    writer = None
+    if fmt == 'csv':
+        writer = csv.writer(stream)
+        writer.writerow(fields)
+    for row in rows:
+        if writer is not None:
+            writer.writerow(row)
+        else:
+            stream.write(json.dumps(dict(zip(fields, row))) + '\n')
+        count += 1
+    return count
+
+
+def _iter_query(sql: str, batch_size: int = 1000) -> Iterator[Sequence[Any]]:
+    """Stream query results with fetchmany() so exports use constant memory."""
+    cursor = get_db().execute(sql)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from (tuple(row) for row in rows)
+
+
+def _batches(records: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch: List[Any] = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def export_posts(stream: Any, fmt: str = 'ndjson') -> int:
+    """
+    Write every post, oldest first, to `stream`.
+
+    Timestamps are exported exactly as stored; the author is exported by
+    username so the file can be loaded into a database with different user ids.
+
+    Returns:
+        The number of posts written.
+    """
+    return _write_records(stream, fmt, POST_FIELDS, _iter_query(
+        'SELECT title, body, username, CAST(created AS TEXT), CAST(updated AS TEXT)'
+        ' FROM post p JOIN user u ON p.author_id = u.id'
+        ' ORDER BY created, p.id'
+    ))
+
+
+def export_users(stream: Any, fmt: str = 'ndjson') -> int:
+    """Write every user (username and password hash) to `stream`."""
+    return _write_records(stream, fmt, USER_FIELDS, _iter_query(
+        'SELECT username, password FROM user ORDER BY id'
+    ))
+
+
+def _drop_post_indexes() -> List[str]:
+    """Drop the idx_post_* indexes, returning their CREATE statements."""
+    db = get_db()
+    indexes = db.execute(
+        "SELECT name, sql FROM sqlite_master"
+        " WHERE type = 'index' AND tbl_name = 'post' AND name GLOB 'idx_post_*'"
+    ).fetchall()
+    for index in indexes:
+        db.execute(f'DROP INDEX {index["name"]}')
+    db.commit()
+    return [index['sql'] for index in indexes]
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[str]:
+    """
+    Normalize an imported timestamp to SQLite's 'YYYY-MM-DD HH:MM:SS' (UTC).
+
+    Accepts any ISO 8601 form (e.g. '2019-01-01T10:00:00Z'); values with an
+    offset are converted to UTC. Anything else would be stored verbatim and
+    break the TIMESTAMP converter on every later read.
+
+    Returns:
+        The normalized value, or None for an empty value.
+
+    Raises:
+        ValueError: If the value is not an ISO 8601 timestamp.
+    """
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def import_posts(stream: Any, fmt: str = 'ndjson', batch_size: int = 10000,
+                 drop_indexes: bool = False, render: bool = True,
+                 progress: Optional[Callable[[int], None]] = None) -> Tuple[int, int]:
+    """
+    Bulk-load posts with executemany(), committing once per batch.
+
+    A batch that fails is rolled back as a whole; earlier batches stay committed.
+
+    Args:
+        stream: Text stream of NDJSON lines or CSV rows with POST_FIELDS.
+        fmt: 'ndjson' or 'csv'.
+        batch_size: Rows per INSERT batch/transaction.
+        drop_indexes: Drop idx_post_* during the load and rebuild them after,
+            which is much faster for large imports into a populated table.
+        render: Pre-render body_html (otherwise it is rendered on display).
+        progress: Called with the running total after each batch.
+
+    Returns:
+        (imported, skipped) where skipped rows have a missing or empty title or
+        body, name an unknown author, or have a created/updated value that
+        isn't an ISO 8601 timestamp.
+    """
+    from flaskr.render import render_markdown # Imported here: render depends on this module
+
+    db = get_db()
+    authors = {row['username']: row['id'] for row in db.execute('SELECT id, username FROM user')}
+    index_sql = _drop_post_indexes() if drop_indexes else []
+    imported = skipped = 0
+
+    try:
+        for batch in _batches(_read_records(stream, fmt), batch_size):
+            rows = []
+            for record in batch:
+                title, body = record.get('title'), record.get('body')
+                author_id = authors.get(record.get('author'))
+                if not title or not body or author_id is None:
+                    skipped += 1
+                    continue
+                try:
+                    created = _parse_timestamp(record.get('created'))
+                    updated = _parse_timestamp(record.get('updated'))
+                except (TypeError, ValueError):
+                    skipped += 1
+                    continue
+                rows.append((
+                    title, body, render_markdown(body) if render else None, author_id,
+                    created, updated,
+                ))
+            db.executemany(
+                'INSERT INTO post (title, body, body_html, author_id, created, updated)'
+                ' VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?)',
+                rows
+            )
+            db.commit()
+            imported += len(rows)
+            if progress is not None:
+                progress(imported)
+    except BaseException:
+        # Don't let the index rebuild below commit half of the failed batch
+        db.rollback()
+        raise
+    finally:
+        for sql in index_sql:
+            db.execute(sql)
+        db.commit()
+
+    current_app.logger.info("Imported %s posts (%s skipped).", imported, skipped)
+    return imported, skipped
+
+
+def import_users(stream: Any, fmt: str = 'ndjson', batch_size: int = 10000) -> int:
+    """
+    Bulk-load users (username + existing password hash); existing usernames are kept.
+
+    Returns:
+        The number of users inserted.
+    """
+    db = get_db()
+    before = db.total_changes
+    for batch in _batches(_read_records(stream, fmt), batch_size):
+        db.executemany(
+            'INSERT OR IGNORE INTO user (username, password) VALUES (?, ?)',
+            [(record['username'], record['password']) for record in batch]
+        )
+        db.commit()
+    return db.total_changes - before
+
+
+_format_option = click.option(
+    '--format', 'fmt', type=click.Choice(('auto',) + BULK_FORMATS), default='auto', show_default=True,
+    help="File format; 'auto' picks CSV for *.csv names and NDJSON otherwise."
+)
+
+
+@click.command('export-posts', help='Stream all posts to a file as NDJSON or CSV.')
+@click.argument('output', type=click.File('w'), default='-')
+@_format_option
+@with_appcontext
+def export_posts_command(output: Any, fmt: str) -> None:
+    """
+    Flask CLI command to export posts.
+    Usage: flask export-posts posts.ndjson
+    """
+    count = export_posts(output, _bulk_format(output, fmt))
+    click.echo(f'Exported {count} posts.', err=True)
+
+
+@click.command('import-posts', help='Bulk-load posts from an NDJSON or CSV file.')
+@click.argument('input', type=click.File('r'))
+@_format_option
+@click.option('--batch-size', type=int, default=10000, show_default=True, help='Rows per transaction.')
+@click.option('--drop-indexes', is_flag=True, help='Drop idx_post_* during the load and rebuild them after.')
+@click.option('--no-render', is_flag=True, help="Don't pre-render body_html.")
+@with_appcontext
+def import_posts_command(input: Any, fmt: str, batch_size: int, drop_indexes: bool, no_render: bool) -> None:
+    """
+    Flask CLI command to import posts; authors are matched by username.
+    Usage: flask import-posts posts.ndjson --drop-indexes
+    """
+    started = time.monotonic()
+
+    def progress(total: int) -> None:
+        rate = total / max(time.monotonic() - started, 1e-9)
+        click.echo(f'  {total} posts imported ({rate:.0f}/s)', err=True)
+
+    imported, skipped = import_posts(
+        input, _bulk_format(input, fmt), batch_size, drop_indexes, not no_render, progress
+    )
+    click.echo(f'Imported {imported} posts, skipped {skipped} (missing title/body, unknown author or bad timestamp).')
+
+
+@click.command('export-users', help='Stream all users (with password hashes) as NDJSON or CSV.')
+@click.argument('output', type=click.File('w'), default='-')
+@_format_option
+@with_appcontext
+def export_users_command(output: Any, fmt: str) -> None:
+    """
+    Flask CLI command to export users.
+    Usage: flask export-users users.ndjson
+    """
+    count = export_users(output, _bulk_format(output, fmt))
+    click.echo(f'Exported {count} users.', err=True)
+
+
+@click.command('import-users', help='Bulk-load users from an NDJSON or CSV file.')
+@click.argument('input', type=click.File('r'))
+@_format_option
+@click.option('--batch-size', type=int, default=10000, show_default=True, help='Rows per transaction.')
+@with_appcontext
+def import_users_command(input: Any, fmt: str, batch_size: int) -> None:
+    """
+    Flask CLI command to import users; existing usernames are left untouched.
+    Usage: flask import-users users.ndjson
+    """
+    count = import_users(input, _bulk_format(input, fmt), batch_size)
+    click.echo(f'Imported {count} users.')
 
 
 # Register custom type converters/adapters if needed
@@ -113,17 +956,48 @@ def init_app(app: Any) -> None:
     """
     Register database functions with the Flask application instance.
 
+    - Creates the connection pool when DATABASE_POOL_ENABLED is set (plus one
+      for read-only connections when read routing is on).
+    - Warns (once) when DATABASE_REPLICA is set but the file doesn't exist yet.
     - Registers the teardown function to close the DB connection after each request.
-    - Adds the 'init-db' command to the Flask CLI.
+    - Applies DATABASE_PRAGMAS to every new connection.
+    - Adds the 'init-db', 'upgrade-db', 'wal-checkpoint', 'refresh-replica',
+      'rebuild-search-index' and bulk import/export commands to the Flask CLI.
 
     Args:
         app: The Flask application instance.
     """
+    register_connection_hook(app, lambda conn: _apply_config_pragmas(app, conn))
+
+    if app.config.get('DATABASE_POOL_ENABLED'):
+        app.extensions['flaskr.db_pool'] = ConnectionPool(
+            lambda: _connect(app), app.config.get('DATABASE_POOL_SIZE', 5)
+        )
+        if app.config.get('DATABASE_READONLY') or app.config.get('DATABASE_REPLICA'):
+            app.extensions['flaskr.db_pool_ro'] = ConnectionPool(
+                lambda: _connect(app, readonly=True), app.config.get('DATABASE_POOL_SIZE', 5)
+            )
+
+    replica = app.config.get('DATABASE_REPLICA')
+    if replica and not os.path.exists(replica):
+        app.logger.warning(
+            "Replica %s doesn't exist yet, reading from the primary until 'flask refresh-replica' creates it.",
+            replica
+        )
+
     # Tell Flask to call close_db when cleaning up after returning the response
     app.teardown_appcontext(close_db)
 
     # Add the init_db_command to the Flask CLI group
     app.cli.add_command(init_db_command)
+    app.cli.add_command(wal_checkpoint_command)
+    app.cli.add_command(refresh_replica_command)
+    app.cli.add_command(rebuild_search_index_command)
+    app.cli.add_command(upgrade_db_command)
+    app.cli.add_command(rebuild_stats_command)
+    for command in (export_posts_command, import_posts_command,
+                    export_users_command, import_users_command):
+        app.cli.add_command(command)
     app.logger.debug("Database functions registered with the application.")
 
 # ----- End of file content -----
\ No newline at end of file
@@ -0,0 +1,112 @@
+# Filename: ./flaskr/feeds.py
+# ----- Start of file content -----
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from flask import Blueprint, current_app, render_template, request
+from werkzeug.wrappers import Response
+
+from flaskr.cache import LRUCache
+from flaskr.db import get_post_version_info, read_only
+from flaskr.http_cache import _as_utc, conditional_response
+from flaskr.posts import get_posts_page
+
+bp = Blueprint('feeds', __name__)
+
+# Feed format -> (template, mimetype)
+FEED_FORMATS: Dict[str, Tuple[str, str]] = {
+    'atom': ('feeds/atom.xml', 'application/atom+xml'),
+    'rss': ('feeds/rss.xml', 'application/rss+xml'),
+}
+
+
+class CachedFeed(NamedTuple):
+    """A serialized feed and the state of the post table it was built from."""
+    version: int                      # Post version counter when last checked
+    etag: str                         # Hash of the serialized feed
+    last_modified: Optional[datetime] # When the post write that changed the feed happened (aware UTC)
+    body: bytes
+
+
+def _build_feed(fmt: str, limit: int) -> bytes:
+    """Render the feed from the index's first page of posts."""
+    posts, _, _ = get_posts_page(None, None, limit)
+    template, _ = FEED_FORMATS[fmt]
+    return render_template(
+        template, posts=posts, title=current_app.config.get('FEED_TITLE', 'Flaskr')
+    ).encode('utf8')
+
+
+def get_feed(fmt: str) -> CachedFeed:
+    """
+    Return the serialized feed, rebuilding it only when a post changed.
+
+    Each check costs one primary-key lookup of the post version counter,
+    which triggers bump on every post write (including re-renders and edits
+    within the same second). When it moved, the feed is rebuilt; the ETag is
+    a hash of the result, so writes that don't change the feed (edits to
+    older posts) keep the client's cached copy valid. Feeds are cached per
+    app and per host (links are absolute) in an LRU of FEED_CACHE_SIZE
+    entries, so arbitrary Host headers can't grow it without bound.
+
+    Args:
+        fmt: 'atom' or 'rss'.
+    """
+    feeds: Optional[LRUCache] = current_app.extensions.get('flaskr.feeds')
+    if feeds is None:
+        feeds = current_app.extensions['flaskr.feeds'] = LRUCache(
+            maxsize=current_app.config.get('FEED_CACHE_SIZE', 8)
+        )
+    key = (fmt, request.host_url)
+    version, changed = get_post_version_info()
+    cached = feeds.get(key)
+    if cached is not None and cached.version == version:
+        return cached
+
+    body = _build_feed(fmt, current_app.config.get('FEED_SIZE', 20))
+    etag = hashlib.sha1(body).hexdigest()
+    if cached is not None and cached.etag == etag:
+        cached = cached._replace(version=version)
+    else:
+        cached = CachedFeed(version, etag, _as_utc(changed), body)
+        current_app.logger.debug("Rebuilt %s feed (%s bytes).", fmt, len(body))
+    feeds.set(key, cached)
+    return cached
+
+
+@bp.app_template_filter('rfc3339')
+def rfc3339(value: datetime) -> str:
+    """Format a naive UTC timestamp for Atom, e.g. 2018-01-01T00:00:00Z."""
+    return value.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+@bp.app_template_filter('rfc822')
+def rfc822(value: datetime) -> str:
+    """Format a naive UTC timestamp for RSS, e.g. Mon, 01 Jan 2018 00:00:00 GMT."""
+    return format_datetime(value.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def _feed_response(fmt: str) -> Response:
+    feed = get_feed(fmt)
+    _, mimetype = FEED_FORMATS[fmt]
+    return conditional_response(
+        feed.etag, feed.last_modified, lambda: Response(feed.body, mimetype=mimetype)
+    )
+
+
+@bp.route('/feed.atom')
+@read_only
+def atom() -> Response:
+    """The newest FEED_SIZE posts as an Atom feed."""
+    return _feed_response('atom')
+
+
+@bp.route('/feed.rss')
+@read_only
+def rss() -> Response:
+    """The newest FEED_SIZE posts as an RSS 2.0 feed."""
+    return _feed_response('rss')
+
+# ----- End of file content -----
@@ -0,0 +1,106 @@
+# Filename: ./flaskr/http_cache.py
+# ----- Start of file content -----
+import functools
+import hashlib
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+
+from flask import make_response, request, session
+from werkzeug.wrappers import Response
+
+from flaskr.db import get_post_version_info
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite CURRENT_TIMESTAMP values are naive UTC
+    if value is None:
+        return None
+    return value.replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def not_modified(etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+    Check the request's If-None-Match / If-Modified-Since against validators.
+
+    If-None-Match wins when both are sent, as required by RFC 9110.
+
+    Args:
+        etag: The (weak) entity tag of the current representation.
+        last_modified: When the representation last changed (aware UTC), if known.
+
+    Returns:
+        True if the client's cached copy is still valid.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def conditional_response(etag: str, last_modified: Optional[datetime],
+                         build: Callable[[], Any], private: bool = False) -> Response:
+    """
+    Answer 304 when the client's validators match, otherwise call `build`.
+
+    Args:
+        etag: Entity tag for the representation.
+        last_modified: Last modification time (aware UTC), if known.
+        build: Produces the full response; only called on a validator mismatch.
+        private: Mark the response as cacheable by the browser only.
+
+    Returns:
+        Either a bodiless 304 response or the built response with validators set.
+    """
+    if not_modified(etag, last_modified):
+        response = Response(status=304)
+    else:
+        response = make_response(build())
+        if response.status_code != 200:
+            return response
+
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # Caches may store the page but must revalidate it on every use
+    response.cache_control.no_cache = True
+    if private:
+        response.cache_control.private = True
+    else:
+        response.cache_control.public = True
+    return response
+
+
+def conditional(view: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Decorator adding ETag/Last-Modified validators to a post listing view.
+
+    Validators come from the post version counter (one primary-key lookup), the
+    logged-in user and the full request path, so a matching If-None-Match or
+    If-Modified-Since is answered with 304 before the view queries or renders.
+
+    Args:
+        view: The view function to decorate.
+
+    Returns:
+        The decorated view function.
+    """
+    @functools.wraps(view)
+    def wrapped_view(**kwargs: Any) -> Any:
+        # Pending flash messages make the page one-off, so skip validators
+        if request.method not in ('GET', 'HEAD') or '_flashes' in session:
+            return view(**kwargs)
+
+        version, changed = get_post_version_info()
+        user_id = session.get('user_id')
+        etag = hashlib.sha1(
+            f"{request.endpoint}|{version}|{user_id}|{request.full_path}".encode('utf8')
+        ).hexdigest()
+
+        return conditional_response(
+            etag, _as_utc(changed), lambda: view(**kwargs), private=user_id is not None
+        )
+
+    return wrapped_view
+
+# ----- End of file content -----
@@ -0,0 +1,235 @@
+# Filename: ./flaskr/instrumentation.py
+# ----- Start of file content -----
+import functools
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+from flask import Response, current_app, g, has_app_context, request
+from flask.signals import before_render_template, template_rendered
+
+# Histogram buckets (seconds) for request durations in the Prometheus output
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _record(name: str, seconds: float, count: int = 1) -> None:
+    """Add `seconds` to the current request's timings (no-op outside a request)."""
+    if has_app_context():
+        timings = g.get('_timings')
+        if timings is not None:
+            timings[name] += seconds
+            timings[f'{name}_count'] += count
+
+
+def _timed(name: str, count: int = 1) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator recording each call's duration under `name` (see _record)."""
+    def decorator(method: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(method)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                _record(name, time.perf_counter() - start, count)
+        return wrapper
+    return decorator
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    sqlite3.Cursor that times statements and row fetches.
+
+    SQLite produces rows as they are stepped through, so a query's cost is
+    split between execute() and the fetches; both count as 'sql' time, but
+    only statements add to the query count.
+    """
+
+    execute = _timed('sql')(sqlite3.Cursor.execute)
+    executemany = _timed('sql')(sqlite3.Cursor.executemany)
+    executescript = _timed('sql')(sqlite3.Cursor.executescript)
+    fetchone = _timed('sql', count=0)(sqlite3.Cursor.fetchone)
+    fetchmany = _timed('sql', count=0)(sqlite3.Cursor.fetchmany)
+    fetchall = _timed('sql', count=0)(sqlite3.Cursor.fetchall)
+    __next__ = _timed('sql', count=0)(sqlite3.Cursor.__next__)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3.Connection whose cursors (including execute()'s) are InstrumentedCursors."""
+
+    def cursor(self, factory: Any = InstrumentedCursor) -> sqlite3.Cursor:
+        return super().cursor(factory)
+
+    # sqlite3.Connection.execute() and friends create a plain Cursor internally,
+    # so go through cursor() instead
+    def execute(self, *args: Any, **kwargs: Any) -> sqlite3.Cursor:
+        return self.cursor().execute(*args, **kwargs)
+
+    def executemany(self, *args: Any, **kwargs: Any) -> sqlite3.Cursor:
+        return self.cursor().executemany(*args, **kwargs)
+
+    def executescript(self, *args: Any, **kwargs: Any) -> sqlite3.Cursor:
+        return self.cursor().executescript(*args, **kwargs)
+
+
+class Metrics:
+    """Per-endpoint aggregates, rendered in Prometheus text format."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests: Dict[str, int] = defaultdict(int)
+        self.buckets: Dict[str, List[int]] = defaultdict(lambda: [0] * len(DURATION_BUCKETS))
+        self.sums: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    def observe(self, endpoint: str, total: float, timings: Dict[str, float]) -> None:
+        with self._lock:
+            self.requests[endpoint] += 1
+            buckets = self.buckets[endpoint]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if total <= bound:
+                    buckets[i] += 1
+            sums = self.sums[endpoint]
+            sums['request'] += total
+            for name, value in timings.items():
+                sums[name] += value
+
+    def render(self, extra: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+        """Return all metrics in Prometheus text exposition format."""
+        lines = [
+            '# HELP flaskr_request_duration_seconds Wall time per request.',
+            '# TYPE flaskr_request_duration_seconds histogram',
+        ]
+        with self._lock:
+            for endpoint, count in sorted(self.requests.items()):
+                label = f'endpoint="{endpoint}"'
+                for bound, bucket in zip(DURATION_BUCKETS, self.buckets[endpoint]):
+                    lines.append(f'flaskr_request_duration_seconds_bucket{{{label},le="{bound}"}} {bucket}')
+                lines.append(f'flaskr_request_duration_seconds_bucket{{{label},le="+Inf"}} {count}')
+                lines.append(f'flaskr_request_duration_seconds_sum{{{label}}} {self.sums[endpoint]["request"]:.6f}')
+                lines.append(f'flaskr_request_duration_seconds_count{{{label}}} {count}')
+
+            for name, help_text in (
+                ('sql', 'Time spent executing SQL statements.'),
+                ('template', 'Time spent rendering templates.'),
+                ('markdown', 'Time spent in the markdown template filter.'),
+            ):
+                lines.append(f'# HELP flaskr_{name}_seconds_total {help_text}')
+                lines.append(f'# TYPE flaskr_{name}_seconds_total counter')
+                for endpoint in sorted(self.requests):
+                    lines.append(f'flaskr_{name}_seconds_total{{endpoint="{endpoint}"}} {self.sums[endpoint][name]:.6f}')
+            lines.append('# HELP flaskr_sql_statements_total SQL statements executed.')
+            lines.append('# TYPE flaskr_sql_statements_total counter')
+            for endpoint in sorted(self.requests):
+                lines.append(f'flaskr_sql_statements_total{{endpoint="{endpoint}"}} {int(self.sums[endpoint]["sql_count"])}')
+
+        # Cache counters (response cache, user cache, ...) as cache-labelled series
+        for metric in ('hits', 'misses'):
+            lines.append(f'# TYPE flaskr_cache_{metric}_total counter')
+            for cache_name, stats in sorted((extra or {}).items()):
+                if metric in stats:
+                    lines.append(f'flaskr_cache_{metric}_total{{cache="{cache_name}"}} {stats[metric]}')
+        return '\n'.join(lines) + '\n'
+
+
+def _start_timer() -> None:
+    g._timings = defaultdict(float)
+    g._request_start = time.perf_counter()
+
+
+def _finish_timer(response: Response) -> Response:
+    start = g.get('_request_start')
+    if start is None:
+        return response
+    timings = g._timings
+    metrics: Metrics = current_app.extensions['flaskr.metrics']
+    endpoint = request.endpoint or 'unknown'
+
+    if response.is_streamed or response.direct_passthrough:
+        # The body (and the queries and rendering behind it) is produced after
+        # this hook, so headers can't carry real numbers: skip Server-Timing
+        # and record the metrics once the body has been sent
+        response.call_on_close(
+            lambda: metrics.observe(endpoint, time.perf_counter() - start, dict(timings))
+        )
+        return response
+
+    total = time.perf_counter() - start
+    # Server-Timing lets browser dev tools show the server-side breakdown
+    response.headers['Server-Timing'] = ', '.join([
+        f'app;dur={total * 1000:.2f}',
+        f'sql;dur={timings["sql"] * 1000:.2f};desc="{int(timings["sql_count"])} queries"',
+        f'tpl;dur={timings["template"] * 1000:.2f}',
+        f'md;dur={timings["markdown"] * 1000:.2f}',
+    ])
+    metrics.observe(endpoint, total, dict(timings))
+    return response
+
+
+def _template_started(sender: Any, template: Any, context: Dict[str, Any], **extra: Any) -> None:
+    if has_app_context():
+        g._template_start = time.perf_counter()
+
+
+def _template_finished(sender: Any, template: Any, context: Dict[str, Any], **extra: Any) -> None:
+    start = g.pop('_template_start', None) if has_app_context() else None
+    if start is not None:
+        _record('template', time.perf_counter() - start)
+
+
+def _timed_filter(func: Callable[[str], str]) -> Callable[[str], str]:
+    @functools.wraps(func)
+    def wrapper(value: str) -> str:
+        start = time.perf_counter()
+        try:
+            return func(value)
+        finally:
+            _record('markdown', time.perf_counter() - start)
+    return wrapper
+
+
+def metrics_view() -> Response:
+    """Serve aggregated metrics in Prometheus text format."""
+    extra: Dict[str, Dict[str, Any]] = {}
+    response_cache = current_app.extensions.get('flaskr.response_cache')
+    if response_cache is not None:
+        extra['response'] = response_cache.stats()
+    user_cache = current_app.extensions.get('flaskr.user_cache')
+    if user_cache is not None:
+        extra['user'] = user_cache.stats()
+    author_cache = current_app.extensions.get('flaskr.author_cache')
+    if author_cache is not None:
+        extra['author'] = author_cache.stats()
+    count_cache = current_app.extensions.get('flaskr.count_cache')
+    if count_cache is not None:
+        extra['count'] = count_cache.stats()
+    body = current_app.extensions['flaskr.metrics'].render(extra)
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+
+def init_app(app: Any) -> None:
+    """
+    Enable request/SQL/template/Markdown timing when INSTRUMENTATION_ENABLED is set.
+
+    When disabled nothing is registered, so the only cost is this one check
+    at startup.
+
+    Args:
+        app: The Flask application instance.
+    """
+    if not app.config.get('INSTRUMENTATION_ENABLED'):
+        return
+
+    app.extensions['flaskr.metrics'] = Metrics()
+    # flaskr.db opens every new connection with this class
+    app.extensions['flaskr.connection_factory'] = InstrumentedConnection
+    app.before_request(_start_timer)
+    app.after_request(_finish_timer)
+    before_render_template.connect(_template_started, app)
+    template_rendered.connect(_template_finished, app)
+    if 'markdown' in app.jinja_env.filters:
+        app.jinja_env.filters['markdown'] = _timed_filter(app.jinja_env.filters['markdown'])
+    app.add_url_rule(app.config.get('METRICS_ENDPOINT', '/metrics'), 'metrics', metrics_view)
+    app.logger.debug("Request instrumentation enabled.")
+
+# ----- End of file content -----
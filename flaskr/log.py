@@ -0,0 +1,86 @@
+# Filename: ./flaskr/log.py
+# ----- Start of file content -----
+import atexit
+import json
+import logging
+import os
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as one JSON object per line for log shippers."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'path': record.pathname,
+            'line': record.lineno,
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+def configure_logging(app: Any) -> None:
+    """
+    Attach a non-blocking, rotating file log to app.logger.
+
+    Request threads only put records on a queue (QueueHandler); a background
+    QueueListener thread formats them and does the file I/O and rotation.
+    Sizes, paths and the JSON format are read from the LOG_* config keys.
+
+    Args:
+        app: The Flask application instance.
+    """
+    log_dir = app.config.get('LOG_DIR', 'logs')
+    os.makedirs(log_dir, exist_ok=True)
+
+    file_handler = RotatingFileHandler(
+        os.path.join(log_dir, app.config.get('LOG_FILENAME', 'flaskr.log')),
+        maxBytes=app.config.get('LOG_MAX_BYTES', 10 * 1024 * 1024),
+        backupCount=app.config.get('LOG_BACKUP_COUNT', 10)
+    )
+    if app.config.get('LOG_JSON'):
+        file_handler.setFormatter(JSONFormatter())
+    else:
+        file_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    file_handler.setLevel(logging.INFO)
+
+    log_queue: 'queue.SimpleQueue[logging.LogRecord]' = queue.SimpleQueue()
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    app.extensions['flaskr.log_listener'] = listener
+    # Flush whatever is still queued when the worker exits
+    atexit.register(stop_logging, app)
+
+    # app.logger is shared by every app with this name; don't stack handlers
+    for handler in list(app.logger.handlers):
+        if isinstance(handler, QueueHandler):
+            app.logger.removeHandler(handler)
+    app.logger.addHandler(QueueHandler(log_queue))
+    app.logger.setLevel(logging.INFO)
+
+
+def stop_logging(app: Any) -> None:
+    """
+    Stop the background log writer, flushing queued records. Safe to call twice.
+
+    Args:
+        app: The Flask application instance.
+    """
+    listener = app.extensions.pop('flaskr.log_listener', None)
+    if listener is not None:
+        for handler in list(app.logger.handlers):
+            if isinstance(handler, QueueHandler) and handler.queue is listener.queue:
+                app.logger.removeHandler(handler)
+        listener.stop()
+
+# ----- End of file content -----
@@ -0,0 +1,84 @@
+# Filename: ./flaskr/pagination.py
+# ----- Start of file content -----
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from flask import current_app, request
+
+# A keyset cursor is the (created, id) pair of a post. Together they are unique
+# and match the ordering of the idx_post_created_id index in schema.sql.
+Cursor = Tuple[str, int]
+
+
+def encode_cursor(created: Any, post_id: int) -> str:
+    """
+    Encode a (created, id) pair into an opaque, URL-safe token.
+
+    Args:
+        created: The post's creation timestamp (datetime or the raw stored string).
+        post_id: The post's id.
+
+    Returns:
+        The token to place in 'after'/'before' query parameters.
+    """
+    if isinstance(created, datetime):
+        # Match the 'YYYY-MM-DD HH:MM:SS' format SQLite stores for CURRENT_TIMESTAMP
+        created = created.isoformat(sep=' ')
+    raw = f"{created}|{post_id}".encode('utf8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: Optional[str]) -> Optional[Cursor]:
+    """
+    Decode a token produced by encode_cursor.
+
+    Args:
+        token: The token taken from the request, may be None or empty.
+
+    Returns:
+        The (created, id) pair, or None if the token is missing or malformed.
+    """
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf8')
+        created, post_id = raw.rsplit('|', 1)
+        return created, int(post_id)
+    except (ValueError, UnicodeError, binascii.Error):
+        return None
+
+
+def get_per_page(default: Optional[int] = None, names: Sequence[str] = ('per_page',)) -> int:
+    """
+    Page size for the current request.
+
+    Read from the first query parameter in `names` that is present, falling
+    back to `default` (or POSTS_PER_PAGE), and clamped to 1..MAX_POSTS_PER_PAGE
+    so a client can't ask for the whole table in one page.
+
+    Args:
+        default: Page size when the request doesn't set one.
+        names: Query parameters to look at, e.g. ('limit', 'per_page') for the API.
+
+    Returns:
+        The page size to use.
+    """
+    per_page = None
+    for name in names:
+        per_page = request.args.get(name, type=int)
+        if per_page is not None:
+            break
+    if per_page is None:
+        per_page = default if default is not None else current_app.config['POSTS_PER_PAGE']
+    return min(max(per_page, 1), current_app.config['MAX_POSTS_PER_PAGE'])
+
+
+def per_page_args() -> Dict[str, int]:
+    """url_for() values that carry an explicit ?per_page= on to prev/next links."""
+    per_page = request.args.get('per_page', type=int)
+    return {'per_page': get_per_page()} if per_page is not None else {}
+
+# ----- End of file content -----
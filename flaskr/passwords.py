@@ -0,0 +1,186 @@
+# Filename: ./flaskr/passwords.py
+# ----- Start of file content -----
+import atexit
+import functools
+import os
+import sys
+import threading
+import weakref
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+_pool_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=8)
+def _method_prefix(method: str) -> str:
+    """
+    Return the fully-qualified method string werkzeug stores for `method`.
+
+    werkzeug expands defaults ('scrypt' -> 'scrypt:32768:8:1'), so hash a
+    throwaway value once and keep the part before the first '$'.
+    """
+    return generate_password_hash('', method=method, salt_length=1).split('$', 1)[0]
+
+
+class HashPool:
+    """
+    A bounded process pool for password hashing and verification.
+
+    Hashing is CPU-bound and holds the GIL, so doing it on request threads
+    stalls every other request in the worker. Running it in child processes
+    keeps request threads free; the pool size caps how many CPUs a login
+    burst can take. Like the DB pool, it is rebuilt after a fork. Workers are
+    started with `start_method` ('forkserver' or 'spawn'), never by forking
+    the multi-threaded server process.
+
+    Those start methods re-import the main module in each worker. When that
+    module hashes on import (a script without an `if __name__ == '__main__'`
+    guard), the worker hashes in-process instead of starting a pool of its
+    own, and if the pool breaks anyway the hash is done in-process too.
+    """
+
+    def __init__(self, workers: int, start_method: str = 'forkserver') -> None:
+        self.workers = workers
+        self.start_method = start_method
+        self._executor: Optional['ProcessPoolExecutor'] = None
+        self._pid = os.getpid()
+        _pools.add(self)
+
+    def _get_executor(self) -> Optional['ProcessPoolExecutor']:
+        with _pool_lock:
+            if self._executor is None or self._pid != os.getpid():
+                # Processes (and multiprocessing itself) are only loaded on the
+                # first hash, not at startup
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+
+                # multiprocessing aliases __mp_main__ to __main__ in the parent;
+                # only children run the main module under that name
+                reimporting_main = getattr(sys.modules.get('__mp_main__'), '__name__', None) == '__mp_main__'
+                if reimporting_main or multiprocessing.parent_process() is not None:
+                    # We are a multiprocessing child (possibly one of this
+                    # pool's workers re-importing the main module), which
+                    # can't start processes of its own
+                    return None
+                # Never fork() the server: it runs request and log listener
+                # threads, and a child could inherit a lock one of them holds
+                method = self.start_method
+                if method not in multiprocessing.get_all_start_methods():
+                    method = 'spawn' # e.g. no forkserver on Windows
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context(method)
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run func(*args) in a worker process and wait for the result."""
+        from concurrent.futures.process import BrokenProcessPool
+
+        executor = self._get_executor()
+        if executor is None:
+            return func(*args)
+        try:
+            return executor.submit(func, *args).result()
+        except BrokenProcessPool:
+            current_app.logger.warning(
+                "Password hash worker died; hashing in-process. If the app is created by a script, "
+                "guard it with `if __name__ == '__main__':` (see PASSWORD_HASH_START_METHOD)."
+            )
+            with _pool_lock:
+                if self._executor is executor:
+                    self._executor = None # Started afresh on the next hash
+            return func(*args)
+
+    def shutdown(self) -> None:
+        """Stop the worker processes. Safe to call twice."""
+        with _pool_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None and self._pid == os.getpid():
+            executor.shutdown(wait=False)
+
+
+# Every HashPool, so one atexit hook can stop them all (apps are created per
+# test, and each would otherwise register its own hook)
+_pools: 'weakref.WeakSet[HashPool]' = weakref.WeakSet()
+
+
+@atexit.register
+def _shutdown_pools() -> None:
+    for pool in list(_pools):
+        pool.shutdown()
+
+
+def _run(func: Callable[..., Any], *args: Any) -> Any:
+    """Run on the app's hash pool, or inline when PASSWORD_HASH_WORKERS is 0."""
+    pool: Optional[HashPool] = current_app.extensions.get('flaskr.hash_pool')
+    if pool is None:
+        return func(*args)
+    return pool.run(func, *args)
+
+
+def hash_password(password: str) -> str:
+    """
+    Hash a password with the configured method and salt length.
+
+    Args:
+        password: The plaintext password.
+
+    Returns:
+        The werkzeug-format hash to store in user.password.
+    """
+    return _run(
+        generate_password_hash, password,
+        current_app.config['PASSWORD_HASH_METHOD'],
+        current_app.config['PASSWORD_HASH_SALT_LENGTH']
+    )
+
+
+def verify_password(stored_hash: str, password: str) -> bool:
+    """
+    Check a password against a stored hash (any method werkzeug understands).
+
+    Args:
+        stored_hash: The value from user.password.
+        password: The plaintext password that was submitted.
+
+    Returns:
+        True if the password matches.
+    """
+    return _run(check_password_hash, stored_hash, password)
+
+
+def needs_rehash(stored_hash: str) -> bool:
+    """
+    Tell whether a stored hash was made with a different method or cost
+    than PASSWORD_HASH_METHOD (e.g. after the work factor was raised).
+
+    Args:
+        stored_hash: The value from user.password.
+
+    Returns:
+        True if the hash should be replaced on the user's next login.
+    """
+    return stored_hash.split('$', 1)[0] != _method_prefix(current_app.config['PASSWORD_HASH_METHOD'])
+
+
+def init_app(app: Any) -> None:
+    """
+    Set up the password hashing process pool when PASSWORD_HASH_WORKERS > 0.
+
+    Args:
+        app: The Flask application instance.
+    """
+    workers = app.config.get('PASSWORD_HASH_WORKERS', 0)
+    if workers > 0:
+        app.extensions['flaskr.hash_pool'] = HashPool(
+            workers, app.config.get('PASSWORD_HASH_START_METHOD', 'forkserver')
+        )
+
+# ----- End of file content -----
@@ -0,0 +1,408 @@
+# Filename: ./flaskr/posts.py
+# ----- Start of file content -----
+import re
+from datetime import datetime
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, Optional,
+                    Sequence, Tuple)
+
+from flask import current_app
+
+from flaskr.cache import LRUCache
+from flaskr.db import get_db
+from flaskr.pagination import Cursor
+
+# Post columns in Post.__init__ order; listings read `post` alone, without joining `user`
+POST_COLUMNS = 'p.id, p.title, p.body, p.body_html, p.created, p.updated, p.author_id'
+
+MAX_TAGS_PER_POST = 10
+MAX_TAG_LENGTH = 32
+_TAG_RE = re.compile(r'[\w-]+')
+
+
+class Post:
+    """
+    A post row with its author's username and tag names.
+
+    Uses __slots__, so a page of posts costs far less memory and allocation
+    than sqlite3.Row objects. Supports post['title'] as well as post.title,
+    so templates and callers written against sqlite3.Row keep working.
+    """
+
+    __slots__ = ('id', 'title', 'body', 'body_html', 'created', 'updated', 'author_id',
+                 'username', 'tags')
+
+    def __init__(self, id: int, title: str, body: str, body_html: Optional[str],
+                 created: datetime, updated: Optional[datetime], author_id: int,
+                 username: Optional[str] = None, tags: Sequence[str] = ()) -> None:
+        self.id = id
+        self.title = title
+        self.body = body
+        self.body_html = body_html
+        self.created = created
+        self.updated = updated
+        self.author_id = author_id
+        self.username = username
+        self.tags = tags
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def keys(self) -> Tuple[str, ...]:
+        return self.__slots__
+
+    def __repr__(self) -> str:
+        return f'<Post {self.id} by {self.username!r}>'
+
+
+def _get_author_cache() -> LRUCache:
+    """Return this app's user id -> username cache, creating it on first use."""
+    cache = current_app.extensions.get('flaskr.author_cache')
+    if cache is None:
+        cache = current_app.extensions['flaskr.author_cache'] = LRUCache(
+            maxsize=current_app.config.get('AUTHOR_CACHE_SIZE', 4096),
+            ttl=current_app.config.get('AUTHOR_CACHE_TTL', 300)
+        )
+    return cache
+
+
+def get_usernames(author_ids: Iterable[int]) -> Dict[int, str]:
+    """
+    Resolve author ids to usernames.
+
+    Cached names are served from the author LRU cache; every id that is
+    missing from it is looked up with one `WHERE id IN (...)` query.
+
+    Args:
+        author_ids: User ids (duplicates are fine).
+
+    Returns:
+        A dict of id -> username for every id that exists.
+    """
+    cache = _get_author_cache()
+    names: Dict[int, str] = {}
+    missing: List[int] = []
+    for author_id in set(author_ids):
+        username = cache.get(author_id)
+        if username is None:
+            missing.append(author_id)
+        else:
+            names[author_id] = username
+
+    if missing:
+        placeholders = ', '.join('?' * len(missing))
+        rows = get_db().execute(
+            f'SELECT id, username FROM user WHERE id IN ({placeholders})', missing
+        ).fetchall()
+        for row in rows:
+            names[row[0]] = row[1]
+            cache.set(row[0], row[1])
+    return names
+
+
+def invalidate_author(user_id: int) -> None:
+    """Drop a cached username (called when a user row changes)."""
+    _get_author_cache().delete(user_id)
+
+
+def _get_count_cache() -> LRUCache:
+    """Return this app's post count cache (author id -> count, 0 = all posts)."""
+    cache = current_app.extensions.get('flaskr.count_cache')
+    if cache is None:
+        cache = current_app.extensions['flaskr.count_cache'] = LRUCache(
+            maxsize=current_app.config.get('AUTHOR_CACHE_SIZE', 4096),
+            ttl=current_app.config.get('POST_COUNT_CACHE_TTL', 0)
+        )
+    return cache
+
+
+def get_post_count(author_id: Optional[int] = None) -> int:
+    """
+    Return the number of posts, site-wide or by one author.
+
+    Reads the trigger-maintained `stats` table (one primary-key lookup) and
+    caches the value for POST_COUNT_CACHE_TTL seconds; 0 reads it every time.
+
+    Args:
+        author_id: Count only this author's posts.
+    """
+    key = author_id or 0
+    ttl = current_app.config.get('POST_COUNT_CACHE_TTL', 0)
+    cache = _get_count_cache()
+    if ttl:
+        count = cache.get(key)
+        if count is not None:
+            return count
+
+    row = get_db().execute(
+        "SELECT value FROM stats WHERE name = 'posts' AND author_id = ?", (key,)
+    ).fetchone()
+    count = row[0] if row else 0
+    if ttl:
+        cache.set(key, count, ttl)
+    return count
+
+
+def invalidate_post_count() -> None:
+    """Drop cached post counts after posts are created or deleted."""
+    _get_count_cache().clear()
+
+
+def parse_tags(text: str) -> List[str]:
+    """
+    Normalize a comma/space separated tag field to unique lowercase names.
+
+    Args:
+        text: e.g. 'Python, flask web'
+
+    Returns:
+        e.g. ['python', 'flask', 'web'] (at most MAX_TAGS_PER_POST).
+    """
+    tags: List[str] = []
+    for name in _TAG_RE.findall(text.lower()):
+        name = name[:MAX_TAG_LENGTH]
+        if name not in tags:
+            tags.append(name)
+    return tags[:MAX_TAGS_PER_POST]
+
+
+def set_post_tags(post_id: int, names: Sequence[str]) -> None:
+    """
+    Replace a post's tags. Runs in the caller's transaction (no commit).
+
+    Args:
+        post_id: The post to tag; it must already exist.
+        names: Tag names from parse_tags().
+    """
+    db = get_db()
+    db.execute('DELETE FROM post_tag WHERE post_id = ?', (post_id,))
+    if not names:
+        return
+    db.executemany('INSERT OR IGNORE INTO tag (name) VALUES (?)', [(name,) for name in names])
+    placeholders = ', '.join('?' * len(names))
+    db.execute(
+        'INSERT INTO post_tag (tag_id, created, post_id)'
+        ' SELECT t.id, p.created, p.id FROM tag t, post p'
+        f' WHERE p.id = ? AND t.name IN ({placeholders})',
+        (post_id, *names)
+    )
+
+
+def get_tags(post_ids: Sequence[int]) -> Dict[int, List[str]]:
+    """
+    Return the tag names of several posts with one query.
+
+    Returns:
+        A dict of post id -> sorted tag names (posts without tags are absent).
+    """
+    placeholders = ', '.join('?' * len(post_ids))
+    rows = get_db().execute(
+        'SELECT pt.post_id, t.name FROM post_tag pt JOIN tag t ON t.id = pt.tag_id'
+        f' WHERE pt.post_id IN ({placeholders}) ORDER BY t.name',
+        list(post_ids)
+    ).fetchall()
+    tags: Dict[int, List[str]] = {}
+    for post_id, name in rows:
+        tags.setdefault(post_id, []).append(name)
+    return tags
+
+
+def get_tag_id(name: str) -> Optional[int]:
+    """Return the id of the tag called `name`, or None."""
+    row = get_db().execute('SELECT id FROM tag WHERE name = ?', (name.lower(),)).fetchone()
+    return row[0] if row else None
+
+
+def _attach(posts: List[Post]) -> List[Post]:
+    """Fill in usernames and tags for a batch of posts (two batched queries)."""
+    if posts:
+        names = get_usernames(post.author_id for post in posts)
+        tags = get_tags([post.id for post in posts])
+        for post in posts:
+            post.username = names.get(post.author_id)
+            post.tags = tags.get(post.id, ())
+    return posts
+
+
+def _fetch_posts(sql: str, params: Sequence[Any]) -> List[Post]:
+    """Run a `SELECT POST_COLUMNS FROM post p ...` query and attach usernames and tags."""
+    cursor = get_db().execute(sql, params)
+    cursor.row_factory = None # Plain tuples: cheaper than sqlite3.Row, unpacked straight into Post
+    return _attach([Post(*row) for row in cursor.fetchall()])
+
+
+def get_post_by_id(id: int) -> Optional[Post]:
+    """
+    Return one post with its author's username, or None.
+
+    Args:
+        id: The post id.
+    """
+    posts = _fetch_posts(f'SELECT {POST_COLUMNS} FROM post p WHERE p.id = ?', (id,))
+    return posts[0] if posts else None
+
+
+def _listing_query(after: Optional[Cursor], before: Optional[Cursor], limit: int,
+                   author_id: Optional[int], tag_id: Optional[int]) -> Tuple[str, List[Any]]:
+    """
+    Build the keyset listing statement used by get_posts_page() and PostStream.
+
+    Each variant is a range scan of one index in (created, id) order:
+    idx_post_created_id for all posts, idx_post_author_created for one
+    author and post_tag's primary key for one tag. `before` walks the index
+    upwards (oldest first); callers flip the result for display.
+    """
+    where, params = [], []
+    if tag_id is not None:
+        # Page through post_tag, then look each post up by id
+        source, created, id_column = 'post_tag pt JOIN post p ON p.id = pt.post_id', 'pt.created', 'pt.post_id'
+        where.append('pt.tag_id = ?')
+        params.append(tag_id)
+    else:
+        source, created, id_column = 'post p', 'p.created', 'p.id'
+    if author_id is not None:
+        where.append('p.author_id = ?')
+        params.append(author_id)
+
+    if after is not None:
+        # Older posts than the cursor, newest first
+        where.append(f'({created}, {id_column}) < (?, ?)')
+        params.extend(after)
+        order = 'DESC'
+    elif before is not None:
+        # Newer posts than the cursor: walk the index upwards, then flip for display
+        where.append(f'({created}, {id_column}) > (?, ?)')
+        params.extend(before)
+        order = 'ASC'
+    else:
+        order = 'DESC'
+
+    sql = (
+        f'SELECT {POST_COLUMNS} FROM {source}' +
+        (' WHERE ' + ' AND '.join(where) if where else '') +
+        f' ORDER BY {created} {order}, {id_column} {order} LIMIT ?'
+    )
+    params.append(limit + 1) # One extra row tells us whether another page exists
+    return sql, params
+
+
+def get_posts_page(after: Optional[Cursor], before: Optional[Cursor], limit: int,
+                   author_id: Optional[int] = None,
+                   tag_id: Optional[int] = None) -> Tuple[List[Post], bool, bool]:
+    """
+    Fetch one page of posts by keyset pagination on (created, id).
+
+    Args:
+        after: Return posts older than this cursor (the 'next' direction).
+        before: Return posts newer than this cursor (the 'previous' direction).
+        limit: Page size.
+        author_id: Only list posts by this author.
+        tag_id: Only list posts with this tag.
+
+    Returns:
+        (posts newest first, has_prev, has_next).
+    """
+    rows = _fetch_posts(*_listing_query(after, before, limit, author_id, tag_id))
+    more = len(rows) > limit
+    posts = rows[:limit]
+
+    if before is not None:
+        return posts[::-1], more, True
+    return posts, after is not None, more
+
+
+class PostStream:
+    """
+    Lazily yields one page of posts, newest first, for streamed templates.
+
+    Rows are pulled from the cursor with fetchmany(), and usernames and tags
+    are resolved one batch at a time. That way the page header and first
+    posts can be sent while later rows are still being read. has_next and
+    next_url are only known once iteration has finished, so templates must
+    read them after the loop.
+    """
+
+    def __init__(self, sql: str, params: Sequence[Any], limit: int, batch_size: int = 20,
+                 prev_url: Optional[Callable[[Post], str]] = None,
+                 next_url: Optional[Callable[[Post], str]] = None) -> None:
+        """
+        Args:
+            sql, params: A listing query that selects limit + 1 rows.
+            limit: Page size.
+            batch_size: Rows per fetchmany().
+            prev_url: Builds the previous-page link from the first post
+                (None when there is no previous page).
+            next_url: Builds the next-page link from the last post.
+        """
+        self._sql = sql
+        self._params = params
+        self._limit = limit
+        self._batch_size = batch_size
+        self._make_prev_url = prev_url
+        self._make_next_url = next_url
+        self.first: Optional[Post] = None
+        self.last: Optional[Post] = None
+        self.has_next = False
+
+    @classmethod
+    def listing(cls, after: Optional[Cursor], limit: int, author_id: Optional[int] = None,
+                tag_id: Optional[int] = None, **kwargs: Any) -> 'PostStream':
+        """A stream over get_posts_page()'s query (newest-first directions only)."""
+        return cls(*_listing_query(after, None, limit, author_id, tag_id), limit, **kwargs)
+
+    @classmethod
+    def by_offset(cls, offset: int, limit: int, **kwargs: Any) -> 'PostStream':
+        """A stream over get_posts_by_offset()'s query."""
+        return cls(*_offset_query(offset, limit), limit, **kwargs)
+
+    def __iter__(self) -> Iterator[Post]:
+        cursor = get_db().execute(self._sql, self._params)
+        cursor.row_factory = None
+        count = 0
+        while True:
+            rows = cursor.fetchmany(self._batch_size)
+            if not rows:
+                return
+            for post in _attach([Post(*row) for row in rows]):
+                if count == self._limit:
+                    self.has_next = True # The extra look-ahead row
+                    return
+                count += 1
+                if self.first is None:
+                    self.first = post
+                self.last = post
+                yield post
+
+    @property
+    def prev_url(self) -> Optional[str]:
+        if self.first is not None and self._make_prev_url is not None:
+            return self._make_prev_url(self.first)
+        return None
+
+    @property
+    def next_url(self) -> Optional[str]:
+        if self.has_next and self.last is not None and self._make_next_url is not None:
+            return self._make_next_url(self.last)
+        return None
+
+
+def get_posts_by_offset(offset: int, limit: int) -> Tuple[List[Post], bool]:
+    """
+    Fetch posts newest first with LIMIT/OFFSET (the ?page=N index mode).
+
+    Returns:
+        (posts, has_next).
+    """
+    rows = _fetch_posts(*_offset_query(offset, limit))
+    return rows[:limit], len(rows) > limit
+
+
+def _offset_query(offset: int, limit: int) -> Tuple[str, List[Any]]:
+    return (
+        f'SELECT {POST_COLUMNS} FROM post p ORDER BY p.created DESC, p.id DESC LIMIT ? OFFSET ?',
+        [limit + 1, offset]
+    )
+
+# ----- End of file content -----
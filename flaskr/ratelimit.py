@@ -0,0 +1,202 @@
+# Filename: ./flaskr/ratelimit.py
+# ----- Start of file content -----
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+from flask import current_app, request
+
+# Per-key state: (window number, count in the previous window, count in the current one)
+WindowState = Tuple[int, int, int]
+
+
+def _advance(state: Optional[WindowState], window: int) -> WindowState:
+    """Roll a key's counters forward to `window`."""
+    if state is None or state[0] < window - 1:
+        return (window, 0, 0)
+    if state[0] == window - 1:
+        return (window, state[2], 0)
+    return state
+
+
+def _check(state: WindowState, now: float, period: int, limit: int) -> Optional[float]:
+    """
+    Sliding-window-counter test: weight the previous window by how much of it
+    still overlaps the last `period` seconds.
+
+    Returns:
+        None if another hit is allowed, otherwise seconds until it will be.
+    """
+    elapsed = (now % period) / period
+    window, previous, current = state
+    if previous * (1 - elapsed) + current < limit:
+        return None
+    if current >= limit:
+        # The current window alone is full; wait for it to end
+        return period * (1 - elapsed)
+    # Wait until enough of the previous window has slid out
+    return max(period * ((1 - (limit - current) / previous) - elapsed), 1.0)
+
+
+class MemoryRateLimiter:
+    """
+    In-process sliding-window limiter.
+
+    Each key costs one small tuple; keys are kept in LRU order and the oldest
+    are evicted past `max_keys`, so a flood of distinct IPs/usernames can't
+    grow memory without bound.
+    """
+
+    def __init__(self, period: int, max_keys: int = 10000) -> None:
+        self.period = period
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._state: 'OrderedDict[str, WindowState]' = OrderedDict()
+
+    def hit(self, key: str, limit: int, now: Optional[float] = None) -> Optional[float]:
+        """
+        Count an attempt for `key` unless it is over `limit`.
+
+        Returns:
+            None if the attempt is allowed, otherwise seconds to wait.
+        """
+        now = time.time() if now is None else now
+        window = int(now // self.period)
+        with self._lock:
+            state = _advance(self._state.get(key), window)
+            retry_after = _check(state, now, self.period, limit)
+            if retry_after is None:
+                state = (window, state[1], state[2] + 1)
+            self._state[key] = state
+            self._state.move_to_end(key)
+            while len(self._state) > self.max_keys:
+                self._state.popitem(last=False)
+        return retry_after
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state.clear()
+
+
+class SQLiteRateLimiter:
+    """
+    Sliding-window limiter kept in a small SQLite table, shared by every
+    worker process on the host. It uses its own database file so limiter
+    writes never contend with the blog's write lock.
+    """
+
+    CLEANUP_EVERY = 1000 # Hits between purges of expired rows
+
+    def __init__(self, path: str, period: int) -> None:
+        self.path = path
+        self.period = period
+        self._local = threading.local()
+        self._hits = 0
+        self._conn().execute(
+            'CREATE TABLE IF NOT EXISTS rate_limit ('
+            ' key TEXT PRIMARY KEY, window INTEGER NOT NULL,'
+            ' previous INTEGER NOT NULL, current INTEGER NOT NULL'
+            ') WITHOUT ROWID'
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        # One autocommit connection per thread (and per process after a fork)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode = wal')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def hit(self, key: str, limit: int, now: Optional[float] = None) -> Optional[float]:
+        """Same contract as MemoryRateLimiter.hit()."""
+        now = time.time() if now is None else now
+        window = int(now // self.period)
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE') # Serialize read-modify-write across processes
+        try:
+            row = conn.execute(
+                'SELECT window, previous, current FROM rate_limit WHERE key = ?', (key,)
+            ).fetchone()
+            state = _advance(tuple(row) if row else None, window)
+            retry_after = _check(state, now, self.period, limit)
+            if retry_after is None:
+                state = (window, state[1], state[2] + 1)
+            conn.execute(
+                'INSERT OR REPLACE INTO rate_limit (key, window, previous, current) VALUES (?, ?, ?, ?)',
+                (key,) + state
+            )
+            self._hits += 1
+            if self._hits % self.CLEANUP_EVERY == 0:
+                conn.execute('DELETE FROM rate_limit WHERE window < ?', (window - 1,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return retry_after
+
+    def reset(self) -> None:
+        self._conn().execute('DELETE FROM rate_limit')
+
+
+def check_login_rate(username: str) -> Optional[int]:
+    """
+    Count a login attempt against the per-IP and per-username limits.
+
+    Call this before touching the database or hashing anything, so throttled
+    requests cost next to nothing. The per-IP key is request.remote_addr:
+    behind a reverse proxy, set PROXY_FIX_X_FOR so that is the client's
+    address rather than the proxy's.
+
+    Args:
+        username: The submitted username.
+
+    Returns:
+        None if the attempt may proceed, otherwise the Retry-After seconds.
+    """
+    limiter = current_app.extensions.get('flaskr.login_limiter')
+    if limiter is None:
+        return None
+
+    checks: List[Tuple[str, int]] = [
+        (f'ip:{request.remote_addr}', current_app.config['LOGIN_RATE_LIMIT_PER_IP']),
+    ]
+    if username:
+        checks.append((f'user:{username.lower()}', current_app.config['LOGIN_RATE_LIMIT_PER_USERNAME']))
+
+    for key, limit in checks:
+        retry_after = limiter.hit(key, limit)
+        if retry_after is not None:
+            current_app.logger.warning("Login rate limit exceeded for %s.", key)
+            return math.ceil(retry_after)
+    return None
+
+
+def init_app(app: Any) -> None:
+    """
+    Create the login limiter selected by LOGIN_RATE_LIMIT_BACKEND
+    ('memory', 'sqlite' or 'none').
+
+    Args:
+        app: The Flask application instance.
+    """
+    backend = app.config.get('LOGIN_RATE_LIMIT_BACKEND', 'memory')
+    period = app.config.get('LOGIN_RATE_LIMIT_PERIOD', 60)
+    if backend == 'memory':
+        limiter: Any = MemoryRateLimiter(period, app.config.get('LOGIN_RATE_LIMIT_MAX_KEYS', 10000))
+    elif backend == 'sqlite':
+        path = app.config.get('LOGIN_RATE_LIMIT_DATABASE') or os.path.join(
+            app.instance_path, 'ratelimit.sqlite'
+        )
+        limiter = SQLiteRateLimiter(path, period)
+    elif backend == 'none':
+        return
+    else:
+        raise ValueError(f"Unknown LOGIN_RATE_LIMIT_BACKEND {backend!r}")
+    app.extensions['flaskr.login_limiter'] = limiter
+
+# ----- End of file content -----
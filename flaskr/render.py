@@ -0,0 +1,77 @@
+# Filename: ./flaskr/render.py
+# ----- Start of file content -----
+from typing import Any
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from flaskr.db import get_db
+
+# Number of posts re-rendered per UPDATE batch by the rerender-posts command
+RERENDER_BATCH_SIZE = 500
+
+
+def render_markdown(text: str) -> str:
+    """
+    Convert Markdown text to HTML using the configured extensions.
+
+    Args:
+        text: The Markdown source of a post body.
+
+    Returns:
+        The rendered HTML (not escaped; post bodies are trusted Markdown).
+    """
+    # Imported on first use: the markdown package (and its extensions) is the
+    # heaviest import in the app and most requests read pre-rendered body_html
+    from markdown import markdown
+
+    extensions = current_app.config.get('MARKDOWN_EXTENSIONS', ['fenced_code', 'tables'])
+    return markdown(text, extensions=extensions)
+
+
+@click.command('rerender-posts', help='Re-render the cached HTML of every post body.')
+@with_appcontext
+def rerender_posts_command() -> None:
+    """
+    Flask CLI command to rebuild post.body_html from post.body.
+    Run it after changing MARKDOWN_EXTENSIONS.
+    Usage: flask rerender-posts
+    """
+    db = get_db()
+    last_id = 0
+    total = 0
+
+    # Walk the table in id order so memory stays bounded on large databases
+    while True:
+        rows = db.execute(
+            'SELECT id, body FROM post WHERE id > ? ORDER BY id LIMIT ?',
+            (last_id, RERENDER_BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        db.executemany(
+            'UPDATE post SET body_html = ? WHERE id = ?',
+            [(render_markdown(row['body']), row['id']) for row in rows]
+        )
+        db.commit()
+        last_id = rows[-1]['id']
+        total += len(rows)
+
+    click.echo(f'Re-rendered {total} posts.')
+    current_app.logger.info("Re-rendered HTML for %s posts.", total)
+
+
+def init_app(app: Any) -> None:
+    """
+    Register the markdown template filter and the rerender-posts command.
+
+    The filter is only a fallback for posts without cached body_html.
+
+    Args:
+        app: The Flask application instance.
+    """
+    app.add_template_filter(render_markdown, 'markdown')
+    app.cli.add_command(rerender_posts_command)
+
+# ----- End of file content -----
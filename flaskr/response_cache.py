@@ -0,0 +1,266 @@
+# Filename: ./flaskr/response_cache.py
+# ----- Start of file content -----
+import functools
+import hashlib
+import os
+import pickle
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from flask import current_app, jsonify, make_response, request, session
+from werkzeug.wrappers import Response
+
+from flaskr.cache import LRUCache
+from flaskr.db import get_post_version
+
+# What gets stored per page: (body, status code, content type)
+CachedResponse = Tuple[bytes, int, str]
+
+
+class MemoryBackend:
+    """Per-process LRU backend. Fast, but each worker warms its own copy."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: CachedResponse) -> None:
+        self._cache.set(key, value)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+class FileSystemBackend:
+    """
+    Stores pages as files in a directory, shared by every worker on the host.
+
+    Entries older than `ttl` seconds are ignored; once more than `maxsize` files
+    exist the oldest are pruned.
+    """
+
+    def __init__(self, directory: str, maxsize: int, ttl: float) -> None:
+        self.directory = directory
+        self.maxsize = maxsize
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode('utf8')).hexdigest())
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        path = self._path(key)
+        try:
+            if self.ttl and os.path.getmtime(path) + self.ttl < time.time():
+                return None
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.PickleError, EOFError):
+            return None
+
+    def set(self, key: str, value: CachedResponse) -> None:
+        path = self._path(key)
+        # Write to a temp file and rename so readers never see a partial entry
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self._prune()
+
+    def clear(self) -> None:
+        for name in os.listdir(self.directory):
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def _prune(self) -> None:
+        entries = os.listdir(self.directory)
+        if len(entries) <= self.maxsize:
+            return
+        paths = sorted(
+            (os.path.join(self.directory, name) for name in entries),
+            key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0
+        )
+        for path in paths[:len(paths) - self.maxsize]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class LocalExternalClient:
+    """
+    In-process stand-in for a memcached/redis client (get/set/flush_all).
+
+    Values are serialized like a network client would, so swapping in a real
+    client object changes nothing else.
+    """
+
+    def __init__(self) -> None:
+        self._data: Dict[str, Tuple[bytes, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None or (entry[1] and entry[1] < time.time()):
+            return None
+        return entry[0]
+
+    def set(self, key: str, value: bytes, expire: float = 0) -> None:
+        with self._lock:
+            self._data[key] = (value, time.time() + expire if expire else 0)
+
+    def flush_all(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class ExternalBackend:
+    """Adapter for an external cache client with get/set(expire=)/flush_all."""
+
+    def __init__(self, client: Any, ttl: float) -> None:
+        self.client = client
+        self.ttl = ttl
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        raw = self.client.get(key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: CachedResponse) -> None:
+        self.client.set(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), expire=self.ttl)
+
+    def clear(self) -> None:
+        self.client.flush_all()
+
+
+class ResponseCache:
+    """Front for a backend that counts hits, misses and bypassed requests."""
+
+    def __init__(self, backend: Any) -> None:
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._lock = threading.Lock()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'backend': type(self.backend).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'bypassed': self.bypassed,
+        }
+
+
+def _is_cacheable_request() -> bool:
+    # Only anonymous GETs with nothing flashed render identically for everyone
+    return (
+        request.method in ('GET', 'HEAD')
+        and 'user_id' not in session
+        and '_flashes' not in session
+    )
+
+
+def cache_anonymous(view: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Decorator caching a view's full response for logged-out visitors.
+
+    The key includes the current post version (bumped by triggers on every
+    post insert/update/delete), so writes invalidate all cached pages at once.
+
+    Args:
+        view: The view function to decorate.
+
+    Returns:
+        The decorated view function.
+    """
+    @functools.wraps(view)
+    def wrapped_view(**kwargs: Any) -> Any:
+        cache: Optional[ResponseCache] = current_app.extensions.get('flaskr.response_cache')
+        if cache is None:
+            return view(**kwargs)
+        if not _is_cacheable_request():
+            cache._count('bypassed')
+            return view(**kwargs)
+
+        key = f"{request.endpoint}:{get_post_version()}:{request.full_path}"
+        entry = cache.backend.get(key)
+        if entry is not None:
+            cache._count('hits')
+            body, status, content_type = entry
+            response = Response(body, status=status, content_type=content_type)
+            response.headers['X-Cache'] = 'HIT'
+            return response
+
+        cache._count('misses')
+        response = make_response(view(**kwargs))
+        if response.status_code == 200 and not response.is_streamed:
+            cache.backend.set(key, (response.get_data(), response.status_code, response.content_type))
+        response.headers['X-Cache'] = 'MISS'
+        return response
+
+    return wrapped_view
+
+
+def _create_backend(app: Any) -> Optional[Any]:
+    kind = (app.config.get('RESPONSE_CACHE_BACKEND') or 'none').lower()
+    size = app.config.get('RESPONSE_CACHE_SIZE', 256)
+    ttl = app.config.get('RESPONSE_CACHE_TTL', 300)
+
+    if kind == 'memory':
+        return MemoryBackend(size, ttl)
+    if kind == 'filesystem':
+        directory = app.config.get('RESPONSE_CACHE_DIR') or os.path.join(app.instance_path, 'response_cache')
+        return FileSystemBackend(directory, size, ttl)
+    if kind == 'external':
+        return ExternalBackend(app.config.get('RESPONSE_CACHE_CLIENT') or LocalExternalClient(), ttl)
+    if kind != 'none':
+        app.logger.warning("Unknown RESPONSE_CACHE_BACKEND '%s'; response caching disabled.", kind)
+    return None
+
+
+def cache_stats() -> Any:
+    """Report response, user, author and post count cache counters as JSON."""
+    stats: Dict[str, Any] = {}
+    cache: Optional[ResponseCache] = current_app.extensions.get('flaskr.response_cache')
+    if cache is not None:
+        stats['response_cache'] = cache.stats()
+    user_cache = current_app.extensions.get('flaskr.user_cache')
+    if user_cache is not None:
+        stats['user_cache'] = user_cache.stats()
+    author_cache = current_app.extensions.get('flaskr.author_cache')
+    if author_cache is not None:
+        stats['author_cache'] = author_cache.stats()
+    count_cache = current_app.extensions.get('flaskr.count_cache')
+    if count_cache is not None:
+        stats['count_cache'] = count_cache.stats()
+    return jsonify(stats)
+
+
+def init_app(app: Any) -> None:
+    """
+    Set up the response cache backend chosen by RESPONSE_CACHE_BACKEND.
+
+    Also registers the /cache-stats endpoint when CACHE_STATS_ENDPOINT is set.
+
+    Args:
+        app: The Flask application instance.
+    """
+    backend = _create_backend(app)
+    if backend is not None:
+        app.extensions['flaskr.response_cache'] = ResponseCache(backend)
+        app.logger.debug("Response cache enabled (%s).", type(backend).__name__)
+
+    if app.config.get('CACHE_STATS_ENDPOINT'):
+        app.add_url_rule('/cache-stats', 'cache_stats', cache_stats)
+
+# ----- End of file content -----
@@ -1,8 +1,13 @@
-# Filename: ./flaskr/schema.sql
-# ----- Start of file content -----
+-- Filename: ./flaskr/schema.sql
+-- ----- Start of file content -----
 -- Ensure tables are dropped before creation to allow repeatable initialization
 DROP TABLE IF EXISTS user;
 DROP TABLE IF EXISTS post;
+DROP TABLE IF EXISTS version_counter;
+DROP TABLE IF EXISTS post_fts;
+DROP TABLE IF EXISTS post_tag;
+DROP TABLE IF EXISTS tag;
+DROP TABLE IF EXISTS stats;
 
 -- User table: Stores login information
 CREATE TABLE user (
@@ -16,16 +21,106 @@ CREATE TABLE post (
   id INTEGER PRIMARY KEY AUTOINCREMENT,     -- Unique ID for each post
   author_id INTEGER NOT NULL,               -- Foreign key linking to the user who wrote the post
   created TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, -- Timestamp when the post was created, defaults to now
+  updated TIMESTAMP,                        -- Timestamp of the last edit (NULL = never edited)
   title TEXT NOT NULL,                      -- Title of the post, must be provided
   body TEXT NOT NULL,                       -- Main content of the post, must be provided
+  body_html TEXT,                           -- Rendered HTML of body, refreshed on every save (NULL = not rendered yet)
   FOREIGN KEY (author_id) REFERENCES user (id) -- Enforce relationship: author_id must exist in user table
     ON DELETE CASCADE -- Optional: If a user is deleted, delete their posts too. Consider implications.
 );
 
 -- Optional: Add indexes for performance on frequently queried columns
-CREATE INDEX idx_post_author_id ON post (author_id);
-CREATE INDEX idx_post_created ON post (created);
-CREATE UNIQUE INDEX idx_user_username ON user (username); -- Already implicitly created by UNIQUE constraint, but can be explicit
+-- (author_id, created, id) serves the /user/<username> listing: seek to one author,
+-- then walk their posts newest first without a sort (it also covers author_id lookups)
+DROP INDEX IF EXISTS idx_post_author_id;
+CREATE INDEX IF NOT EXISTS idx_post_author_created ON post (author_id, created, id);
+-- Composite (created, id) index serves ORDER BY created DESC, id DESC and keyset cursors;
+-- it replaces the original single-column idx_post_created
+DROP INDEX IF EXISTS idx_post_created;
+CREATE INDEX IF NOT EXISTS idx_post_created_id ON post (created, id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_user_username ON user (username); -- Already implicitly created by UNIQUE constraint, but can be explicit
+
+-- Version counter: bumped by triggers on every post write, so caches can
+-- invalidate everything derived from the post table with one PK lookup
+CREATE TABLE IF NOT EXISTS version_counter (
+  name TEXT PRIMARY KEY,                    -- Which data set the version tracks (e.g. 'post')
+  value INTEGER NOT NULL DEFAULT 0,         -- Incremented on every change
+  changed TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP -- When value last changed (drives Last-Modified)
+);
+INSERT OR IGNORE INTO version_counter (name, value) VALUES ('post', 0);
+
+CREATE TRIGGER IF NOT EXISTS post_version_insert AFTER INSERT ON post BEGIN
+  UPDATE version_counter SET value = value + 1, changed = CURRENT_TIMESTAMP WHERE name = 'post';
+END;
+CREATE TRIGGER IF NOT EXISTS post_version_update AFTER UPDATE ON post BEGIN
+  UPDATE version_counter SET value = value + 1, changed = CURRENT_TIMESTAMP WHERE name = 'post';
+END;
+CREATE TRIGGER IF NOT EXISTS post_version_delete AFTER DELETE ON post BEGIN
+  UPDATE version_counter SET value = value + 1, changed = CURRENT_TIMESTAMP WHERE name = 'post';
+END;
+
+-- Site statistics kept up to date by triggers, so totals are a primary-key
+-- lookup instead of COUNT(*) over the post table. author_id 0 holds the
+-- site-wide value; any other author_id holds that author's value.
+CREATE TABLE IF NOT EXISTS stats (
+  name TEXT NOT NULL,                       -- What is counted (e.g. 'posts')
+  author_id INTEGER NOT NULL DEFAULT 0,     -- 0 = whole site, otherwise user.id
+  value INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (name, author_id)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS stats_post_insert AFTER INSERT ON post BEGIN
+  INSERT INTO stats (name, author_id, value) VALUES ('posts', 0, 1), ('posts', new.author_id, 1)
+    ON CONFLICT (name, author_id) DO UPDATE SET value = value + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS stats_post_delete AFTER DELETE ON post BEGIN
+  UPDATE stats SET value = value - 1 WHERE name = 'posts' AND author_id IN (0, old.author_id);
+END;
+CREATE TRIGGER IF NOT EXISTS stats_post_author AFTER UPDATE OF author_id ON post
+WHEN new.author_id != old.author_id BEGIN
+  UPDATE stats SET value = value - 1 WHERE name = 'posts' AND author_id = old.author_id;
+  INSERT INTO stats (name, author_id, value) VALUES ('posts', new.author_id, 1)
+    ON CONFLICT (name, author_id) DO UPDATE SET value = value + 1;
+END;
+
+-- Tags: a post has any number of tags, listed at /tag/<name>
+CREATE TABLE IF NOT EXISTS tag (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  name TEXT UNIQUE NOT NULL                 -- Lowercase, e.g. 'python'
+);
+
+-- post_tag carries a copy of post.created so a tag listing is one range scan of
+-- the primary key (tag_id, created, post_id); posts are then fetched by id.
+CREATE TABLE IF NOT EXISTS post_tag (
+  tag_id INTEGER NOT NULL REFERENCES tag (id),
+  created TIMESTAMP NOT NULL,               -- Same value as post.created
+  post_id INTEGER NOT NULL REFERENCES post (id),
+  PRIMARY KEY (tag_id, created, post_id)
+) WITHOUT ROWID;
+-- Finds a post's tags (listings, edits, deletes)
+CREATE INDEX IF NOT EXISTS idx_post_tag_post ON post_tag (post_id, tag_id);
+
+CREATE TRIGGER IF NOT EXISTS post_tag_delete AFTER DELETE ON post BEGIN
+  DELETE FROM post_tag WHERE post_id = old.id;
+END;
+
+-- Full-text index over post titles and bodies. It stores no copy of the text
+-- (content='post'); the triggers below keep it in sync with the post table.
+-- 'flask rebuild-search-index' creates/backfills it on existing databases.
+CREATE VIRTUAL TABLE IF NOT EXISTS post_fts USING fts5(
+  title, body, content='post', content_rowid='id', tokenize='porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS post_fts_insert AFTER INSERT ON post BEGIN
+  INSERT INTO post_fts (rowid, title, body) VALUES (new.id, new.title, new.body);
+END;
+CREATE TRIGGER IF NOT EXISTS post_fts_delete AFTER DELETE ON post BEGIN
+  INSERT INTO post_fts (post_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+END;
+CREATE TRIGGER IF NOT EXISTS post_fts_update AFTER UPDATE OF title, body ON post BEGIN
+  INSERT INTO post_fts (post_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+  INSERT INTO post_fts (rowid, title, body) VALUES (new.id, new.title, new.body);
+END;
 
 -- Explanation:
 -- - `DROP TABLE IF EXISTS`: Ensures the script can be run multiple times without errors.
@@ -36,3 +131,7 @@ CREATE UNIQUE INDEX idx_user_username ON user (username); -- Already implicitly
 -- - `FOREIGN KEY`: Establishes a link between `post.author_id` and `user.id`.
 -- - `ON DELETE CASCADE`: (Optional) If a user referenced by posts is deleted, all their posts are also automatically deleted. Remove this if you prefer to handle orphaned posts differently (e.g., set author_id to NULL or prevent user deletion).
 -- - `CREATE INDEX`: Improves the speed of lookups based on the indexed columns (e.g., finding all posts by an author or sorting by creation date).
+-- - `idx_post_created_id`: Lets cursor pagination seek straight to `(created, id) < (?, ?)` instead of skipping OFFSET rows.
+-- - `IF NOT EXISTS`, `DROP INDEX IF EXISTS` and `INSERT OR IGNORE` statements are also run by 'flask upgrade-db'
+--   to add new tables/indexes/triggers to an existing database. New post columns are added there too
+--   (see db.POST_COLUMN_MIGRATIONS): keep both in sync when changing the post table.
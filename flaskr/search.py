@@ -0,0 +1,116 @@
+# Filename: ./flaskr/search.py
+# ----- Start of file content -----
+import re
+from typing import Any, List, Optional, Tuple
+
+from flask import Blueprint, current_app, render_template, request, url_for
+from markupsafe import Markup, escape
+
+from flaskr.db import get_db, read_only
+from flaskr.http_cache import conditional
+from flaskr.pagination import (decode_cursor, encode_cursor, get_per_page,
+                               per_page_args)
+
+bp = Blueprint('search', __name__)
+
+RESULTS_PER_PAGE = 10 # Default; ?per_page= may change it up to MAX_POSTS_PER_PAGE
+# bm25() column weights: a match in the title counts ten times a body match
+TITLE_WEIGHT, BODY_WEIGHT = 10.0, 1.0
+# Control characters mark matches in snippet() output; they can't occur in HTML
+_MATCH_START, _MATCH_END = '\x02', '\x03'
+
+
+def build_match_query(text: str) -> Optional[str]:
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+
+    Each word becomes a quoted phrase (all must match), so user input can
+    never be parsed as FTS5 query syntax.
+
+    Args:
+        text: The raw search box contents.
+
+    Returns:
+        The MATCH expression, or None if the text has no searchable words.
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"' for word in words)
+
+
+def _highlight(snippet: str) -> Markup:
+    # Escape the post text, then turn the match markers into <mark> tags
+    html = str(escape(snippet))
+    return Markup(html.replace(_MATCH_START, '<mark>').replace(_MATCH_END, '</mark>'))
+
+
+def search_posts(match: str, after: Optional[Tuple[float, int]], limit: int) -> Tuple[List[Any], bool]:
+    """
+    Return ranked matches for an FTS5 expression, best first.
+
+    Results are paged by keyset on (score, id) rather than OFFSET.
+
+    Args:
+        match: An expression from build_match_query().
+        after: (score, id) of the last result on the previous page.
+        limit: Page size.
+
+    Returns:
+        (results, has_next). Each result has id, title, created, author_id,
+        username, score and a highlighted snippet.
+    """
+    score_after, id_after = after if after is not None else (float('-inf'), 0)
+    rows = get_db().execute(
+        'SELECT * FROM ('
+        '  SELECT p.id, p.title, p.created, p.author_id, u.username,'
+        '         snippet(post_fts, -1, ?, ?, \'…\', 24) AS snippet,'
+        '         bm25(post_fts, ?, ?) AS score'
+        '  FROM post_fts'
+        '  JOIN post p ON p.id = post_fts.rowid'
+        '  JOIN user u ON u.id = p.author_id'
+        '  WHERE post_fts MATCH ?'
+        ')'
+        ' WHERE (score, id) > (?, ?)'
+        ' ORDER BY score, id LIMIT ?',
+        (_MATCH_START, _MATCH_END, TITLE_WEIGHT, BODY_WEIGHT, match,
+         score_after, id_after, limit + 1)
+    ).fetchall()
+
+    results = [dict(row, snippet=_highlight(row['snippet'])) for row in rows[:limit]]
+    return results, len(rows) > limit
+
+
+@bp.route('/search')
+@read_only
+@conditional
+def search() -> str:
+    """
+    Full-text search over post titles and bodies.
+    Query parameters: q (search text), per_page and 'after' (cursor for the next page).
+    """
+    query = request.args.get('q', '').strip()
+    match = build_match_query(query)
+    results: List[Any] = []
+    next_url = None
+
+    if match is not None:
+        cursor = decode_cursor(request.args.get('after'))
+        after: Optional[Tuple[float, int]] = None
+        if cursor is not None:
+            # bm25 scores travel through the cursor as text; compare them as numbers
+            try:
+                after = (float(cursor[0]), cursor[1])
+            except ValueError:
+                current_app.logger.warning("Ignoring malformed search cursor.")
+        per_page = get_per_page(RESULTS_PER_PAGE)
+        results, has_next = search_posts(match, after, per_page)
+        if has_next:
+            last = results[-1]
+            next_url = url_for('search.search', q=query, after=encode_cursor(repr(last['score']), last['id']),
+                               **per_page_args())
+        current_app.logger.debug("Search for %r returned %s results.", query, len(results))
+
+    return render_template('blog/search.html', query=query, results=results, next_url=next_url)
+
+# ----- End of file content -----
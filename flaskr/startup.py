@@ -0,0 +1,130 @@
+# Filename: ./flaskr/startup.py
+# ----- Start of file content -----
+import os
+import time
+from typing import Any, Dict
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+
+class StartupTimer:
+    """
+    Records how long each phase of create_app() takes.
+
+    The result is kept in app.extensions['flaskr.startup'], logged once the
+    app is built and printed by 'flask warmup', so boot cost can be tracked
+    across deploys.
+    """
+
+    def __init__(self) -> None:
+        self.started = self._last = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+
+    def mark(self, phase: str) -> None:
+        """Close the phase that ends now."""
+        now = time.perf_counter()
+        self.phases[phase] = now - self._last
+        self._last = now
+
+    @property
+    def total(self) -> float:
+        return self._last - self.started
+
+    def report(self) -> str:
+        """One line, e.g. 'total 41.2 ms (config 0.3, blueprints 30.1, ...)'."""
+        phases = ', '.join(f'{name} {seconds * 1000:.1f}' for name, seconds in self.phases.items())
+        return f'total {self.total * 1000:.1f} ms ({phases})'
+
+
+def configure_bytecode_cache(app: Any) -> None:
+    """
+    Persist compiled templates under the instance folder.
+
+    Each worker otherwise compiles base.html and every page template from
+    source on first use. With the cache, only the first process after a
+    template change compiles it; the others load the bytecode. Jinja checks
+    the source checksum, so edited templates are recompiled automatically.
+    Must run before app.jinja_env is first used. TEMPLATE_BYTECODE_CACHE
+    defaults to on, except for TESTING apps.
+
+    Args:
+        app: The Flask application instance.
+    """
+    enabled = app.config.get('TEMPLATE_BYTECODE_CACHE')
+    if not (enabled if enabled is not None else not app.testing):
+        return
+    from jinja2 import FileSystemBytecodeCache
+
+    directory = app.config.get('TEMPLATE_BYTECODE_CACHE_DIR') or os.path.join(
+        app.instance_path, 'jinja_cache'
+    )
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(directory)}
+
+
+def warmup(app: Any) -> Dict[str, float]:
+    """
+    Do the work a cold worker would otherwise do on its first requests.
+
+    Compiles every template (writing the bytecode cache), imports the lazily
+    loaded Markdown renderer and reads the index listing so SQLite's pages
+    are in the OS cache. Can also be called from a server hook (e.g.
+    gunicorn's post_fork) to warm each worker in-process.
+
+    Args:
+        app: The Flask application instance.
+
+    Returns:
+        Seconds spent per step.
+    """
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    templates = app.jinja_env.list_templates(extensions=('html', 'xml'))
+    for name in templates:
+        app.jinja_env.get_template(name)
+    timings['templates'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with app.app_context():
+        from flaskr.render import render_markdown
+        render_markdown('warm *up*')
+    timings['markdown'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with app.app_context():
+        from flaskr.posts import get_posts_page
+        get_posts_page(None, None, app.config['POSTS_PER_PAGE'])
+    timings['database'] = time.perf_counter() - started
+
+    app.logger.info("Warmed up %s templates in %.1f ms.", len(templates), timings['templates'] * 1000)
+    return timings
+
+
+@click.command('warmup', help='Precompile templates and prime caches, then report startup cost.')
+@with_appcontext
+def warmup_command() -> None:
+    """
+    Flask CLI command to warm the template bytecode cache after a deploy.
+    Usage: flask warmup
+    """
+    app = current_app._get_current_object()
+    timer = app.extensions.get('flaskr.startup')
+    if timer is not None:
+        click.echo(f'Startup: {timer.report()}')
+    timings = warmup(app)
+    click.echo('Warmup: ' + ', '.join(f'{name} {seconds * 1000:.1f} ms' for name, seconds in timings.items()))
+
+
+def init_app(app: Any) -> None:
+    """
+    Register the warmup command.
+
+    Args:
+        app: The Flask application instance.
+    """
+    app.cli.add_command(warmup_command)
+
+# ----- End of file content -----
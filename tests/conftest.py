@@ -1,5 +1,6 @@
 import os
 import tempfile
+from datetime import datetime, timedelta
 
 import pytest
 from flaskr import create_app
@@ -28,6 +29,42 @@ def app():
     os.unlink(db_path)
 
 
+@pytest.fixture
+def make_app(app):
+    """Build another app on the test database, e.g. make_app(COMPRESS_ENABLED=False)."""
+    def make(**config):
+        return create_app({'TESTING': True, 'DATABASE': app.config['DATABASE'], **config})
+    return make
+
+
+@pytest.fixture
+def add_posts(app):
+    """
+    Insert posts one minute apart from 2019-01-01 00:00, all newer than the
+    post in data.sql.
+
+    add_posts(3) adds 'post 0'..'post 2'; add_posts(posts=[(title, body), ...])
+    adds the given posts. body_html may contain {i}, the post's position.
+    """
+    def add(count=0, author_id=1, body_html=None, posts=None):
+        if posts is None:
+            posts = [(f'post {i}', 'body') for i in range(count)]
+        start = datetime(2019, 1, 1)
+        rows = [
+            (title, body, body_html.format(i=i) if body_html else None, author_id,
+             (start + timedelta(minutes=i)).strftime('%Y-%m-%d %H:%M:%S'))
+            for i, (title, body) in enumerate(posts)
+        ]
+        with app.app_context():
+            db = get_db()
+            db.executemany(
+                'INSERT INTO post (title, body, body_html, author_id, created) VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+            db.commit()
+    return add
+
+
 @pytest.fixture
 def client(app):
     return app.test_client()
@@ -0,0 +1,29 @@
+-- The schema of the first release, used to test that upgrade-db migrates old databases.
+-- Ensure tables are dropped before creation to allow repeatable initialization
+DROP TABLE IF EXISTS user;
+DROP TABLE IF EXISTS post;
+
+-- User table: Stores login information
+CREATE TABLE user (
+  id INTEGER PRIMARY KEY AUTOINCREMENT, -- Unique ID for each user
+  username TEXT UNIQUE NOT NULL,       -- Username, must be unique and provided
+  password TEXT NOT NULL                 -- Hashed password, must be provided
+);
+
+-- Post table: Stores blog post content
+CREATE TABLE post (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,     -- Unique ID for each post
+  author_id INTEGER NOT NULL,               -- Foreign key linking to the user who wrote the post
+  created TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, -- Timestamp when the post was created, defaults to now
+  title TEXT NOT NULL,                      -- Title of the post, must be provided
+  body TEXT NOT NULL,                       -- Main content of the post, must be provided
+  FOREIGN KEY (author_id) REFERENCES user (id) -- Enforce relationship: author_id must exist in user table
+    ON DELETE CASCADE -- Optional: If a user is deleted, delete their posts too. Consider implications.
+);
+
+-- Optional: Add indexes for performance on frequently queried columns
+CREATE INDEX idx_post_author_id ON post (author_id);
+CREATE INDEX idx_post_created ON post (created);
+CREATE UNIQUE INDEX idx_user_username ON user (username); -- Already implicitly created by UNIQUE constraint, but can be explicit
+
+-- Explanation:
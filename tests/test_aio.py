@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+
+from flaskr.aio import AsyncConnection, asgi_app, get_async_db
+from flaskr.auth import login_required
+from flaskr.db import read_only
+
+
+@pytest.fixture
+def async_app(app):
+    @app.route('/async/posts')
+    async def async_posts():
+        db = get_async_db()
+        rows = await db.fetchall('SELECT title FROM post ORDER BY id')
+        return {'titles': [row['title'] for row in rows]}
+
+    @app.route('/async/private', methods=('POST',))
+    @login_required
+    async def async_private():
+        db = get_async_db()
+        await db.execute('UPDATE post SET title = ? WHERE id = 1', ('async',))
+        await db.commit()
+        return 'ok'
+
+    return app
+
+
+def test_async_view_reads(async_app, client):
+    assert client.get('/async/posts').get_json() == {'titles': ['test title']}
+
+
+def test_async_view_login_required(async_app, client, auth):
+    assert client.post('/async/private').headers['Location'].startswith('/auth/login')
+    auth.login()
+    assert client.post('/async/private').data == b'ok'
+    assert client.get('/async/posts').get_json() == {'titles': ['async']}
+
+
+def test_async_connection_closed_on_teardown(app):
+    with app.app_context():
+        db = get_async_db()
+        assert get_async_db() is db
+        asyncio.run(db.fetchone('SELECT 1'))
+        assert db._conn is not None
+    assert db._conn is None
+
+
+def test_async_connection_uses_pool(make_app):
+    pooled = make_app(DATABASE_POOL_ENABLED=True)
+    with pooled.app_context():
+        db = get_async_db()
+        asyncio.run(db.fetchone('SELECT 1'))
+        conn = db._conn
+    # Returned to the same pool get_db() checks out of
+    assert pooled.extensions['flaskr.db_pool']._idle == [conn]
+
+
+def test_async_read_only_view(make_app):
+    routed = make_app(DATABASE_READONLY=True)
+
+    @routed.route('/async/readonly')
+    @read_only
+    async def async_readonly():
+        db = get_async_db()
+        return {'query_only': (await db.fetchone('PRAGMA query_only'))[0]}
+
+    assert routed.test_client().get('/async/readonly').get_json() == {'query_only': 1}
+    with routed.app_context():
+        assert get_async_db() is not get_async_db(readonly=True)
+
+
+def test_queries_run_on_executor(app):
+    with app.app_context():
+        db = AsyncConnection(app)
+        row = asyncio.run(db.fetchone('SELECT 1'))
+        assert row[0] == 1
+        assert app.extensions['flaskr.db_executor']._thread_name_prefix == 'flaskr-db'
+        db.close()
+
+
+def test_asgi_entry_point(app):
+    from asgiref.testing import ApplicationCommunicator
+
+    async def get(path):
+        communicator = ApplicationCommunicator(asgi_app(app), {
+            'type': 'http', 'http_version': '1.1', 'method': 'GET', 'path': path,
+            'raw_path': path.encode(), 'query_string': b'', 'headers': [],
+            'scheme': 'http', 'server': ('testserver', 80),
+        })
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+        start = await communicator.receive_output(5)
+        return start['status']
+
+    assert asyncio.run(get('/hello')) == 200
+
+
+def test_asgi_requests_run_concurrently(app):
+    import threading
+    import time
+
+    from asgiref.testing import ApplicationCommunicator
+
+    threads = set()
+
+    @app.route('/slow')
+    def slow():
+        threads.add(threading.current_thread().name)
+        time.sleep(0.3)
+        return 'done'
+
+    async def get(path):
+        communicator = ApplicationCommunicator(application, {
+            'type': 'http', 'http_version': '1.1', 'method': 'GET', 'path': path,
+            'raw_path': path.encode(), 'query_string': b'', 'headers': [],
+            'scheme': 'http', 'server': ('testserver', 80),
+        })
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+        return (await communicator.receive_output(5))['status']
+
+    async def both():
+        return await asyncio.gather(get('/slow'), get('/slow'))
+
+    application = asgi_app(app)
+    started = time.perf_counter()
+    assert asyncio.run(both()) == [200, 200]
+    # Run one after another, the two requests would take 0.6 s
+    assert time.perf_counter() - started < 0.55
+    assert len(threads) == 2
+
+    # ASGI_WORKERS bounds how many are served at once
+    app.config['ASGI_WORKERS'] = 1
+    application = asgi_app(app)
+    started = time.perf_counter()
+    assert asyncio.run(both()) == [200, 200]
+    assert time.perf_counter() - started >= 0.6
+
+
+def test_api_stats_async_view(client):
+    assert client.get('/api/stats').get_json() == {'posts': 1, 'users': 2}
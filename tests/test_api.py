@@ -0,0 +1,60 @@
+import json
+
+
+def test_list_posts_cursor_pagination(client, app, add_posts):
+    add_posts(4)
+    page = client.get('/api/posts?limit=2').get_json()
+    assert [p['title'] for p in page['posts']] == ['post 3', 'post 2']
+    assert page['prev'] is None
+
+    page = client.get(f"/api/posts?limit=2&after={page['next']}").get_json()
+    assert [p['title'] for p in page['posts']] == ['post 1', 'post 0']
+    assert page['prev'] is not None
+
+    last = client.get(f"/api/posts?limit=2&after={page['next']}").get_json()
+    assert [p['title'] for p in last['posts']] == ['test title']
+    assert last['next'] is None
+
+    back = client.get(f"/api/posts?limit=2&before={last['prev']}").get_json()
+    assert [p['title'] for p in back['posts']] == ['post 1', 'post 0']
+
+
+def test_get_post(client):
+    post = client.get('/api/posts/1').get_json()
+    assert post['title'] == 'test title'
+    assert post['author'] == {'id': 1, 'username': 'test'}
+    assert post['created'] == '2018-01-01 00:00:00'
+
+
+def test_api_errors_are_json(client):
+    response = client.get('/api/posts/99')
+    assert response.status_code == 404
+    assert 'error' in response.get_json()
+    assert client.get('/api/posts?after=bogus').status_code == 400
+    assert client.get('/api/users/nobody/posts').status_code == 404
+
+
+def test_list_user_posts(client, app, add_posts):
+    add_posts(2, author_id=2)
+    posts = client.get('/api/users/other/posts').get_json()['posts']
+    assert [p['title'] for p in posts] == ['post 1', 'post 0']
+    assert all(p['author']['username'] == 'other' for p in posts)
+
+
+def test_export_streams_ndjson(client, app, monkeypatch, add_posts):
+    monkeypatch.setattr('flaskr.api.EXPORT_FETCH_SIZE', 2)
+    add_posts(4)
+    response = client.get('/api/posts/export.ndjson')
+    assert response.is_streamed
+    assert response.mimetype == 'application/x-ndjson'
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line)['title'] for line in lines] == [
+        'test title', 'post 0', 'post 1', 'post 2', 'post 3'
+    ]
+
+
+def test_api_limit_bounded_by_config(app, client, add_posts):
+    app.config['MAX_POSTS_PER_PAGE'] = 1
+    add_posts(1)
+    assert len(client.get('/api/posts?limit=50').get_json()['posts']) == 1
+    assert len(client.get('/api/posts?per_page=50').get_json()['posts']) == 1
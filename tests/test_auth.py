@@ -1,5 +1,6 @@
 import pytest
 from flask import g, session
+from flaskr.auth import invalidate_user
 from flaskr.db import get_db
 
 
@@ -54,4 +55,50 @@ def test_logout(client, auth):
 
     with client:
         auth.logout()
-        assert 'user_id' not in session
\ No newline at end of file
+        assert 'user_id' not in session
+
+def test_user_loaded_lazily_and_cached(client, auth, app):
+    auth.login()
+    cache = app.extensions.get('flaskr.user_cache')
+    baseline = cache.stats() if cache else {'hits': 0, 'misses': 0}
+
+    # /hello never reads g.user, so no lookup happens at all
+    client.get('/hello')
+    cache = app.extensions.get('flaskr.user_cache')
+    assert (cache.stats() if cache else baseline) == baseline
+
+    client.get('/')
+    client.get('/')
+    stats = app.extensions['flaskr.user_cache'].stats()
+    assert stats['misses'] == baseline['misses'] + 1
+    assert stats['hits'] == baseline['hits'] + 1
+
+
+def test_invalidate_user(client, auth, app):
+    auth.login()
+    client.get('/')
+
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE user SET username = 'renamed' WHERE id = 1")
+        db.commit()
+
+    # Cached record is served (in the nav bar) until invalidated
+    assert b'<span>renamed</span>' not in client.get('/').data
+    with app.app_context():
+        invalidate_user(1)
+    assert b'<span>renamed</span>' in client.get('/').data
+
+
+def test_deleted_user_clears_session(client, auth, app):
+    auth.login()
+    with app.app_context():
+        db = get_db()
+        db.execute('DELETE FROM user WHERE id = 1')
+        db.commit()
+        invalidate_user(1)
+
+    with client:
+        client.get('/')
+        assert g.user is None
+        assert 'user_id' not in session
@@ -0,0 +1,30 @@
+import os
+
+from benchmarks.bench import compare, seed_database, summarize
+from flaskr import create_app
+from flaskr.db import get_db
+
+
+def test_summarize_percentiles():
+    stats = summarize([i / 1000 for i in range(1, 101)], elapsed=2.0)
+    assert stats['requests'] == 100
+    assert stats['p50_ms'] == 50.0
+    assert stats['p95_ms'] == 95.0
+    assert stats['p99_ms'] == 99.0
+    assert stats['throughput_rps'] == 50.0
+
+
+def test_seed_database(tmp_path):
+    app = create_app({'TESTING': True, 'DATABASE': os.path.join(tmp_path, 'bench.sqlite')})
+    seed_database(app, users=3, posts=25, body_size=300)
+    with app.app_context():
+        db = get_db()
+        assert db.execute('SELECT COUNT(*) FROM user').fetchone()[0] == 3
+        assert db.execute('SELECT COUNT(*) FROM post WHERE body_html IS NOT NULL').fetchone()[0] == 25
+    assert app.test_client().get('/').status_code == 200
+
+
+def test_compare_flags_regressions():
+    baseline = {'results': {'wsgi': {'GET /': {'p95_ms': 10.0}}}}
+    assert compare({'wsgi': {'GET /': {'p95_ms': 10.5}}}, baseline, threshold=10) == []
+    assert compare({'wsgi': {'GET /': {'p95_ms': 12.0}}}, baseline, threshold=10) == ['[wsgi] GET /: +20.0%']
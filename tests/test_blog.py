@@ -1,5 +1,10 @@
+import re
+from datetime import datetime
+
 import pytest
+from flaskr.blog import invalidate_post_count
 from flaskr.db import get_db
+from flaskr.pagination import decode_cursor, encode_cursor
 
 
 def test_index(client, auth):
@@ -89,4 +94,191 @@ def test_delete(client, auth, app):
     with app.app_context():
         db = get_db()
         post = db.execute('SELECT * FROM post WHERE id = 1').fetchone()
-        assert post is None
\ No newline at end of file
+        assert post is None
+
+
+def test_index_cursor_pagination(app, client, add_posts):
+    add_posts(11)
+    app.config['PAGINATION_MODE'] = 'cursor'
+
+    response = client.get('/')
+    assert b'post 10' in response.data
+    assert b'post 6' in response.data
+    assert b'post 5' not in response.data
+    assert b'page=' not in response.data
+    assert b'before=' not in response.data
+
+    # Follow 'Next' links to the last page, collecting titles on the way
+    seen = []
+    url = '/'
+    for _ in range(3):
+        data = client.get(url).data.decode()
+        seen += [line for line in data.split('>') if line.startswith('post ') or line.startswith('test title')]
+        match = re.search(r'href="(/\?after=[^"]+)"', data)
+        if match is None:
+            break
+        url = match.group(1)
+    assert len(seen) == 12
+    assert 'test title</a' in seen
+
+    # From the last page 'Previous' leads back to the second page
+    match = re.search(r'href="(/\?before=[^"]+)"', data)
+    assert match is not None
+    data = client.get(match.group(1)).data
+    assert b'post 5' in data
+    assert b'post 1' in data
+    assert b'post 6' not in data
+
+
+def test_index_malformed_cursor(client):
+    response = client.get('/?after=not-a-cursor')
+    assert response.status_code == 200
+    assert b'test title' in response.data
+
+
+def test_cursor_round_trip():
+    token = encode_cursor(datetime(2018, 1, 1), 42)
+    assert decode_cursor(token) == ('2018-01-01 00:00:00', 42)
+    assert decode_cursor('') is None
+    assert decode_cursor('%%%') is None
+
+
+def test_index_cursor_uses_index(app):
+    with app.app_context():
+        plan = get_db().execute(
+            'EXPLAIN QUERY PLAN SELECT id FROM post'
+            ' WHERE (created, id) < (?, ?) ORDER BY created DESC, id DESC LIMIT 5',
+            ('2018-01-01 00:00:00', 1)
+        ).fetchall()
+    details = ' '.join(row['detail'] for row in plan)
+    assert 'idx_post_created_id' in details
+    assert 'TEMP B-TREE' not in details
+
+
+def test_post_count_cached(app, client, add_posts):
+    app.config['POST_COUNT_CACHE_TTL'] = 60
+    app.extensions.pop('flaskr.response_cache', None) # Observe the count cache on its own
+    add_posts(5)
+    assert b'Page 1 of 2' in client.get('/').data
+
+    # Rows added behind the app's back are not counted until the cache expires...
+    add_posts(5)
+    assert b'Page 1 of 2' in client.get('/').data
+
+    # ...but writes through the blog invalidate it
+    with app.app_context():
+        invalidate_post_count()
+    assert b'Page 1 of 3' in client.get('/').data
+
+
+def test_index_without_total(app, client, add_posts):
+    app.config['PAGINATION_SHOW_TOTAL'] = False
+    add_posts(5)
+    data = client.get('/').data
+    assert b'Page 1<' in data
+    assert b'href="/?page=2"' in data
+    assert b'href="/?page=3"' not in client.get('/?page=2').data
+
+
+def test_create_update_render_body_html(client, auth, app):
+    auth.login()
+    client.post('/create', data={'title': 'md', 'body': '# Heading'})
+    with app.app_context():
+        post = get_db().execute("SELECT * FROM post WHERE title = 'md'").fetchone()
+        assert post['body_html'] == '<h1>Heading</h1>'
+        post_id = post['id']
+
+    client.post(f'/{post_id}/update', data={'title': 'md', 'body': '*edited*'})
+    with app.app_context():
+        post = get_db().execute('SELECT * FROM post WHERE id = ?', (post_id,)).fetchone()
+        assert post['body_html'] == '<p><em>edited</em></p>'
+
+    assert b'<p><em>edited</em></p>' in client.get('/').data
+
+
+def test_user_posts_page(app, client, add_posts):
+    add_posts(7)
+    response = client.get('/user/test')
+    assert b'Posts by test' in response.data
+    assert response.data.count(b'<article class="post">') == 5
+    assert b'/user/test?after=' in response.data
+    assert client.get('/user/nobody').status_code == 404
+
+
+def test_create_and_update_tags(client, auth, app):
+    auth.login()
+    client.post('/create', data={'title': 'tagged', 'body': 'b', 'tags': 'Flask, web'})
+    response = client.get('/tag/flask')
+    assert b'Posts tagged &#34;flask&#34;' in response.data
+    assert b'tagged' in response.data
+    assert b'href="/tag/web"' in response.data
+
+    with app.app_context():
+        post_id = get_db().execute("SELECT id FROM post WHERE title = 'tagged'").fetchone()[0]
+    assert b'value="flask, web"' in client.get(f'/{post_id}/update').data
+    client.post(f'/{post_id}/update', data={'title': 'tagged', 'body': 'b', 'tags': 'web'})
+    assert b'<article' not in client.get('/tag/flask').data
+    assert client.get('/tag/missing').status_code == 404
+
+
+def test_streamed_index(app, client, add_posts):
+    app.config.update(STREAM_LISTINGS=True, STREAM_FLUSH_SIZE=256)
+    add_posts(7)
+    response = client.get('/')
+    assert response.is_streamed
+    chunks = list(response.response)
+    assert len(chunks) > 1 # Sent in several pieces rather than one string
+    page = b''.join(chunk if isinstance(chunk, bytes) else chunk.encode() for chunk in chunks)
+    assert page.count(b'<article class="post">') == 5
+    assert b'Page 1 of 2' in page
+    assert b'href="/?page=2"' in page
+    # Never stored in the response cache
+    assert client.get('/').headers['X-Cache'] == 'MISS'
+
+
+def test_streamed_cursor_pages(app, client, add_posts):
+    app.config.update(STREAM_LISTINGS=True, PAGINATION_MODE='cursor')
+    add_posts(7)
+    first = client.get('/').get_data(as_text=True)
+    next_url = re.search(r'href="(/\?after=[^"]+)"', first).group(1)
+    second = client.get(next_url.replace('&amp;', '&')).get_data(as_text=True)
+    assert second.count('<article class="post">') == 3
+    assert 'before=' in second and 'after=' not in second
+
+
+def test_streamed_empty_listing(app, client):
+    app.config['STREAM_LISTINGS'] = True
+    with app.app_context():
+        get_db().execute('DELETE FROM post')
+        get_db().commit()
+    assert b'No posts found.' in client.get('/').data
+
+
+def test_per_page_parameter(app, client, add_posts):
+    add_posts(12)
+    response = client.get('/?per_page=10')
+    assert response.data.count(b'<article class="post">') == 10
+    assert b'Page 1 of 2' in response.data
+    assert b'href="/?page=2&amp;per_page=10"' in response.data
+
+    # Clamped to MAX_POSTS_PER_PAGE and to at least one post
+    app.config['MAX_POSTS_PER_PAGE'] = 3
+    assert client.get('/?per_page=1000').data.count(b'<article class="post">') == 3
+    assert client.get('/?per_page=0').data.count(b'<article class="post">') == 1
+
+
+def test_per_page_cursor_and_author_pages(app, client, add_posts):
+    app.config['POSTS_PER_PAGE'] = 2
+    add_posts(5)
+    response = client.get('/user/test')
+    assert response.data.count(b'<article class="post">') == 2
+    response = client.get('/user/test?per_page=4')
+    assert response.data.count(b'<article class="post">') == 4
+    assert re.search(rb'href="/user/test\?after=[^"]+per_page=4"', response.data)
+
+
+def test_author_page_shows_post_count(app, client, add_posts):
+    add_posts(2)
+    assert b'3 posts' in client.get('/user/test').data
+    assert b'0 posts' in client.get('/user/other').data
+    assert b'post-count' not in client.get('/').data
@@ -0,0 +1,112 @@
+import gzip
+import os
+import shutil
+
+from flask import Response, url_for
+
+from flaskr.compress import compress_static
+
+
+def _add_long_post(app):
+    from flaskr.db import get_db
+    with app.app_context():
+        db = get_db()
+        db.execute(
+            "INSERT INTO post (title, body, author_id) VALUES ('long', ?, 1)", ('lorem ipsum ' * 200,)
+        )
+        db.commit()
+
+
+def test_html_gzipped(app, client):
+    _add_long_post(app)
+    response = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert b'lorem ipsum' in gzip.decompress(response.data)
+
+
+def test_not_compressed_without_accept_encoding(app, client):
+    _add_long_post(app)
+    response = client.get('/')
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+
+def test_small_and_streamed_responses_skipped(app, client):
+    @app.route('/stream')
+    def stream():
+        return Response((b'x' * 1000 for _ in range(3)), mimetype='text/plain')
+
+    assert 'Content-Encoding' not in client.get('/hello', headers={'Accept-Encoding': 'gzip'}).headers
+
+    response = client.get('/stream', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert len(response.data) == 3000
+
+
+def test_disabled(make_app):
+    plain = make_app(COMPRESS_ENABLED=False)
+    _add_long_post(plain)
+    response = plain.test_client().get('/', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_versioned_static_url(app, client):
+    with app.test_request_context():
+        url = url_for('static', filename='style.css')
+        assert '?v=' in url
+        # Missing files get no version
+        assert '?v=' not in url_for('static', filename='missing.css')
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert 'immutable' in response.headers['Cache-Control']
+    assert 'max-age=31536000' in response.headers['Cache-Control']
+    assert 'no-cache' not in response.headers['Cache-Control']
+    response.close()
+
+
+def test_precompressed_static(app, client, tmp_path):
+    shutil.copy(app.static_folder + '/style.css', tmp_path / 'style.css')
+    app.static_folder = str(tmp_path)
+
+    written = compress_static(str(tmp_path))
+    assert [p.rsplit('/', 1)[-1] for p in written] == ['style.css.gz']
+    # Already up to date: nothing rewritten
+    assert compress_static(str(tmp_path)) == []
+
+    response = client.get('/static/style.css', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.mimetype == 'text/css'
+    assert gzip.decompress(response.data) == (tmp_path / 'style.css').read_bytes()
+    response.close()
+
+    response = client.get('/static/style.css')
+    assert 'Content-Encoding' not in response.headers
+    response.close()
+
+
+def test_stale_precompressed_static_ignored(app, client, tmp_path):
+    source = tmp_path / 'style.css'
+    shutil.copy(app.static_folder + '/style.css', source)
+    app.static_folder = str(tmp_path)
+    compress_static(str(tmp_path))
+
+    # Edit the stylesheet without re-running compress-static
+    source.write_text('body { color: red; }\n')
+    stat = os.stat(tmp_path / 'style.css.gz')
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    response = client.get('/static/style.css', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.data == b'body { color: red; }\n'
+    response.close()
+
+
+def test_compress_static_command(app, runner, tmp_path):
+    (tmp_path / 'app.js').write_text('console.log(1);\n' * 100)
+    (tmp_path / 'logo.png').write_bytes(b'\x89PNG' * 200)
+    app.static_folder = str(tmp_path)
+    result = runner.invoke(args=['compress-static'])
+    assert 'app.js.gz' in result.output
+    assert 'Wrote 1 compressed files.' in result.output
@@ -1,7 +1,13 @@
+import json
+import os
 import sqlite3
 
 import pytest
-from flaskr.db import get_db
+from flask import g
+
+from flaskr.auth import get_user
+from flaskr.db import (ConnectionPool, _connect, apply_pragmas, get_db,
+                       register_connection_hook)
 
 
 def test_get_close_db(app):
@@ -24,4 +30,328 @@ def test_init_db_command(runner, monkeypatch):
     monkeypatch.setattr('flaskr.db.init_db', fake_init_db)
     result = runner.invoke(args=['init-db'])
     assert 'Initialized' in result.output
-    assert Recorder.called
\ No newline at end of file
+    assert Recorder.called
+
+@pytest.fixture
+def pooled_app(app):
+    app.config['DATABASE_POOL_SIZE'] = 2
+    app.extensions['flaskr.db_pool'] = ConnectionPool(
+        lambda: _connect(app), app.config['DATABASE_POOL_SIZE']
+    )
+    yield app
+    app.extensions.pop('flaskr.db_pool').close()
+
+
+def test_pool_reuses_connection(pooled_app):
+    with pooled_app.app_context():
+        db = get_db()
+
+    # Returned to the pool rather than closed
+    with pooled_app.app_context():
+        assert get_db() is db
+        assert get_db().execute('SELECT 1').fetchone()[0] == 1
+
+
+def test_pool_rolls_back_on_return(pooled_app):
+    with pooled_app.app_context():
+        db = get_db()
+        db.execute("UPDATE post SET title = 'uncommitted'")
+        assert db.in_transaction
+
+    with pooled_app.app_context():
+        db = get_db()
+        assert not db.in_transaction
+        assert db.execute('SELECT title FROM post').fetchone()[0] == 'test title'
+
+
+def test_pool_replaces_unhealthy_connection(pooled_app):
+    with pooled_app.app_context():
+        db = get_db()
+    db.close()
+
+    with pooled_app.app_context():
+        assert get_db() is not db
+        assert get_db().execute('SELECT 1').fetchone()[0] == 1
+
+
+def test_pool_size_limits_idle_connections(pooled_app):
+    pool = pooled_app.extensions['flaskr.db_pool']
+    conns = [pool.acquire() for _ in range(3)]
+    for conn in conns:
+        pool.release(conn)
+
+    # Only two are kept; the overflow connection was closed
+    with pytest.raises(sqlite3.ProgrammingError):
+        conns[2].execute('SELECT 1')
+    assert {id(pool.acquire()), id(pool.acquire())} == {id(conns[0]), id(conns[1])}
+
+
+def test_connection_hook_runs_once_per_connection(pooled_app):
+    calls = []
+    register_connection_hook(pooled_app, calls.append)
+
+    for _ in range(3):
+        with pooled_app.app_context():
+            get_db()
+    assert len(calls) == 1
+
+
+def test_pool_enabled_by_config(app, make_app):
+    with app.app_context():
+        assert 'flaskr.db_pool' not in app.extensions
+    pooled = make_app(DATABASE_POOL_ENABLED=True)
+    assert isinstance(pooled.extensions['flaskr.db_pool'], ConnectionPool)
+
+
+def test_database_pragmas_applied(app):
+    with app.app_context():
+        db = get_db()
+        assert db.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert db.execute('PRAGMA busy_timeout').fetchone()[0] == 5000
+        assert db.execute('PRAGMA synchronous').fetchone()[0] == 1 # NORMAL
+        assert db.execute('PRAGMA temp_store').fetchone()[0] == 2 # MEMORY
+
+
+def test_invalid_pragma_rejected():
+    conn = sqlite3.connect(':memory:')
+    with pytest.raises(ValueError):
+        apply_pragmas(conn, {'journal_mode': 'wal; DROP TABLE post'})
+
+
+def test_init_db_persistent_pragmas(app, runner):
+    app.config['DATABASE_PRAGMAS'] = {}
+    app.config['DATABASE_PERSISTENT_PRAGMAS'] = {'journal_mode': 'wal', 'page_size': 8192}
+    result = runner.invoke(args=['init-db', '--persistent-pragmas'])
+    assert 'Applied persistent pragmas.' in result.output
+
+    # A fresh connection without per-connection pragmas still sees them
+    conn = sqlite3.connect(app.config['DATABASE'])
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert conn.execute('PRAGMA page_size').fetchone()[0] == 8192
+    conn.close()
+
+
+def test_wal_checkpoint_command(runner):
+    result = runner.invoke(args=['wal-checkpoint', '--mode', 'truncate'])
+    assert 'Checkpoint TRUNCATE: busy=0' in result.output
+
+
+def test_export_import_posts_round_trip(app, runner, tmp_path):
+    path = tmp_path / 'posts.ndjson'
+    result = runner.invoke(args=['export-posts', str(path)])
+    assert 'Exported 1 posts.' in result.output
+    line = json.loads(path.read_text())
+    assert line['author'] == 'test'
+    assert line['created'] == '2018-01-01 00:00:00'
+
+    result = runner.invoke(args=['import-posts', str(path), '--batch-size', '1', '--drop-indexes'])
+    assert 'Imported 1 posts, skipped 0' in result.output
+
+    with app.app_context():
+        db = get_db()
+        rows = db.execute('SELECT title, body_html FROM post ORDER BY id').fetchall()
+        assert [row['title'] for row in rows] == ['test title', 'test title']
+        assert '<p>' in rows[1]['body_html']
+        # The dropped indexes were rebuilt after the load
+        names = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {'idx_post_author_created', 'idx_post_created_id'} <= names
+
+
+def test_import_posts_csv_skips_unknown_authors(app, runner, tmp_path):
+    path = tmp_path / 'posts.csv'
+    path.write_text(
+        'title,body,author,created,updated\n'
+        'from csv,body,other,,\n'
+        'orphan,body,nobody,,\n'
+    )
+    result = runner.invoke(args=['import-posts', str(path), '--no-render'])
+    assert 'Imported 1 posts, skipped 1' in result.output
+
+    with app.app_context():
+        post = get_db().execute("SELECT * FROM post WHERE title = 'from csv'").fetchone()
+        assert post['author_id'] == 2
+        assert post['body_html'] is None
+        assert post['created'] is not None
+
+
+def test_import_posts_normalizes_timestamps(app, client, tmp_path):
+    from flaskr.db import import_posts
+
+    records = [
+        {'title': 'iso', 'body': 'b', 'author': 'test', 'created': '2019-01-01T10:00:00Z'},
+        {'title': 'offset', 'body': 'b', 'author': 'test', 'created': '2019-01-01T12:00:00+02:00',
+         'updated': '2019-01-02 08:30:15.250'},
+        {'title': 'bad', 'body': 'b', 'author': 'test', 'created': 'yesterday'},
+    ]
+    path = tmp_path / 'posts.ndjson'
+    path.write_text(''.join(json.dumps(record) + '\n' for record in records))
+    with app.app_context(), open(path) as f:
+        assert import_posts(f, render=False) == (2, 1)
+        rows = get_db().execute(
+            "SELECT title, CAST(created AS TEXT), CAST(updated AS TEXT) FROM post"
+            " WHERE title IN ('iso', 'offset') ORDER BY title"
+        ).fetchall()
+        assert [tuple(row) for row in rows] == [
+            ('iso', '2019-01-01 10:00:00', None),
+            ('offset', '2019-01-01 10:00:00', '2019-01-02 08:30:15'),
+        ]
+    # Listings can still parse every row
+    assert client.get('/').status_code == 200
+
+
+def test_import_posts_skips_incomplete_records(app, tmp_path):
+    from flaskr.db import import_posts
+
+    records = [
+        {'title': 'complete', 'body': 'b', 'author': 'test'},
+        {'body': 'no title', 'author': 'test'},
+        {'title': 'no body', 'author': 'test'},
+        {'title': '', 'body': 'empty title', 'author': 'test'},
+    ]
+    path = tmp_path / 'posts.ndjson'
+    path.write_text(''.join(json.dumps(record) + '\n' for record in records))
+    with app.app_context(), open(path) as f:
+        assert import_posts(f, render=False) == (1, 3)
+
+
+def test_import_posts_rolls_back_failed_batch(app, tmp_path):
+    from flaskr.db import import_posts
+
+    records = [{'title': f'ok {i}', 'body': 'b', 'author': 'test'} for i in range(3)]
+    records += [{'title': 'ok 3', 'body': 'b', 'author': 'test'},
+                {'title': 'ok 4', 'body': 'b', 'author': 'test'},
+                {'title': 'ok 5', 'body': {'not': 'text'}, 'author': 'test'}]
+    path = tmp_path / 'posts.ndjson'
+    path.write_text(''.join(json.dumps(record) + '\n' for record in records))
+    with app.app_context(), open(path) as f:
+        with pytest.raises(sqlite3.Error):
+            import_posts(f, batch_size=3, drop_indexes=True, render=False)
+    with app.app_context():
+        db = get_db()
+        # The first batch was committed, the failed one not at all
+        titles = [row[0] for row in db.execute("SELECT title FROM post WHERE title LIKE 'ok %' ORDER BY id")]
+        assert titles == ['ok 0', 'ok 1', 'ok 2']
+        indexes = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert 'idx_post_created_id' in indexes
+
+
+def test_export_import_users(app, runner, tmp_path):
+    path = tmp_path / 'users.csv'
+    runner.invoke(args=['export-users', str(path)])
+    path.write_text(path.read_text() + 'newcomer,pbkdf2:sha256:1$x$y\n')
+
+    # Existing usernames are ignored, only the new one is inserted
+    result = runner.invoke(args=['import-users', str(path)])
+    assert 'Imported 1 users.' in result.output
+
+
+def test_upgrade_db_migrates_first_release_schema(app, client, runner, tmp_path):
+    # A database created by the first release, before any migration existed
+    old_db = tmp_path / 'old.sqlite'
+    tests_dir = os.path.dirname(__file__)
+    conn = sqlite3.connect(old_db)
+    for name in ('schema_baseline.sql', 'data.sql'):
+        with open(os.path.join(tests_dir, name), encoding='utf8') as f:
+            conn.executescript(f.read())
+    conn.close()
+    app.config['DATABASE'] = str(old_db)
+
+    result = runner.invoke(args=['upgrade-db'])
+    assert 'Applied' in result.output
+
+    with app.app_context():
+        db = get_db()
+        names = {row[0] for row in db.execute('SELECT name FROM sqlite_master')}
+        assert {'version_counter', 'post_version_insert', 'post_version_update', 'post_version_delete',
+                'tag', 'post_tag', 'post_tag_delete', 'stats', 'stats_post_insert', 'post_fts',
+                'idx_post_created_id', 'idx_post_author_created'} <= names
+        assert not {'idx_post_author_id', 'idx_post_created'} & names
+        columns = {row[1] for row in db.execute('PRAGMA table_info(post)')}
+        assert {'updated', 'body_html'} <= columns
+        # Existing data is kept, counted and indexed for search
+        assert db.execute('SELECT COUNT(*) FROM post').fetchone()[0] == 1
+        rows = db.execute(
+            "SELECT author_id, value FROM stats WHERE name = 'posts' ORDER BY author_id"
+        ).fetchall()
+        assert [tuple(row) for row in rows] == [(0, 1), (1, 1)]
+
+    # The app works on the upgraded database
+    assert b'test title' in client.get('/').data
+    assert b'test title' in client.get('/search?q=test').data
+
+    # Running it again changes nothing
+    runner.invoke(args=['upgrade-db'])
+    with app.app_context():
+        assert get_db().execute("SELECT COUNT(*) FROM version_counter").fetchone()[0] == 1
+
+
+def test_rebuild_stats_command(app, runner):
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE stats SET value = 42")
+        db.commit()
+    result = runner.invoke(args=['rebuild-stats'])
+    assert 'Counted 1 posts.' in result.output
+    with app.app_context():
+        assert get_db().execute("SELECT value FROM stats WHERE author_id = 0").fetchone()[0] == 1
+
+
+def test_readonly_connection_routing(app):
+    with app.app_context():
+        # Without read routing both are the same connection
+        assert get_db(readonly=True) is get_db()
+
+    app.config['DATABASE_READONLY'] = True
+    with app.app_context():
+        reader = get_db(readonly=True)
+        assert reader.execute('SELECT COUNT(*) FROM post').fetchone()[0] == 1
+        with pytest.raises(sqlite3.OperationalError):
+            reader.execute("DELETE FROM post")
+
+        # Inside a @read_only view get_db() means the read-only connection
+        g.db_readonly = True
+        assert get_db() is reader
+        writer = get_db(readonly=False)
+        assert writer is not reader
+
+    with app.app_context():
+        # Once the primary is open, reads use it and see uncommitted writes
+        writer = get_db()
+        writer.execute("INSERT INTO post (title, body, author_id) VALUES ('x', 'y', 1)")
+        assert get_db(readonly=True) is writer
+
+
+def test_replica_refresh(app, client, runner, tmp_path):
+    replica = tmp_path / 'replica.sqlite'
+    app.config['DATABASE_REPLICA'] = str(replica)
+    # Reads fall back to the primary until the replica exists
+    assert b'test title' in client.get('/').data
+
+    result = runner.invoke(args=['refresh-replica'])
+    assert 'Copied' in result.output
+    with app.app_context():
+        db = get_db()
+        db.execute("INSERT INTO post (title, body, author_id) VALUES ('fresh', 'post', 1)")
+        cursor = db.execute("INSERT INTO user (username, password) VALUES ('new', 'x')")
+        db.commit()
+        # Users only on the primary are still found
+        assert get_user(cursor.lastrowid)['username'] == 'new'
+
+    assert b'fresh' not in client.get('/').data
+    runner.invoke(args=['refresh-replica'])
+    assert b'fresh' in client.get('/').data
+
+
+def test_missing_replica_warned_once(make_app, tmp_path, caplog):
+    replicated = make_app(DATABASE_REPLICA=str(tmp_path / 'replica.sqlite'), RESPONSE_CACHE_BACKEND='none')
+    client = replicated.test_client()
+    assert b'test title' in client.get('/').data
+    assert b'test title' in client.get('/').data
+    warnings = [r for r in caplog.records if r.levelname == 'WARNING' and 'replica.sqlite' in r.getMessage()]
+    assert len(warnings) == 1
+
+
+def test_refresh_replica_requires_config(runner):
+    result = runner.invoke(args=['refresh-replica'])
+    assert result.exit_code != 0
+    assert 'DATABASE_REPLICA' in result.output
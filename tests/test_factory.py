@@ -1,4 +1,8 @@
+import json
+
+import pytest
 from flaskr import create_app
+from flaskr.log import stop_logging
 
 
 def test_config():
@@ -8,4 +12,26 @@ def test_config():
 
 def test_hello(client):
     response = client.get('/hello')
-    assert response.data == b'Hello, World!'
\ No newline at end of file
+    assert response.data == b'Hello, World!'
+
+@pytest.mark.parametrize('as_json', (False, True))
+def test_queued_file_logging(tmp_path, as_json):
+    app = create_app({
+        'LOG_DIR': str(tmp_path),
+        'LOG_MAX_BYTES': 1024,
+        'LOG_BACKUP_COUNT': 2,
+        'LOG_JSON': as_json,
+    })
+    listener = app.extensions['flaskr.log_listener']
+    app.logger.info('hello %s', 'queue')
+    stop_logging(app) # Drains the queue
+
+    handler = listener.handlers[0]
+    assert handler.maxBytes == 1024
+    assert handler.backupCount == 2
+    lines = (tmp_path / 'flaskr.log').read_text().splitlines()
+    if as_json:
+        entries = [json.loads(line) for line in lines]
+        assert {'level': 'INFO', 'message': 'hello queue'}.items() <= entries[-1].items()
+    else:
+        assert 'INFO: hello queue' in lines[-1]
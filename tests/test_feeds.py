@@ -0,0 +1,98 @@
+import xml.etree.ElementTree as ET
+
+from flaskr.db import get_db, get_post_version_info
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+def test_atom_feed(app, client, add_posts):
+    add_posts(2, body_html='<p>post {i} & co</p>')
+    response = client.get('/feed.atom')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/atom+xml'
+    feed = ET.fromstring(response.data)
+    entries = feed.findall(f'{ATOM}entry')
+    assert [e.find(f'{ATOM}title').text for e in entries] == ['post 1', 'post 0', 'test title']
+    assert entries[0].find(f'{ATOM}content').text == '<p>post 1 & co</p>'
+    assert entries[0].find(f'{ATOM}published').text == '2019-01-01T00:01:00Z'
+    assert entries[2].find(f'{ATOM}link').get('href') == 'http://localhost/#post-1'
+
+
+def test_rss_feed(app, client, add_posts):
+    app.config['FEED_SIZE'] = 1
+    add_posts(2)
+    response = client.get('/feed.rss')
+    assert response.mimetype == 'application/rss+xml'
+    items = ET.fromstring(response.data).findall('channel/item')
+    assert [item.find('title').text for item in items] == ['post 1']
+    assert items[0].find('pubDate').text == 'Tue, 01 Jan 2019 00:01:00 GMT'
+
+
+def test_feed_conditional_get(app, client, add_posts):
+    response = client.get('/feed.atom')
+    with app.app_context():
+        _, changed = get_post_version_info()
+    # When the post write behind the current feed happened
+    assert response.last_modified.replace(tzinfo=None) == changed.replace(microsecond=0)
+    etag = response.headers['ETag']
+    assert client.get('/feed.atom', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get(
+        '/feed.atom', headers={'If-Modified-Since': response.headers['Last-Modified']}
+    ).status_code == 304
+
+    add_posts(1)
+    response = client.get('/feed.atom', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_feed_rebuilt_only_when_posts_change(app, client, monkeypatch, add_posts):
+    app.config['FEED_SIZE'] = 1
+    add_posts(2)
+    builds = []
+    from flaskr import feeds
+    original = feeds._build_feed
+    monkeypatch.setattr(feeds, '_build_feed', lambda *args: builds.append(args) or original(*args))
+
+    first = client.get('/feed.rss')
+    client.get('/feed.rss')
+    assert len(builds) == 1
+
+    # Editing a post outside the feed rebuilds it, but the ETag stays valid
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE post SET title = 'old' WHERE title = 'post 0'")
+        db.commit()
+    assert client.get('/feed.rss', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+    assert len(builds) == 2
+
+
+def test_feed_sees_every_change_to_its_posts(app, client, add_posts):
+    app.config['FEED_SIZE'] = 1
+    add_posts(1)
+    etags = {client.get('/feed.rss').headers['ETag']}
+    # Neither touches post.updated, and both may land within the same second
+    for sql in ("UPDATE post SET title = 'first edit' WHERE title = 'post 0'",
+                "UPDATE post SET body_html = '<p>re-rendered</p>' WHERE title = 'first edit'"):
+        with app.app_context():
+            db = get_db()
+            db.execute(sql)
+            db.commit()
+        response = client.get('/feed.rss')
+        etags.add(response.headers['ETag'])
+    assert b'<title>first edit</title>' in response.data
+    assert b're-rendered' in response.data
+    assert len(etags) == 3
+
+
+def test_feed_cache_bounded_across_hosts(app, client):
+    app.config['FEED_CACHE_SIZE'] = 2
+    for i in range(5):
+        response = client.get('/feed.rss', headers={'Host': f'host{i}.example'})
+        assert f'http://host{i}.example/'.encode() in response.data
+    assert len(app.extensions['flaskr.feeds']) == 2
+
+
+def test_rss_guid_is_not_a_permalink(client):
+    guid = ET.fromstring(client.get('/feed.rss').data).find('channel/item/guid')
+    assert guid.get('isPermaLink') == 'false'
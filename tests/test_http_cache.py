@@ -0,0 +1,54 @@
+from flaskr.db import get_db
+
+
+def test_index_sets_validators(client):
+    response = client.get('/')
+    assert response.status_code == 200
+    assert response.headers['ETag'].startswith('W/"')
+    assert 'Last-Modified' in response.headers
+    assert 'no-cache' in response.headers['Cache-Control']
+    assert 'public' in response.headers['Cache-Control']
+
+
+def test_if_none_match_returns_304(client, app):
+    etag = client.get('/').headers['ETag']
+    response = client.get('/', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    # Editing a post changes the validator
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE post SET title = 'edited', updated = CURRENT_TIMESTAMP WHERE id = 1")
+        db.commit()
+    response = client.get('/', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_if_modified_since_returns_304(client):
+    last_modified = client.get('/').headers['Last-Modified']
+    response = client.get('/', headers={'If-Modified-Since': last_modified})
+    assert response.status_code == 304
+
+
+def test_304_skips_view(client, app, monkeypatch):
+    etag = client.get('/').headers['ETag']
+
+    def fail(*args, **kwargs):
+        raise AssertionError('template rendered for a 304')
+
+    monkeypatch.setattr('flaskr.blog.render_template', fail)
+    assert client.get('/', headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_etag_depends_on_user_and_page(client, auth):
+    anonymous = client.get('/').headers['ETag']
+    assert client.get('/?page=2').headers['ETag'] != anonymous
+
+    auth.login()
+    client.get('/') # Consume the login flash
+    response = client.get('/')
+    assert response.headers['ETag'] != anonymous
+    assert 'private' in response.headers['Cache-Control']
+    assert client.get('/', headers={'If-None-Match': anonymous}).status_code == 200
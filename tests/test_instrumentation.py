@@ -0,0 +1,79 @@
+import re
+
+import pytest
+from flaskr.instrumentation import InstrumentedConnection
+
+
+@pytest.fixture
+def instrumented_app(make_app):
+    return make_app(INSTRUMENTATION_ENABLED=True, RESPONSE_CACHE_BACKEND='none')
+
+
+def test_disabled_by_default(client, app):
+    response = client.get('/')
+    assert 'Server-Timing' not in response.headers
+    assert 'flaskr.metrics' not in app.extensions
+    assert client.get('/metrics').status_code == 404
+
+
+def test_server_timing_header(instrumented_app):
+    response = instrumented_app.test_client().get('/')
+    timing = response.headers['Server-Timing']
+    assert re.search(r'app;dur=[\d.]+', timing)
+    assert re.search(r'sql;dur=[\d.]+;desc="[1-9]\d* queries"', timing)
+    assert re.search(r'tpl;dur=[\d.]+', timing)
+    # data.sql's post has no cached HTML, so the markdown filter runs
+    assert re.search(r'md;dur=[\d.]+', timing)
+
+
+def test_connections_are_instrumented(instrumented_app):
+    from flaskr.db import get_db
+    with instrumented_app.app_context():
+        assert isinstance(get_db(), InstrumentedConnection)
+
+
+def test_metrics_endpoint(instrumented_app):
+    client = instrumented_app.test_client()
+    client.get('/')
+    client.get('/hello')
+
+    response = client.get('/metrics')
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    assert 'flaskr_request_duration_seconds_count{endpoint="blog.index"} 1' in text
+    assert 'flaskr_request_duration_seconds_count{endpoint="hello"} 1' in text
+    assert 'flaskr_request_duration_seconds_bucket{endpoint="blog.index",le="+Inf"} 1' in text
+    assert re.search(r'flaskr_sql_statements_total\{endpoint="blog.index"\} [1-9]', text)
+    assert 'flaskr_sql_statements_total{endpoint="hello"} 0' in text
+
+
+def test_row_fetches_are_timed(instrumented_app):
+    from flask import g
+
+    from flaskr.db import get_db
+    from flaskr.instrumentation import _start_timer
+    with instrumented_app.test_request_context():
+        _start_timer()
+        cursor = get_db().execute('WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n LIMIT 1000) SELECT i FROM n')
+        after_execute = dict(g._timings)
+        assert len(cursor.fetchmany(10)) == 10
+        assert len(list(cursor)) == 990
+        assert g._timings['sql'] > after_execute['sql']
+        # Fetches add time but not queries
+        assert g._timings['sql_count'] == after_execute['sql_count']
+
+
+def test_streamed_response_metrics_recorded_on_close(instrumented_app):
+    instrumented_app.config['STREAM_LISTINGS'] = True
+    client = instrumented_app.test_client()
+    response = client.get('/')
+    assert response.is_streamed
+    # The body isn't rendered yet, so there are no real numbers to report
+    assert 'Server-Timing' not in response.headers
+    assert b'test title' in response.get_data()
+    response.close()
+
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'flaskr_request_duration_seconds_count{endpoint="blog.index"} 1' in text
+    assert re.search(r'flaskr_sql_statements_total\{endpoint="blog.index"\} [1-9]', text)
+    assert re.search(r'flaskr_template_seconds_total\{endpoint="blog.index"\} 0\.\d*[1-9]', text)
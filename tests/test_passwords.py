@@ -0,0 +1,94 @@
+import sys
+import types
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import g
+
+from flaskr import passwords
+from flaskr.db import get_db
+from flaskr.passwords import (HashPool, hash_password, needs_rehash,
+                              verify_password)
+
+
+def test_hash_and_verify_inline(app):
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+    app.extensions.pop('flaskr.hash_pool', None)
+    with app.app_context():
+        hashed = hash_password('secret')
+        assert hashed.startswith('pbkdf2:sha256:1000$')
+        assert verify_password(hashed, 'secret')
+        assert not verify_password(hashed, 'wrong')
+        assert not needs_rehash(hashed)
+
+
+def test_verify_on_process_pool(app):
+    assert isinstance(app.extensions['flaskr.hash_pool'], HashPool)
+    with app.app_context():
+        hashed = hash_password('secret')
+        assert verify_password(hashed, 'secret')
+    pool = app.extensions['flaskr.hash_pool']
+    # Workers are not forked from the (multi-threaded) server process
+    assert pool._executor._mp_context.get_start_method() in ('forkserver', 'spawn')
+    pool.shutdown()
+
+
+def test_pools_share_one_exit_hook(app, make_app):
+    # Stopped by the module's single atexit hook, not one registered per app
+    assert app.extensions['flaskr.hash_pool'] in passwords._pools
+    assert make_app().extensions['flaskr.hash_pool'] in passwords._pools
+
+
+def test_hash_inline_in_worker_process(app, monkeypatch):
+    # A worker re-importing a main module that hashes can't start a pool
+    monkeypatch.setitem(sys.modules, '__mp_main__', types.ModuleType('__mp_main__'))
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+    with app.app_context():
+        assert verify_password(hash_password('secret'), 'secret')
+    assert app.extensions['flaskr.hash_pool']._executor is None
+
+
+def test_hash_inline_when_pool_breaks(app, monkeypatch):
+    class BrokenExecutor:
+        def submit(self, func, *args):
+            future = Future()
+            future.set_exception(BrokenProcessPool('worker died'))
+            return future
+
+    pool = app.extensions['flaskr.hash_pool']
+    pool._executor = BrokenExecutor()
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+    with app.app_context():
+        assert hash_password('secret').startswith('pbkdf2:sha256:1000$')
+    # Replaced by a fresh pool on the next hash
+    assert pool._executor is None
+
+
+def test_no_pool_when_disabled(make_app):
+    inline = make_app(PASSWORD_HASH_WORKERS=0)
+    assert 'flaskr.hash_pool' not in inline.extensions
+
+
+def test_needs_rehash_on_changed_cost(app):
+    with app.app_context():
+        app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+        hashed = hash_password('secret')
+        app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:2000'
+        assert needs_rehash(hashed)
+
+
+def test_login_rehashes_outdated_hash(app, client, auth):
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+    # The fixture user was stored with pbkdf2:sha256:50000
+    assert auth.login().headers['Location'] == '/'
+
+    with app.app_context():
+        stored = get_db().execute('SELECT password FROM user WHERE id = 1').fetchone()[0]
+    assert stored.startswith('pbkdf2:sha256:1000$')
+
+    # The upgraded hash still logs in, and the cached user row was refreshed
+    auth.logout()
+    assert auth.login().headers['Location'] == '/'
+    with client:
+        client.get('/')
+        assert g.user['password'] == stored
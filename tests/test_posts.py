@@ -0,0 +1,177 @@
+import pytest
+
+from flaskr.auth import invalidate_user
+from flaskr.db import get_db
+from flaskr.posts import (Post, PostStream, get_post_by_id, get_post_count,
+                          get_posts_page, get_tag_id, get_usernames,
+                          invalidate_post_count, parse_tags, set_post_tags)
+
+
+def test_post_row_object(app):
+    with app.app_context():
+        post = get_post_by_id(1)
+    assert isinstance(post, Post)
+    assert not hasattr(post, '__dict__')
+    assert post['title'] == post.title == 'test title'
+    assert post['username'] == 'test'
+    assert post['created'].year == 2018
+    with pytest.raises(KeyError):
+        post['missing']
+    assert dict(post)['author_id'] == 1
+
+
+def test_missing_post(app):
+    with app.app_context():
+        assert get_post_by_id(99) is None
+
+
+def test_usernames_batched_and_cached(app):
+    queries = []
+    with app.app_context():
+        get_db().set_trace_callback(queries.append)
+        assert get_usernames([1, 2, 1]) == {1: 'test', 2: 'other'}
+        assert len([q for q in queries if 'FROM user' in q]) == 1
+
+        queries.clear()
+        assert get_usernames([2]) == {2: 'other'}
+        assert not queries
+
+
+def test_listing_does_not_join_user(app):
+    queries = []
+    with app.app_context():
+        db = get_db()
+        db.executemany(
+            'INSERT INTO post (title, body, author_id, created) VALUES (?, ?, ?, ?)',
+            [(f'p{i}', 'b', 1 + i % 2, f'2019-01-0{i + 1} 00:00:00') for i in range(4)]
+        )
+        db.commit()
+        db.set_trace_callback(queries.append)
+        posts, has_prev, has_next = get_posts_page(None, None, 3)
+
+    assert [post.title for post in posts] == ['p3', 'p2', 'p1']
+    assert {post.username for post in posts} == {'test', 'other'}
+    assert (has_prev, has_next) == (False, True)
+    assert not any('JOIN user' in q for q in queries)
+    # One post scan plus one batched author lookup and one batched tag lookup
+    assert len(queries) == 3
+
+
+def test_rename_invalidates_author_cache(app):
+    with app.app_context():
+        assert get_usernames([1]) == {1: 'test'}
+        db = get_db()
+        db.execute("UPDATE user SET username = 'renamed' WHERE id = 1")
+        db.commit()
+        invalidate_user(1)
+        assert get_post_by_id(1).username == 'renamed'
+
+
+def test_parse_tags():
+    assert parse_tags('Python, flask  web,python') == ['python', 'flask', 'web']
+    assert parse_tags('') == []
+    assert len(parse_tags(' '.join(f't{i}' for i in range(20)))) == 10
+
+
+def _tag_posts(app, count):
+    with app.app_context():
+        db = get_db()
+        for i in range(count):
+            post_id = db.execute(
+                'INSERT INTO post (title, body, author_id, created) VALUES (?, ?, ?, ?)',
+                (f'tagged{i}', 'b', 2, f'2019-02-{i + 1:02d} 00:00:00')
+            ).lastrowid
+            set_post_tags(post_id, ['news'] + (['odd'] if i % 2 else []))
+        db.commit()
+
+
+def _listing_plan(app, **filters):
+    """EXPLAIN QUERY PLAN for the listing statement get_posts_page() actually runs."""
+    statements = []
+    with app.app_context():
+        db = get_db()
+        db.set_trace_callback(statements.append)
+        get_posts_page(('2030-01-01 00:00:00', 0), None, 5, **filters)
+        db.set_trace_callback(None)
+        listing = next(sql for sql in statements if 'LIMIT' in sql)
+        plan = db.execute('EXPLAIN QUERY PLAN ' + listing).fetchall()
+    return ' '.join(row['detail'] for row in plan)
+
+
+@pytest.mark.parametrize(('filters', 'index'), (
+    ({}, 'idx_post_created_id'),
+    ({'author_id': 2}, 'idx_post_author_created'),
+    ({'tag_id': 1}, 'PRIMARY KEY'),
+))
+def test_listing_query_plans(app, filters, index):
+    _tag_posts(app, 3)
+    details = _listing_plan(app, **filters)
+    assert index in details
+    assert 'SCAN' not in details.replace('SCAN post_tag USING PRIMARY KEY', '')
+    assert 'TEMP B-TREE' not in details
+
+
+def test_tag_listing(app):
+    _tag_posts(app, 4)
+    with app.app_context():
+        posts, _, has_next = get_posts_page(None, None, 10, tag_id=get_tag_id('odd'))
+        assert [post.title for post in posts] == ['tagged3', 'tagged1']
+        assert posts[0].tags == ['news', 'odd']
+        assert not has_next
+
+        # Deleting a post removes its tag links
+        db = get_db()
+        db.execute("DELETE FROM post WHERE title = 'tagged3'")
+        db.commit()
+        assert db.execute('SELECT COUNT(*) FROM post_tag').fetchone()[0] == 4
+
+
+def test_post_stream_batches(app):
+    with app.app_context():
+        db = get_db()
+        db.executemany(
+            'INSERT INTO post (title, body, author_id, created) VALUES (?, ?, 1, ?)',
+            [(f's{i}', 'b', f'2019-03-{i + 1:02d} 00:00:00') for i in range(6)]
+        )
+        db.commit()
+
+        stream = PostStream.listing(None, 4, batch_size=2, next_url=lambda last: f'next:{last.title}')
+        iterator = iter(stream)
+        assert next(iterator).title == 's5'
+        assert stream.next_url is None # Unknown until the stream is exhausted
+        titles = ['s5'] + [post.title for post in iterator]
+        assert titles == ['s5', 's4', 's3', 's2']
+        assert stream.has_next
+        assert stream.next_url == 'next:s2'
+        assert stream.prev_url is None
+
+
+def test_post_counts_maintained_by_triggers(app):
+    app.config['POST_COUNT_CACHE_TTL'] = 0
+    with app.app_context():
+        db = get_db()
+        db.executemany('INSERT INTO post (title, body, author_id) VALUES (?, ?, ?)',
+                       [('a', 'b', 2), ('c', 'd', 2), ('e', 'f', 1)])
+        assert (get_post_count(), get_post_count(1), get_post_count(2)) == (4, 2, 2)
+
+        db.execute('UPDATE post SET author_id = 1 WHERE title = ?', ('a',))
+        db.execute('DELETE FROM post WHERE title = ?', ('c',))
+        assert (get_post_count(), get_post_count(1), get_post_count(2)) == (3, 3, 0)
+        assert get_post_count(99) == 0
+
+
+def test_post_count_is_one_lookup_and_cached(app):
+    app.config['POST_COUNT_CACHE_TTL'] = 60
+    with app.app_context():
+        db = get_db()
+        statements = []
+        db.set_trace_callback(statements.append)
+        assert get_post_count(1) == 1
+        assert get_post_count(1) == 1
+        db.set_trace_callback(None)
+        assert statements == ["SELECT value FROM stats WHERE name = 'posts' AND author_id = 1"]
+
+        db.execute("INSERT INTO post (title, body, author_id) VALUES ('x', 'y', 1)")
+        assert get_post_count(1) == 1
+        invalidate_post_count()
+        assert get_post_count(1) == 2
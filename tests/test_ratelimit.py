@@ -0,0 +1,83 @@
+import pytest
+
+from flaskr.ratelimit import MemoryRateLimiter, SQLiteRateLimiter
+
+
+@pytest.mark.parametrize('make', (
+    lambda tmp_path: MemoryRateLimiter(60),
+    lambda tmp_path: SQLiteRateLimiter(str(tmp_path / 'rl.sqlite'), 60),
+))
+def test_sliding_window(tmp_path, make):
+    limiter = make(tmp_path)
+    for i in range(3):
+        assert limiter.hit('k', 3, now=600.0 + i) is None
+    assert limiter.hit('k', 3, now=610.0) == pytest.approx(50.0)
+
+    # Halfway through the next window half of the old hits still count
+    assert limiter.hit('k', 3, now=690.0) is None
+    assert limiter.hit('k', 3, now=691.0) is None
+    assert limiter.hit('k', 3, now=692.0) is not None
+    # Two windows later everything has expired
+    assert limiter.hit('k', 3, now=800.0) is None
+    # Other keys are counted separately
+    assert limiter.hit('other', 3, now=800.0) is None
+
+
+def test_memory_limiter_is_bounded():
+    limiter = MemoryRateLimiter(60, max_keys=2)
+    for key in ('a', 'b', 'c'):
+        limiter.hit(key, 1, now=0.0)
+    assert len(limiter._state) == 2
+    # 'a' was evicted, so it starts from scratch
+    assert limiter.hit('a', 1, now=1.0) is None
+
+
+def test_login_throttled_before_db(app, client, auth, monkeypatch):
+    app.config['LOGIN_RATE_LIMIT_PER_USERNAME'] = 2
+    for _ in range(2):
+        auth.login('test', 'wrong')
+
+    def fail():
+        raise AssertionError('database used for a throttled login')
+    monkeypatch.setattr('flaskr.auth.get_db', fail)
+
+    response = auth.login('test', 'test')
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) > 0
+    assert b'Too many login attempts' in response.data
+
+
+def test_login_limit_per_ip(app, auth):
+    app.config['LOGIN_RATE_LIMIT_PER_IP'] = 1
+    auth.login('a', 'a')
+    assert auth.login('b', 'b').status_code == 429
+
+
+def test_login_limit_per_ip_behind_proxy(make_app):
+    proxied = make_app(PROXY_FIX_X_FOR=1, LOGIN_RATE_LIMIT_PER_IP=1)
+    client = proxied.test_client()
+
+    def login(username, forwarded_for):
+        return client.post(
+            '/auth/login', data={'username': username, 'password': 'x'},
+            headers={'X-Forwarded-For': forwarded_for}
+        ).status_code
+
+    assert login('a', '192.0.2.1') == 200
+    # Another client behind the same proxy has its own bucket
+    assert login('b', '192.0.2.2') == 200
+    assert login('c', '192.0.2.1') == 429
+
+
+def test_sqlite_backend_shared(make_app, tmp_path):
+    config = {'LOGIN_RATE_LIMIT_BACKEND': 'sqlite', 'LOGIN_RATE_LIMIT_DATABASE': str(tmp_path / 'rl.sqlite'),
+              'LOGIN_RATE_LIMIT_PER_USERNAME': 1}
+    first, second = make_app(**config), make_app(**config)
+    assert first.test_client().post('/auth/login', data={'username': 'x', 'password': 'y'}).status_code == 200
+    # A second "worker" sees the attempt the first one recorded
+    assert second.test_client().post('/auth/login', data={'username': 'x', 'password': 'y'}).status_code == 429
+
+
+def test_disabled_backend(make_app):
+    unlimited = make_app(LOGIN_RATE_LIMIT_BACKEND='none')
+    assert 'flaskr.login_limiter' not in unlimited.extensions
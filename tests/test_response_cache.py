@@ -0,0 +1,75 @@
+import pytest
+from flaskr.db import get_db, get_post_version
+from flaskr.response_cache import (ExternalBackend, FileSystemBackend,
+                                   LocalExternalClient, MemoryBackend)
+
+
+def test_anonymous_index_cached(client, app):
+    first = client.get('/')
+    assert first.headers['X-Cache'] == 'MISS'
+    second = client.get('/')
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.data == first.data
+
+    stats = app.extensions['flaskr.response_cache'].stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+
+
+def test_logged_in_bypasses_cache(client, auth, app):
+    auth.login()
+    client.get('/') # Consume the login flash
+    response = client.get('/')
+    assert 'X-Cache' not in response.headers
+    assert app.extensions['flaskr.response_cache'].stats()['bypassed'] == 2
+
+
+def test_post_write_bumps_version(client, app):
+    client.get('/')
+    with app.app_context():
+        version = get_post_version()
+        db = get_db()
+        db.execute("UPDATE post SET title = 'changed' WHERE id = 1")
+        db.commit()
+        assert get_post_version() == version + 1
+
+    response = client.get('/')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert b'changed' in response.data
+
+
+@pytest.mark.parametrize('backend', ('memory', 'filesystem', 'external'))
+def test_backends(make_app, tmp_path, backend):
+    cached_app = make_app(RESPONSE_CACHE_BACKEND=backend, RESPONSE_CACHE_DIR=str(tmp_path))
+    client = cached_app.test_client()
+    assert client.get('/').headers['X-Cache'] == 'MISS'
+    assert client.get('/').headers['X-Cache'] == 'HIT'
+    assert b'test title' in client.get('/').data
+
+
+def test_backend_disabled(make_app):
+    uncached_app = make_app(RESPONSE_CACHE_BACKEND='none')
+    assert 'X-Cache' not in uncached_app.test_client().get('/').headers
+
+
+def test_filesystem_backend_prunes(tmp_path):
+    backend = FileSystemBackend(str(tmp_path), maxsize=2, ttl=0)
+    for i in range(4):
+        backend.set(f'key{i}', (b'body', 200, 'text/html'))
+    assert len(list(tmp_path.iterdir())) == 2
+    assert backend.get('key3') == (b'body', 200, 'text/html')
+
+
+def test_memory_and_external_backends_round_trip():
+    for backend in (MemoryBackend(2, 0), ExternalBackend(LocalExternalClient(), 0)):
+        backend.set('key', (b'body', 200, 'text/html'))
+        assert backend.get('key') == (b'body', 200, 'text/html')
+        backend.clear()
+        assert backend.get('key') is None
+
+
+def test_cache_stats_endpoint(make_app):
+    stats_app = make_app(CACHE_STATS_ENDPOINT=True)
+    client = stats_app.test_client()
+    client.get('/')
+    assert client.get('/cache-stats').get_json()['response_cache']['misses'] == 1
@@ -0,0 +1,76 @@
+import re
+
+import pytest
+from flaskr.db import get_db
+from flaskr.search import build_match_query
+
+
+def test_search_ranks_title_matches_first(client, app, add_posts):
+    add_posts(posts=[
+        ('gardening notes', 'all about tomatoes'),
+        ('tomatoes', 'a whole post'),
+    ])
+    data = client.get('/search?q=tomato').get_data(as_text=True)
+    assert data.index('<h2>tomatoes</h2>') < data.index('<h2>gardening notes</h2>')
+    assert '<mark>tomatoes</mark>' in data
+
+
+def test_search_escapes_snippets(client, app, add_posts):
+    add_posts(posts=[('xss', '<script>alert(1)</script> payload')])
+    data = client.get('/search?q=payload').get_data(as_text=True)
+    assert '<script>alert' not in data
+    assert '&lt;script&gt;' in data
+
+
+def test_search_index_follows_updates_and_deletes(client, app):
+    assert b'test title' in client.get('/search?q=body').data
+
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE post SET body = 'replaced' WHERE id = 1")
+        db.commit()
+    assert b'No posts match' in client.get('/search?q=body').data
+    assert b'test title' in client.get('/search?q=replaced').data
+
+    with app.app_context():
+        db = get_db()
+        db.execute('DELETE FROM post WHERE id = 1')
+        db.commit()
+    assert b'No posts match' in client.get('/search?q=replaced').data
+
+
+def test_search_keyset_pagination(client, app, monkeypatch, add_posts):
+    monkeypatch.setattr('flaskr.search.RESULTS_PER_PAGE', 2)
+    add_posts(posts=[(f'needle {i}', 'haystack') for i in range(5)])
+
+    seen, url = [], '/search?q=needle'
+    while url:
+        data = client.get(url).get_data(as_text=True)
+        seen += re.findall(r'<h2>(needle \d)</h2>', data)
+        match = re.search(r'href="(/search\?[^"]+)"', data)
+        url = match.group(1).replace('&amp;', '&') if match else None
+    assert sorted(seen) == [f'needle {i}' for i in range(5)]
+
+
+@pytest.mark.parametrize(('text', 'expected'), (
+    ('hello world', '"hello" "world"'),
+    ('title:"oops" OR -', '"title" "oops" "OR"'),
+    ('  ', None),
+))
+def test_build_match_query(text, expected):
+    assert build_match_query(text) == expected
+
+
+def test_rebuild_search_index_command(runner, app):
+    with app.app_context():
+        db = get_db()
+        db.executescript('DROP TABLE post_fts;')
+
+    result = runner.invoke(args=['rebuild-search-index'])
+    assert 'Indexed 1 posts' in result.output
+    with app.app_context():
+        rows = get_db().execute(
+            "SELECT rowid FROM post_fts WHERE post_fts MATCH 'test'"
+        ).fetchall()
+        assert [row[0] for row in rows] == [1]
+    assert b'test title' in app.test_client().get('/search?q=body').data
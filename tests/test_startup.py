@@ -0,0 +1,46 @@
+import sys
+
+import pytest
+
+from flaskr.startup import StartupTimer
+
+
+@pytest.fixture
+def cached_app(make_app, tmp_path):
+    """An app whose template bytecode cache lives in tmp_path/jinja."""
+    def make(**config):
+        config.setdefault('TEMPLATE_BYTECODE_CACHE', True)
+        return make_app(TEMPLATE_BYTECODE_CACHE_DIR=str(tmp_path / 'jinja'), **config)
+    return make
+
+
+def test_startup_report(app):
+    timer = app.extensions['flaskr.startup']
+    assert isinstance(timer, StartupTimer)
+    assert {'config', 'extensions', 'blueprints'} <= set(timer.phases)
+    assert timer.report().startswith('total ')
+
+
+def test_warmup_writes_bytecode_cache(cached_app, tmp_path):
+    warm = cached_app()
+    result = warm.test_cli_runner().invoke(args=['warmup'])
+    assert 'Startup: total' in result.output
+    assert 'Warmup: templates' in result.output
+    # One cache file per compiled template
+    assert len(list((tmp_path / 'jinja').iterdir())) >= len(warm.jinja_env.list_templates())
+
+
+def test_bytecode_cache_disabled(cached_app, tmp_path):
+    cold = cached_app(TEMPLATE_BYTECODE_CACHE=False)
+    assert cold.jinja_env.bytecode_cache is None
+    assert not (tmp_path / 'jinja').exists()
+
+
+def test_bytecode_cache_off_when_testing(make_app):
+    assert make_app().jinja_env.bytecode_cache is None
+
+
+def test_markdown_imported_lazily(make_app, monkeypatch):
+    monkeypatch.delitem(sys.modules, 'markdown', raising=False)
+    make_app()
+    assert 'markdown' not in sys.modules